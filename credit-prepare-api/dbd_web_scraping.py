@@ -7,6 +7,7 @@
 # - ดึงข้อมูลจากการ์ด "ข้อมูลนิติบุคคล" เป็น <juristic_id>_company_title.json
 # - รองรับหลายรหัส โดยใช้ช่องค้นหาเดิม (#textSearch/#searchicon) ไม่โหลดหน้าใหม่
 # - เมื่อเข้าแท็บ "ข้อมูลงบการเงิน" แล้วพบ <h3>ไม่พบข้อมูล</h3> ให้บันทึก JSON และข้ามการดาวน์โหลด
+# - --events run.jsonl: event JSON lines ต่อบริษัท (เวลา / จำนวนไฟล์ / byte ที่ดาวน์โหลด) + สรุป p50/p95
 # ============================================================
 
 import argparse
@@ -24,6 +25,8 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from webdriver_manager.chrome import ChromeDriverManager
 
+from services.batch_events import BatchEvents, add_event_arguments
+
 
 # ============================================================
 # Utilities
@@ -561,6 +564,15 @@ def run_for_one_company(driver, out_dir: Path, juristic_id: str):
     print("-" * 60)
 
 
+def scrape_tracked(events: BatchEvents, driver, out_dir: Path, juristic_id: str, search):
+    """search + run_for_one_company หนึ่งบริษัท พร้อมบันทึก event (ไฟล์ที่ได้ = <juristic_id>_* ใน out_dir)"""
+    with events.file(juristic_id) as rec:
+        search()
+        run_for_one_company(driver, out_dir, juristic_id)
+        files = [p for p in out_dir.glob(f"{juristic_id}_*") if p.is_file()]
+        rec.add(rows=len(files), bytes=sum(p.stat().st_size for p in files))
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--juristic-id", help="รหัสเดียว")
@@ -568,6 +580,7 @@ def main():
     ap.add_argument("--ids-file", help="ระบุไฟล์ .txt ที่มีรายชื่อ juristic id บรรทัดละหนึ่งตัว")
     ap.add_argument("--out-dir", default="./downloads")
     ap.add_argument("--headless", action="store_true")
+    add_event_arguments(ap)
     args = ap.parse_args()
 
     out_dir = Path(args.out_dir)
@@ -579,19 +592,18 @@ def main():
     print("DBD Financial Scraper (Auto PDF + 3 XLS + Company Title JSON)")
     print("=" * 60)
 
+    events = BatchEvents.from_args(args, "dbd_web_scraping", total=len(ids))
     driver = make_driver(out_dir, headless=args.headless)
     try:
         # บริษัทแรก: โหลดหน้าและค้นหาด้วยวิธีเดิม
         first_id = ids[0]
-        search_by_juristic_id(driver, first_id)
-        run_for_one_company(driver, out_dir, first_id)
+        scrape_tracked(events, driver, out_dir, first_id, lambda: search_by_juristic_id(driver, first_id))
 
         # ตัวถัดไป: ใช้ input เดิม ไม่ต้องเข้าเว็บใหม่
         for jid in ids[1:]:
             driver.execute_script("window.scrollTo(0, 0);")
             time.sleep(0.3)
-            search_via_header_input(driver, jid, out_dir)
-            run_for_one_company(driver, out_dir, jid)
+            scrape_tracked(events, driver, out_dir, jid, lambda: search_via_header_input(driver, jid, out_dir))
 
         print("=" * 60)
         print("งานครบทุกบริษัทแล้ว")
@@ -602,6 +614,7 @@ def main():
         save_debug(driver, "final_error", out_dir)
     finally:
         driver.quit()
+        events.finish()
 
 
 if __name__ == "__main__":
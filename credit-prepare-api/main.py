@@ -1,81 +1,183 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from services import bs_processor, ic_processor
 from services.bs_processor import process_bs_statements
 from services.ic_processor import process_ic_statements
+from services.api_sender import close_async_client, post_statements, post_statements_async
+from services.result_cache import ResultCache, etag_matches, folder_fingerprint
+from services.stage_metrics import METRICS, profile_request
+from services.statement_index import query_statements
+from services.statement_pool import process_statements_async, shutdown_pool
 # from services.po_processor import load_po_data, save_po_json
 # from services.inv_processor import load_invoice_data, save_inv_json
 from services.supplier_processor import load_supplier_data, save_supplier_json
 
-from services.inv_old_processor import load_old_invoice_data, save_old_inv_json
-from services.po_old_processor import load_old_po_data, save_old_po_json
+from services.batch_runner import FEEDS, discover_inputs, parse_month, print_summary, run_batch
 
 # from services.scraper import scrape_company_by_id
-import requests
 import os
+import argparse
+import time
 from dotenv import load_dotenv
 
 # โหลดค่า environment จาก .env
 load_dotenv()
 API_BASE = os.getenv("API_BASE", "")
-API_HEADERS = {"Content-Type": "application/json"}
+# รูปแบบไฟล์ผลลัพธ์ เช่น "csv" หรือ "csv,parquet" (parquet อยู่ที่ processed_data/parquet/)
+PROCESSED_FORMATS = os.getenv("PROCESSED_FORMATS", "csv")
+# ไฟล์ JSON ของ invoice/po: "json" (array, Laravel import ได้) หรือ "ndjson"; บีบอัด "gzip" / "zstd" (ว่าง = ไม่บีบอัด)
+JSON_FORMAT = os.getenv("JSON_FORMAT", "json")
+JSON_COMPRESSION = os.getenv("JSON_COMPRESSION") or None
+
+# ผลลัพธ์ BS/IC ล่าสุด (JSON + ETag) ใน memory — หมดอายุเมื่อไฟล์ใน raw_data/bs, raw_data/ic เปลี่ยน
+result_cache = ResultCache()
+RAW_FINGERPRINTS = {
+    "bs": lambda: folder_fingerprint(bs_processor.RAW_DATA_FOLDER, prefix="BS_"),
+    "ic": lambda: folder_fingerprint(ic_processor.RAW_DATA_FOLDER, prefix="IC_"),
+}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    # ปิด connection pool ของ httpx และ worker process ของ /async/process-* (ถ้าเคยถูกใช้)
+    await close_async_client()
+    await asyncio.to_thread(shutdown_pool)
+
 
 app = FastAPI(
     title="Credit Scoring Preparing API",
     description="API สำหรับประมวลผลข้อมูลงบการเงิน (BS/IC) และส่งไป API ปลายทาง",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Credit Scoring Preparing API"}
 
-@app.post("/process-bs")
-def process_bs():
-    result = process_bs_statements()
-    send_to_api = True
+def _process_and_send(kind, process):
+    fingerprint = RAW_FINGERPRINTS[kind]()
+    result = process(formats=PROCESSED_FORMATS)
+    label = kind.upper()
 
-    if send_to_api and "data" in result:
-        try:
-            processed_df = result["data"]
-            json_data = processed_df.to_json(orient='records')
-            endpoint = f"{API_BASE}/api/public/bol-bs"
+    # เก็บผลลัพธ์ไว้ให้ GET /bs, /ic ใช้ต่อ (serialize JSON ครั้งเดียว ใช้ทั้งส่งและ serve)
+    with METRICS.stage(kind, "json_serialize") as t:
+        cached = result_cache.put(kind, fingerprint, result["data"])
+        t.add(rows=cached.rows, bytes=len(cached.body))
 
-            response = requests.post(endpoint, headers=API_HEADERS, data=json_data)
-            response.raise_for_status()
+    try:
+        response = post_statements(kind, cached.body, API_BASE)
+        return {
+            "message": f"{label} processed and sent",
+            "status_code": response.status_code,
+            "rows": cached.rows,
+        }
+    except Exception as e:
+        return {"message": f"{label} processed but failed to send", "error": str(e)}
 
-            return {
-                "message": "BS processed and sent",
-                "status_code": response.status_code,
-                "rows": len(processed_df)
-            }
-        except Exception as e:
-            return {"message": "BS processed but failed to send", "error": str(e)}
+
+@app.post("/process-bs")
+def process_bs():
+    # timings = เวลา/แถว/byte ต่อ stage ของ request นี้ (ภาพรวมสะสมดูที่ GET /metrics)
+    with profile_request("process_bs"), METRICS.trace() as trace, METRICS.stage("bs", "request"):
+        result = _process_and_send("bs", process_bs_statements)
+    result["timings"] = trace.summary()
     return result
 
 
 @app.post("/process-ic")
 def process_ic():
-    result = process_ic_statements()
-    send_to_api = True
-
-    if send_to_api and "data" in result:
-        try:
-            processed_df = result["data"]
-            json_data = processed_df.to_json(orient='records')
-            endpoint = f"{API_BASE}/api/public/bol-ic"
+    # timings = เวลา/แถว/byte ต่อ stage ของ request นี้ (ภาพรวมสะสมดูที่ GET /metrics)
+    with profile_request("process_ic"), METRICS.trace() as trace, METRICS.stage("ic", "request"):
+        result = _process_and_send("ic", process_ic_statements)
+    result["timings"] = trace.summary()
+    return result
 
-            response = requests.post(endpoint, headers=API_HEADERS, data=json_data)
-            response.raise_for_status()
 
-            return {
-                "message": "IC processed and sent",
+async def _process_and_send_async(kind):
+    label = kind.upper()
+    with METRICS.trace() as trace, METRICS.stage(kind, "request"):
+        fingerprint = await asyncio.to_thread(RAW_FINGERPRINTS[kind])
+        # parse + serialize ใน worker process แล้วส่งด้วย httpx (pool เดียว) — ไม่กิน slot ของ threadpool
+        cached, _ = await process_statements_async(kind, fingerprint, PROCESSED_FORMATS)
+        result_cache.store(kind, cached)
+        try:
+            response = await post_statements_async(kind, cached.body, API_BASE)
+            result = {
+                "message": f"{label} processed and sent",
                 "status_code": response.status_code,
-                "rows": len(processed_df)
+                "rows": cached.rows,
             }
         except Exception as e:
-            return {"message": "IC processed but failed to send", "error": str(e)}
+            result = {"message": f"{label} processed but failed to send", "error": str(e)}
+    result["timings"] = trace.summary()
     return result
 
 
+@app.post("/async/process-bs")
+async def process_bs_async():
+    # เหมือน /process-bs แต่ไม่บล็อก event loop รองรับ caller พร้อมกันจำนวนมาก (ต้องติดตั้ง httpx)
+    return await _process_and_send_async("bs")
+
+
+@app.post("/async/process-ic")
+async def process_ic_async():
+    return await _process_and_send_async("ic")
+
+
+def _cached_response(request, kind, compute):
+    entry = result_cache.get_or_compute(kind, RAW_FINGERPRINTS[kind](), compute)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "X-Rows": str(entry.rows)}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+@app.get("/bs")
+def get_bs(request: Request):
+    # ข้อมูล BS ล่าสุดจาก cache; ประมวลผลใหม่เฉพาะเมื่อ raw_data/bs เปลี่ยน (ไม่ส่งไป API ปลายทาง)
+    return _cached_response(request, "bs", lambda: process_bs_statements(formats=PROCESSED_FORMATS)["data"])
+
+
+@app.get("/ic")
+def get_ic(request: Request):
+    return _cached_response(request, "ic", lambda: process_ic_statements(formats=PROCESSED_FORMATS)["data"])
+
+
+def _company_statements(statement, company_id, year):
+    rows = query_statements(statement, company_id, year)
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"ไม่พบข้อมูล {statement.upper()} ของบริษัท {company_id}")
+    return {"company_id": company_id, "rows": len(rows), "data": rows}
+
+
+@app.get("/companies/{company_id}/bs")
+def get_company_bs(company_id: str, year: Optional[int] = None):
+    # ค้นจากดัชนี SQLite ที่ process_bs_statements เขียนไว้ (ไม่ต้องโหลด bs_all_processed_data.csv)
+    return _company_statements("bs", company_id, year)
+
+
+@app.get("/companies/{company_id}/ic")
+def get_company_ic(company_id: str, year: Optional[int] = None):
+    return _company_statements("ic", company_id, year)
+
+
+@app.get("/companies/{company_id}/ratios")
+def get_company_ratios(company_id: str, year: Optional[int] = None):
+    # อัตราส่วนที่ ratio_engine คำนวณไว้ตอนประมวลผล BS/IC (ไม่ต้องเรียก CorpusX)
+    return _company_statements("ratios", company_id, year)
+
+
+@app.get("/metrics")
+def metrics():
+    # Prometheus scrape: histogram เวลาต่อ pipeline/stage + counter rows/bytes (สะสมตั้งแต่เริ่ม process)
+    return Response(content=METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 from datetime import datetime, timedelta
 
 def excel_serial_to_thai_date(serial: int) -> str:
@@ -86,7 +188,7 @@ def excel_serial_to_thai_date(serial: int) -> str:
 
 
 
-def main():
+def main(argv=None):
     # po_filename = "Transaction Data Potential customer list - 7.xlsx"
     # inv_filename = "Inv Transaction Data Potential customer list - 7.xlsx"
     # supplier_filename = "Supplier_Data_MappingDBD.xlsx"
@@ -103,83 +205,47 @@ def main():
     # supplier_output_json = "supplier_data.json"
     # save_supplier_json(supplier_data, supplier_output_json)
 
-    inv_filenames = [
-        {
-            "input_filename":"inv/Invoice_052025_new.csv", 
-            "output_filename":"invoice_052025_new.json"
-         },
-        {
-            "input_filename":"inv/Invoice_062025_new.csv", 
-            "output_filename":"invoice_062025_new.json"
-         },
-        #  {
-        #     "input_filename":"inv/invoice_042025.csv", 
-        #     "output_filename":"invoice_042025.json"
-        #  },
-        #  {
-        #     "input_filename":"inv/invoice_052025.csv", 
-        #     "output_filename":"invoice_052025.json"
-        #  },
-        #  {
-        #     "input_filename":"inv/invoice_062025.csv", 
-        #     "output_filename":"invoice_062025.json"
-        #  },
-        #  {
-        #     "input_filename":"inv/invoice_072025.csv", 
-        #     "output_filename":"invoice_072025.json"
-        #  },
-        #  {
-        #     "input_filename":"inv/invoice_082025.csv", 
-        #     "output_filename":"invoice_082025.json"
-        #  },
-    ]
-    
-    if (len(inv_filenames) > 0) :
-        for inv_filename in inv_filenames:
-            print(inv_filename["input_filename"])
-            inv_data = load_old_invoice_data(inv_filename["input_filename"])
-            print(len(inv_data))
-            print(inv_filename["output_filename"])
-            save_old_inv_json(inv_data, inv_filename["output_filename"])
-
-    po_filenames = [
-        # {
-        #     "input_filename":"po/PO_022025.csv", 
-        #     "output_filename":"po_022025.json"
-        #  },
-        # {
-        #     "input_filename":"po/PO_032025.csv", 
-        #     "output_filename":"po_032025.json"
-        #  },
-        # {
-        #     "input_filename":"po/PO_042025.csv", 
-        #     "output_filename":"po_042025.json"
-        #  },
-        # {
-        #     "input_filename":"po/PO_052025.csv", 
-        #     "output_filename":"po_052025.json"
-        #  },
-        # {
-        #     "input_filename":"po/PO_062025.csv", 
-        #     "output_filename":"po_062025.json"
-        #  },
-        # {
-        #     "input_filename":"po/PO_072025.csv", 
-        #     "output_filename":"po_072025.json"
-        #  },
-        #  {
-        #     "input_filename":"po/PO_082025.csv", 
-        #     "output_filename":"po_082025.json"
-        #  },
-    ]
-
-    if (len(po_filenames) > 0) :
-        for po_filename in po_filenames:
-            po_data = load_old_po_data(po_filename["input_filename"])
-            print(len(po_data))
-            print(po_filename["output_filename"])
-            save_old_po_json(po_data, po_filename["output_filename"])
-    
+    args = parse_args(argv)
+    feeds = list(FEEDS) if args.feed == "all" else [args.feed]
+    month_from, month_to = parse_month(args.month_from), parse_month(args.month_to)
+
+    jobs = []
+    for feed in feeds:
+        inputs = discover_inputs(feed, args.glob, month_from, month_to)
+        print(f"{feed}: {len(inputs)} file(s)")
+        jobs.extend((feed, path) for path in inputs)
+
+    t0 = time.perf_counter()
+    results, skipped, failed = run_batch(
+        jobs,
+        workers=args.workers,
+        fmt=args.format,
+        compression=args.compress,
+        formats=PROCESSED_FORMATS,
+        force=args.force,
+    )
+    print_summary(results, skipped, failed, time.perf_counter() - t0)
+    return 1 if failed else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="แปลง invoice/PO รายเดือน (raw_data/inv, raw_data/po) เป็น JSON แบบขนาน",
+        epilog='ตัวอย่าง: python main.py --feed inv --glob "inv/Invoice_*2025*.csv" --workers 8',
+    )
+    parser.add_argument("--feed", choices=["all"] + list(FEEDS), default="all")
+    parser.add_argument("--glob", default=None, help="glob ใต้ raw_data (ค่าเริ่มต้น inv/Invoice_*.csv, po/PO_*.csv)")
+    parser.add_argument("--from", dest="month_from", default=None, help="เดือนแรก YYYY-MM (จากชื่อไฟล์ MMYYYY)")
+    parser.add_argument("--to", dest="month_to", default=None, help="เดือนสุดท้าย YYYY-MM")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="จำนวน worker process")
+    parser.add_argument("--force", action="store_true", help="ประมวลผลใหม่แม้ output ใหม่กว่า input")
+    parser.add_argument("--format", choices=["json", "ndjson"], default=JSON_FORMAT)
+    parser.add_argument("--compress", choices=["gzip", "zstd"], default=JSON_COMPRESSION)
+    args = parser.parse_args(argv)
+    if args.glob and args.feed == "all":
+        parser.error("--glob ต้องระบุ --feed inv หรือ --feed po ด้วย")
+    return args
+
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
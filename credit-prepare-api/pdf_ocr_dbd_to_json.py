@@ -25,6 +25,7 @@ Usage:
 
   # ตัวเลือกเพิ่มเติม (ใช้ได้กับทุกโหมด)
   --lang tha+eng --dpi 300 --force-ocr --structured-only --text-only
+  --events run.jsonl   # event JSON lines ต่อไฟล์ (เวลา/หน้า/byte) + สรุป p50/p95
 """
 
 import argparse
@@ -38,6 +39,8 @@ import glob
 from dataclasses import dataclass, asdict
 from typing import Any, Dict, List, Optional
 
+from services.batch_events import BatchEvents, add_event_arguments
+
 TESSERACT_CMD: Optional[str] = None  # set path on Windows if needed
 
 
@@ -420,10 +423,12 @@ def merge_company_title(structured: Dict[str, Any], base_dir: str, base_pdf_stem
 
 
 # ---------- per-file processing ---------- #
-def process_one(pdf_path: str, args) -> bool:
+def process_one(pdf_path: str, args, rec=None) -> bool:
     try:
         if not os.path.isfile(pdf_path):
             print(f"❌ File not found: {pdf_path}", file=sys.stderr)
+            if rec is not None:
+                rec.fail("file not found")
             return False
 
         base_dir = os.path.dirname(pdf_path)
@@ -441,6 +446,8 @@ def process_one(pdf_path: str, args) -> bool:
             ct = clean_text(t)
             lines = [ln for ln in ct.splitlines() if ln.strip()]
             pages.append(PageResult(page=i, text=ct, lines=lines))
+        if rec is not None:
+            rec.add(pages=len(pages), bytes=os.path.getsize(pdf_path), engine=engine)
 
         if not args.structured_only:
             meta = OCRResult(
@@ -470,6 +477,8 @@ def process_one(pdf_path: str, args) -> bool:
         raise
     except Exception as e:
         print(f"❌ Error processing {pdf_path}: {e}", file=sys.stderr)
+        if rec is not None:
+            rec.fail(e)
         return False
 
 
@@ -500,6 +509,7 @@ def main():
     ap.add_argument("--structured-only", action="store_true")
     ap.add_argument("--text-only", action="store_true")
     ap.add_argument("--pattern", default="*_company_info.pdf", help="pattern ที่ใช้เมื่อ input_path เป็นโฟลเดอร์ (ค่าเริ่มต้น: *_company_info.pdf)")
+    add_event_arguments(ap)
     args = ap.parse_args()
 
     files = discover_input_files(args.input_path, default_pattern=args.pattern)
@@ -512,16 +522,20 @@ def main():
     print("============================================================")
     print(f"Found {len(files)} file(s).")
 
+    events = BatchEvents.from_args(args, "pdf_ocr_dbd_to_json", total=len(files))
     ok, fail = 0, 0
     for idx, fp in enumerate(files, start=1):
         print(f"[{idx}/{len(files)}] Processing: {fp}")
-        if process_one(fp, args):
+        with events.file(fp) as rec:
+            success = process_one(fp, args, rec)
+        if success:
             ok += 1
         else:
             fail += 1
 
     print("------------------------------------------------------------")
     print(f"Done. Success: {ok}, Failed: {fail}")
+    events.finish()
     sys.exit(0 if fail == 0 else 1)
 
 
@@ -10,6 +10,8 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 from tqdm import tqdm
 
+from services.json_stream import COMPRESSIONS, JSON_FORMATS, with_format, write_record_list
+
 # ----------------- Optional deps -----------------
 _HAS_CAMELOT = False
 try:
@@ -441,6 +443,8 @@ def main():
     p.add_argument("--input-dir", default=INPUT_DIR)
     p.add_argument("--out-dir", default=OUTPUT_DIR)
     p.add_argument("--records-only", action="store_true", help="Export only the array of records (if available).")
+    p.add_argument("--format", choices=JSON_FORMATS, default="json", help="with --records-only: json (array) | ndjson, written in chunks.")
+    p.add_argument("--compress", choices=[c for c in COMPRESSIONS if c], default=None, help="with --records-only: gzip | zstd.")
     p.add_argument("--sort-by", default=None, help="Column name to sort by (e.g. 'Invoice Date').")
     p.add_argument("--sort-desc", action="store_true", help="Sort descending.")
     p.add_argument("--strict", action="store_true", help="Enable strict validation (filters rows by patterns).")
@@ -473,12 +477,17 @@ def main():
             print(f"[WARN] sort failed: {e}", file=sys.stderr)
 
     # output
-    payload = doc["records"] if (args.records_only and "records" in doc) else doc
     os.makedirs(args.out_dir, exist_ok=True)
-    out_name = os.path.splitext(args.filename)[0] + ".json"
-    out_path = os.path.join(args.out_dir, out_name)
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+    if args.records_only and "records" in doc:
+        # records อย่างเดียว → เขียนทีละ chunk แบบไม่มี indent (ndjson / gzip / zstd ได้)
+        out_name = with_format(os.path.splitext(args.filename)[0], args.format, args.compress)
+        out_path = os.path.join(args.out_dir, out_name)
+        write_record_list(doc["records"], out_path, fmt=args.format, compression=args.compress)
+    else:
+        out_name = os.path.splitext(args.filename)[0] + ".json"
+        out_path = os.path.join(args.out_dir, out_name)
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False, indent=2)
     print(f"[OK] Saved -> {out_path} (mode: {doc.get('mode')}, strict={args.strict}, fix_lookalikes={args.fix_lookalikes})")
 
 if __name__ == "__main__":
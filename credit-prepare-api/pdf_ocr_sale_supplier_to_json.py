@@ -31,8 +31,11 @@ from bs4 import BeautifulSoup
 # ==============================
 # OCR Extraction (OpenTyphoon)
 # ==============================
+# ตั้ง env TYPHOON_OCR_URL เพื่อชี้ไป server อื่น (เช่น mock server ตอนวัดโหลด)
+OCR_URL = os.getenv("TYPHOON_OCR_URL", "https://api.opentyphoon.ai/v1/ocr")
+
 def extract_text_from_image(image_path, api_key, task_type, max_tokens, temperature, top_p, repetition_penalty, pages=None):
-    url = "https://api.opentyphoon.ai/v1/ocr"
+    url = OCR_URL
     with open(image_path, 'rb') as file:
         files = {'file': file}
         data = {
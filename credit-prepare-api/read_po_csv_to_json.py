@@ -22,26 +22,26 @@ read_po_csv_to_json.py
 - ฟอร์แมตวัน:
     * Order/Delivery/PO Report Date/PO Received Date -> YYYY-MM-DD
     * Send Date -> YYYY-MM-DD HH:mm:ss (24 ชม.)
-- บันทึกผลไว้ที่ processed_data/po/<same_name>.json
+- บันทึกผลไว้ที่ processed_data/po/<same_name>.json (เขียนทีละ chunk)
+  --format ndjson → .ndjson, --compress gzip|zstd → .gz / .zst
 """
 
 import argparse
-import json
 import re
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import pandas as pd
 
+from services.encoding_sniffer import read_csv_sniffed
+from services.json_stream import COMPRESSIONS, JSON_FORMATS, with_format, write_record_list
+
 
 # ---------- IO helpers ----------
 def read_csv_any_encoding(path: Path) -> pd.DataFrame:
-    for enc in ["utf-8-sig", "utf-8", "cp874", "tis-620", "latin1"]:
-        try:
-            return pd.read_csv(path, header=None, dtype=str, encoding=enc)
-        except Exception:
-            continue
-    raise RuntimeError(f"Cannot read CSV with known encodings: {path}")
+    # sniff BOM / ต้นไฟล์ก่อน (utf-8-sig / utf-8 / cp874 / latin1) แล้ว parse ครั้งเดียว
+    df, _ = read_csv_sniffed(path, header=None, dtype=str)
+    return df
 
 
 def read_table_any(path: Path) -> pd.DataFrame:
@@ -311,7 +311,7 @@ def _parse_amount(s: Optional[str]) -> Optional[float]:
 
 
 # ---------- Convert one file ----------
-def convert_one(path: Path) -> Path:
+def convert_one(path: Path, fmt: str = "json", compression: Optional[str] = None) -> Path:
     raw = read_table_any(path)
     buyer = extract_buyer_from_b3(raw)
 
@@ -326,16 +326,16 @@ def convert_one(path: Path) -> Path:
     df = build_data_df(raw)
     df = drop_trailing_totals_or_empty(df)
 
-    records: List[Dict[str, Any]] = [row_to_output(r, buyer, header_dates) for _, r in df.iterrows()]
+    # generator: แปลงแล้วเขียนทีละ chunk ไม่ต้องเก็บ records ทั้งหมดไว้ใน list
+    records = (row_to_output(r, buyer, header_dates) for _, r in df.iterrows())
 
     out_dir = Path("processed_data/po")
     out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / path.with_suffix(".json").name
+    out_path = out_dir / with_format(path.stem, fmt, compression)
 
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(records, f, ensure_ascii=False, indent=2)
+    count = write_record_list(records, out_path, fmt=fmt, compression=compression)
 
-    print(f"✅ Wrote {len(records)} records -> {out_path}")
+    print(f"✅ Wrote {count} records -> {out_path}")
     return out_path
 
 
@@ -351,13 +351,15 @@ def main() -> None:
         required=True,
         help="e.g. raw_data/po/po_detail_report_20251007_2050363.csv | .xlsx | .xls",
     )
+    ap.add_argument("--format", choices=JSON_FORMATS, default="json", help="json (array) | ndjson")
+    ap.add_argument("--compress", choices=[c for c in COMPRESSIONS if c], default=None, help="gzip | zstd")
     args = ap.parse_args()
 
     src = Path(args.file)
     if not src.exists():
         raise FileNotFoundError(f"File not found: {src}")
 
-    convert_one(src)
+    convert_one(src, args.format, args.compress)
 
 
 if __name__ == "__main__":
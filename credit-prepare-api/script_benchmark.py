@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+script_benchmark.py — benchmark end-to-end ของ pipeline credit-prepare ด้วยข้อมูลสังเคราะห์
+
+1) สร้าง input สังเคราะห์ (services/synthetic_data.py) ในโฟลเดอร์ทำงานชั่วคราว ตามขนาด --scale
+   BS_/IC_ CSV, invoice/PO CSV, DBD *_balance/_income/_ratios.xlsx, PDF ภาพสแกนหลายหน้า
+2) จับเวลาทีละ stage (--repeat รอบ) แล้วเขียนผลเป็น JSON (commit, เครื่อง, ขนาด, เวลาต่อ stage)
+   stage ที่ dependency ไม่ครบ (เช่น pytesseract / bs4) ถูกบันทึกเป็น skipped พร้อมเหตุผล ไม่ทำให้ทั้งชุดล้ม
+3) --compare ผลเก่า.json → แสดงอัตราส่วนเวลาเทียบกับรอบก่อน (เช่นก่อน/หลัง commit)
+
+stage:
+  bs, ic                     services.bs_processor.process_bs_statements / ic_processor.process_ic_statements
+  invoice, po                services.inv_old_processor.load_old_invoice_data / po_old_processor.load_old_po_data
+  numeric_clean              services.numeric_cleaner.clean_numeric_series กับคอลัมน์ยอดเงิน --invoice-rows แถว
+  dbd_balance, dbd_income, dbd_ratios   script_read_dbd_*.process_one_file ทีละไฟล์
+  dbd_all                    script_read_dbd_all.process_folder (ขนาน --workers)
+  dbd_wide                   balance + income process_one_file กับตารางกว้าง (--wide-years ปี, dataframe_to_year_json)
+  ocr_tesseract              pdf_ocr_inv_to_json.run_ocr (pdf2image + pytesseract)
+  ocr_typhoon                pdf_ocr_sale_invoice_to_json.process_pdfs_in_folder กับ mock server
+  send_bs, send_supplier     services.api_sender.post_statements / send_dbd_company_supplier.post_json กับ mock server
+
+Usage:
+  python script_benchmark.py [--scale small|medium|large] [--stages bs,ic,invoice,...] [--repeat 3] \
+    [--companies N] [--invoice-rows N] [--dbd-companies N] [--pdfs N --pages N] [--workers 4] \
+    [--mock-latency-ms 0] [--workdir DIR --keep] [--out benchmarks/<ts>_<commit>.json] [--compare old.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from services import synthetic_data
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCALES = {
+    "small": {"companies": 20, "years": 3, "invoice_rows": 20_000, "po_rows": 20_000, "dbd_companies": 10,
+              "wide_companies": 5, "wide_years": 40, "pdfs": 2, "pages": 3},
+    "medium": {"companies": 200, "years": 5, "invoice_rows": 200_000, "po_rows": 200_000, "dbd_companies": 50,
+               "wide_companies": 20, "wide_years": 40, "pdfs": 5, "pages": 5},
+    "large": {"companies": 1000, "years": 5, "invoice_rows": 1_000_000, "po_rows": 1_000_000, "dbd_companies": 200,
+              "wide_companies": 50, "wide_years": 40, "pdfs": 10, "pages": 10},
+}
+
+
+class Skip(Exception):
+    """stage รันไม่ได้ในเครื่องนี้ (dependency ไม่ครบ) — บันทึกเป็น skipped"""
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def require(module, reason=None):
+    try:
+        return __import__(module, fromlist=["_"])
+    except ImportError as e:
+        raise Skip(reason or f"import {module} ไม่ได้: {e}")
+
+
+# ---------------- generate ---------------- #
+
+def generate(work, p, seed):
+    """สร้าง input ทั้งหมดใต้ work (โครงเดียวกับ raw_data / downloads ของจริง)"""
+    sizes = {}
+    sizes["bs_files"] = len(synthetic_data.write_bs_csvs(work / "raw_data" / "bs", p["companies"], p["years"], seed))
+    sizes["ic_files"] = len(synthetic_data.write_ic_csvs(work / "raw_data" / "ic", p["companies"], p["years"], seed))
+    synthetic_data.write_invoice_csv(work / "raw_data" / "inv" / "Invoice_052025.csv", p["invoice_rows"], seed)
+    synthetic_data.write_po_csv(work / "raw_data" / "po" / "PO_052025.csv", p["po_rows"], seed)
+    try:
+        import script_read_dbd_balance as dbd_balance
+        import script_read_dbd_income as dbd_income
+        import script_read_dbd_ratios as dbd_ratios
+        labels = {"balance": list(dbd_balance.TH_TO_EN_MAP), "income": list(dbd_income.TH_TO_EN_INCOME)[:10],
+                  "ratios": list(dbd_ratios.TH_TO_EN_FULL)}
+    except ImportError:
+        labels = None
+    try:
+        sizes["dbd_files"] = len(synthetic_data.write_dbd_workbooks(
+            work / "downloads", p["dbd_companies"], p["years"], seed, labels=labels))
+        # ตารางกว้าง: ปีย้อนหลังยาว (ให้ปีสุดท้ายตรงกับชุดปกติ) — วัดต้นทุนต่อคอลัมน์ปีของ dataframe_to_year_json
+        sizes["dbd_wide_files"] = len(synthetic_data.write_dbd_workbooks(
+            work / "downloads_wide", p["wide_companies"], p["wide_years"], seed, labels=labels,
+            kinds=("balance", "income"), first_year=synthetic_data.FIRST_YEAR + p["years"] - p["wide_years"]))
+    except RuntimeError as e:
+        print(f"⚠ {e}")
+    sizes["pdf_files"] = len(synthetic_data.write_scanned_pdfs(work / "raw_data" / "scan", p["pdfs"], p["pages"], seed))
+    return sizes
+
+
+# ---------------- stages ---------------- #
+# แต่ละ stage: fn(ctx) → {"rows": n, ...} (ตัวนับที่ใช้คิด throughput); raise Skip ถ้ารันไม่ได้
+
+def stage_bs(ctx):
+    from services.bs_processor import process_bs_statements
+    return {"rows": process_bs_statements(formats="csv")["rows"]}
+
+
+def stage_ic(ctx):
+    from services.ic_processor import process_ic_statements
+    return {"rows": process_ic_statements(formats="csv")["rows"]}
+
+
+def stage_invoice(ctx):
+    from services.inv_old_processor import load_old_invoice_data
+    return {"rows": len(load_old_invoice_data(str(ctx["work"] / "raw_data" / "inv" / "Invoice_052025.csv")))}
+
+
+def stage_po(ctx):
+    from services.po_old_processor import load_old_po_data
+    return {"rows": len(load_old_po_data(str(ctx["work"] / "raw_data" / "po" / "PO_052025.csv")))}
+
+
+def stage_numeric_clean(ctx):
+    from services.numeric_cleaner import clean_numeric_series
+    # คอลัมน์สร้างครั้งเดียวต่อ ctx (รอบแรกรวมเวลาสร้าง — ดู best ของ --repeat)
+    if "amounts" not in ctx:
+        import pandas as pd
+        ctx["amounts"] = pd.Series(synthetic_data.amount_strings(ctx["params"]["invoice_rows"], ctx["seed"]), dtype=object)
+    return {"rows": len(clean_numeric_series(ctx["amounts"]))}
+
+
+def _dbd_reader(module, kind, folder="downloads", outdir="out_dbd"):
+    def run(ctx):
+        reader = require(module)
+        files = sorted((ctx["work"] / folder).glob(f"*_{kind}.xlsx"))
+        if not files:
+            raise Skip("ไม่มีไฟล์ DBD (ต้องมี openpyxl ตอนสร้าง)")
+        for path in files:
+            if kind == "income":
+                reader.process_one_file(path, ctx["work"] / outdir, False)
+            else:
+                reader.process_one_file(path, ctx["work"] / outdir, None, False)
+        return {"files": len(files)}
+    return run
+
+
+def stage_dbd_wide(ctx):
+    balance = _dbd_reader("script_read_dbd_balance", "balance", "downloads_wide", "out_dbd_wide")(ctx)
+    income = _dbd_reader("script_read_dbd_income", "income", "downloads_wide", "out_dbd_wide")(ctx)
+    return {"files": balance["files"] + income["files"]}
+
+
+def stage_dbd_all(ctx):
+    reader = require("script_read_dbd_all")
+    folder = ctx["work"] / "downloads"
+    companies = len(reader.discover_companies(folder)) if folder.exists() else 0
+    if not companies:
+        raise Skip("ไม่มีไฟล์ DBD (ต้องมี openpyxl ตอนสร้าง)")
+    failed = reader.process_folder(folder, ctx["work"] / "out_dbd_all", None, ctx["workers"], False)
+    return {"companies": companies, "failed": failed}
+
+
+def _pdfs(ctx):
+    return sorted((ctx["work"] / "raw_data" / "scan").glob("*.pdf"))
+
+
+def stage_ocr_tesseract(ctx):
+    ocr = require("pdf_ocr_inv_to_json")
+    if not getattr(ocr, "_HAS_OCR", False):
+        raise Skip("ต้องติดตั้ง pdf2image + pytesseract + pillow (และ poppler / tesseract)")
+    pages = 0
+    for path in _pdfs(ctx):
+        pages += len(ocr.run_ocr(str(path), dpi=ctx["dpi"], lang="tha+eng")["pages"])
+    return {"files": len(_pdfs(ctx)), "pages": pages}
+
+
+def stage_ocr_typhoon(ctx):
+    os.environ["TYPHOON_OCR_URL"] = f"{ctx['mock_url']}/v1/ocr"
+    ocr = require("pdf_ocr_sale_invoice_to_json")
+    ocr.OCR_URL = os.environ["TYPHOON_OCR_URL"]
+    ocr.process_pdfs_in_folder(str(ctx["work"] / "raw_data" / "scan"), "mock-key", "structure", 16000,
+                               0.1, 0.6, 1.2, str(ctx["work"] / "out_ocr"))
+    return {"files": len(_pdfs(ctx)), "pages": len(_pdfs(ctx)) * ctx["params"]["pages"]}
+
+
+def stage_send_bs(ctx):
+    from services.api_sender import post_statements
+    path = ctx["work"] / "processed_data" / "bs_all_processed_data.csv"
+    if not path.exists():
+        stage_bs(ctx)
+    import pandas as pd
+    body = pd.read_csv(path, dtype={"company_id": "string"}).to_json(orient="records", force_ascii=False)
+    post_statements("bs", body, ctx["mock_url"], timeout=60)
+    return {"bytes": len(body.encode("utf-8"))}
+
+
+def stage_send_supplier(ctx):
+    sender = require("send_dbd_company_supplier")
+    folder = ctx["work"] / "supplier_json"
+    if not folder.exists():
+        folder.mkdir()
+        for tax_id in synthetic_data.company_ids(ctx["params"]["dbd_companies"], ctx["seed"]):
+            with open(folder / f"{tax_id}_company_info_structured.json", "w", encoding="utf-8") as f:
+                json.dump({"company_name": f"บริษัท {tax_id} จำกัด", "registration_no": tax_id}, f, ensure_ascii=False)
+    files = sender.discover_json_files(str(folder))
+    url = f"{ctx['mock_url']}/api/public/dbd-company-supplier"
+    ok = sum(1 for path in files if sender.post_json(path, url, timeout=30, auto_jid=True))
+    return {"files": len(files), "ok": ok}
+
+
+STAGES = {
+    "bs": stage_bs,
+    "ic": stage_ic,
+    "invoice": stage_invoice,
+    "po": stage_po,
+    "numeric_clean": stage_numeric_clean,
+    "dbd_balance": _dbd_reader("script_read_dbd_balance", "balance"),
+    "dbd_income": _dbd_reader("script_read_dbd_income", "income"),
+    "dbd_ratios": _dbd_reader("script_read_dbd_ratios", "ratios"),
+    "dbd_all": stage_dbd_all,
+    "dbd_wide": stage_dbd_wide,
+    "ocr_tesseract": stage_ocr_tesseract,
+    "ocr_typhoon": stage_ocr_typhoon,
+    "send_bs": stage_send_bs,
+    "send_supplier": stage_send_supplier,
+}
+
+
+def run_stage(name, fn, ctx, repeat, verbose):
+    result = {"stage": name, "status": "ok", "runs": []}
+    for _ in range(repeat):
+        with contextlib.ExitStack() as quiet:
+            if not verbose:
+                # stage ส่วนใหญ่ print ทีละไฟล์ — ไม่ให้เวลา I/O ของ terminal ปนในผล
+                quiet.enter_context(contextlib.redirect_stdout(io.StringIO()))
+                quiet.enter_context(contextlib.redirect_stderr(io.StringIO()))
+            t0 = time.perf_counter()
+            try:
+                counters = fn(ctx)
+            except Skip as e:
+                return dict(result, status="skipped", reason=str(e))
+            except Exception as e:
+                return dict(result, status="error", reason=f"{type(e).__name__}: {e}")
+            result["runs"].append(round(time.perf_counter() - t0, 4))
+    result.update(counters)
+    result["best"] = min(result["runs"])
+    result["median"] = round(statistics.median(result["runs"]), 4)
+    for key in ("rows", "pages", "files", "companies"):
+        if result.get(key):
+            result[f"{key}_per_s"] = round(result[key] / result["best"], 1) if result["best"] else None
+            break
+    return result
+
+
+def compare(results, old_path):
+    with open(old_path, encoding="utf-8") as f:
+        old = {s["stage"]: s for s in json.load(f).get("stages", [])}
+    print(f"\nเทียบกับ {old_path} (best, ใหม่/เก่า):")
+    for s in results:
+        prev = old.get(s["stage"])
+        if s["status"] != "ok" or not prev or prev.get("status") != "ok":
+            continue
+        ratio = s["best"] / prev["best"] if prev["best"] else float("nan")
+        mark = "🔺" if ratio > 1.1 else ("🔻" if ratio < 0.9 else "  ")
+        print(f"  {mark} {s['stage']:14s} {prev['best']:>9.4f}s → {s['best']:>9.4f}s  x{ratio:.2f}")
+
+
+# ---------------- main ---------------- #
+
+def main():
+    ap = argparse.ArgumentParser(description="End-to-end benchmark of the credit-prepare pipeline on synthetic data")
+    ap.add_argument("--scale", choices=list(SCALES), default="small")
+    ap.add_argument("--stages", default=",".join(STAGES), help=f"คั่นด้วย , จาก: {', '.join(STAGES)}")
+    ap.add_argument("--repeat", type=int, default=3, help="จำนวนรอบต่อ stage (รายงาน best / median)")
+    for key in SCALES["small"]:
+        ap.add_argument(f"--{key.replace('_', '-')}", type=int, default=None, help=f"override ค่า {key} ของ --scale")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker ของ dbd_all")
+    ap.add_argument("--dpi", type=int, default=200, help="dpi ของ ocr_tesseract")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--mock-latency-ms", type=float, default=0.0, help="latency ของ mock server (OCR / sender)")
+    ap.add_argument("--workdir", default=None, help="โฟลเดอร์ทำงาน (ไม่ระบุ = temp แล้วลบทิ้ง)")
+    ap.add_argument("--keep", action="store_true", help="ไม่ลบโฟลเดอร์ทำงาน")
+    ap.add_argument("--out", default=None, help="ไฟล์ผล JSON (ค่าเริ่มต้น benchmarks/<เวลา>_<commit>.json)")
+    ap.add_argument("--compare", default=None, help="ไฟล์ผลรอบก่อน เพื่อแสดงอัตราส่วนเวลา")
+    ap.add_argument("--verbose", action="store_true", help="แสดง output ของแต่ละ stage")
+    args = ap.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        ap.error(f"ไม่รู้จัก stage: {', '.join(unknown)}")
+    params = dict(SCALES[args.scale])
+    for key in params:
+        if getattr(args, key) is not None:
+            params[key] = getattr(args, key)
+
+    commit = git_commit()
+    started = datetime.now()
+    out_path = Path(args.out or os.path.join(
+        REPO_DIR, "benchmarks", f"{started:%Y%m%d_%H%M%S}_{commit or 'nogit'}.json"
+    )).resolve()
+    compare_path = Path(args.compare).resolve() if args.compare else None
+
+    tmp = None
+    if args.workdir:
+        work = Path(args.workdir).resolve()
+        work.mkdir(parents=True, exist_ok=True)
+    else:
+        tmp = tempfile.TemporaryDirectory(prefix="credit_bench_")
+        work = Path(tmp.name)
+
+    from services.mock_server import MockConfig, start_mock_server
+    server = start_mock_server(MockConfig(latency_ms=args.mock_latency_ms))
+    cwd = os.getcwd()
+    results, sizes = [], {}
+    try:
+        print(f"▶ generate ({args.scale}: {params}) → {work}")
+        t0 = time.perf_counter()
+        sizes = generate(work, params, args.seed)
+        print(f"  ✔ {sizes} in {time.perf_counter() - t0:.2f}s")
+
+        # processor ใช้ path relative (./raw_data/bs, processed_data/...) → รันใน work
+        os.chdir(work)
+        ctx = {"work": work, "params": params, "seed": args.seed, "workers": args.workers, "dpi": args.dpi,
+               "mock_url": server.url}
+        for name in stages:
+            r = run_stage(name, STAGES[name], ctx, max(1, args.repeat), args.verbose)
+            results.append(r)
+            if r["status"] == "ok":
+                extra = ", ".join(f"{k}={r[k]}" for k in ("rows", "pages", "files", "companies", "bytes") if k in r)
+                print(f"  ✔ {name:14s} best={r['best']:.4f}s median={r['median']:.4f}s ({extra})")
+            else:
+                print(f"  – {name:14s} {r['status']}: {r['reason']}")
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+        if tmp is not None and not args.keep:
+            tmp.cleanup()
+        elif tmp is not None:
+            print(f"workdir kept: {work}")
+
+    report = {
+        "started_at": started.isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpu_count": os.cpu_count()},
+        "scale": args.scale,
+        "params": params,
+        "repeat": args.repeat,
+        "inputs": sizes,
+        "stages": results,
+    }
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✔ {out_path}")
+
+    if compare_path:
+        compare(results, compare_path)
+    return 1 if any(r["status"] == "error" for r in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
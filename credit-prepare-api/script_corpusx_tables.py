@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+script_corpusx_tables.py — แปลง response ของ CorpusX เป็นตารางแบน (Parquet + SQLite) ไว้ join กับงบ DBD
+
+- input: ไฟล์ response เดี่ยว (*.json เช่น example.json, tsic.json) และ/หรือผลของ script_fetch_corpusx.py (*.ndjson)
+- ตาราง: companies / financial_lines / ratios / directors / shareholders / tsic / scores
+  key = registration_no (= tax_id ของงบ DBD) และ year เป็น ค.ศ.
+- Parquet → <parquet-root>/corpusx/<table>.parquet, SQLite → ตาราง corpusx_<table> ใน statements.sqlite
+
+Usage:
+  python script_corpusx_tables.py processed_data/corpusx.ndjson [example.json ...] \
+    [--parquet-root processed_data/parquet | --no-parquet] [--sqlite processed_data/statements.sqlite | --no-sqlite]
+"""
+
+import argparse
+
+from services.columnar_store import PARQUET_ROOT
+from services.corpusx_tables import flatten_responses, iter_responses, write_tables
+from services.statement_index import INDEX_PATH
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Flatten CorpusX searchResults into typed tables")
+    ap.add_argument("inputs", nargs="+", help="ไฟล์ *.json (response เดี่ยว) หรือ *.ndjson (จาก script_fetch_corpusx.py)")
+    ap.add_argument("--parquet-root", default=PARQUET_ROOT)
+    ap.add_argument("--no-parquet", action="store_true", help="ไม่เขียน Parquet")
+    ap.add_argument("--sqlite", default=INDEX_PATH)
+    ap.add_argument("--no-sqlite", action="store_true", help="ไม่เขียน SQLite")
+    args = ap.parse_args()
+
+    tables = flatten_responses(iter_responses(args.inputs))
+    for name, df in tables.items():
+        print(f"{name:16s} {len(df):>8,} rows")
+
+    written = write_tables(
+        tables,
+        parquet_root=None if args.no_parquet else args.parquet_root,
+        sqlite_path=None if args.no_sqlite else args.sqlite,
+    )
+    for target, path in written.items():
+        print(f"✔ {target} → {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+script_fetch_corpusx.py — ดึง profile / งบการเงิน / อัตราส่วน / credit score / กรรมการ จาก CorpusX ทีละหลายบริษัท
+
+- อ่าน registrationId จากไฟล์ (เช่น juristic_ids.txt บรรทัดละหนึ่งตัว)
+- ทำพร้อมกัน --concurrency บริษัท, จำกัด request รวม --rps ต่อวินาที, retry ต่อบริษัท --retries ครั้ง
+- ผลลัพธ์ต่อท้าย NDJSON ทีละบริษัท (1 บรรทัด = {registrationId, status, datasets: {profile: {...}, ...}})
+  รันซ้ำจะข้ามบริษัทที่สำเร็จแล้ว (ใช้ --force เพื่อดึงใหม่ทั้งหมด)
+- response เก็บใน cache ถาวร (--cache) ตาม TTL ของแต่ละ dataset — --no-cache เพื่อขอจาก API ทุกครั้ง
+- username/password จาก env CORPUSX_USERNAME / CORPUSX_PASSWORD
+
+Usage:
+  python script_fetch_corpusx.py --ids-file juristic_ids.txt --out processed_data/corpusx.ndjson \
+    [--datasets profile,financial_information,financial_ratio,credit_score,directors_shareholders] \
+    [--concurrency 8] [--rps 5] [--retries 3] [--fs-type 2] [--language en] [--force] \
+    [--cache processed_data/corpusx_cache.sqlite | --no-cache]
+"""
+
+import argparse
+
+from dotenv import load_dotenv
+
+from services.corpusx_datasets import DATASETS
+from services.corpusx_fetcher import DEFAULT_DATASETS, run_fetch
+from services.response_cache import CACHE_PATH
+
+
+def main():
+    load_dotenv()
+    ap = argparse.ArgumentParser(description="Fetch CorpusX datasets for many registrationIds (async, rate limited)")
+    ap.add_argument("--ids-file", default="juristic_ids.txt", help="ไฟล์ .txt รายชื่อ registrationId บรรทัดละหนึ่งตัว")
+    ap.add_argument("--out", default="processed_data/corpusx.ndjson", help="ไฟล์ผลลัพธ์ NDJSON (ต่อท้าย)")
+    ap.add_argument("--datasets", default=",".join(DEFAULT_DATASETS), help=f"คั่นด้วย , จาก: {', '.join(DATASETS)}")
+    ap.add_argument("--concurrency", type=int, default=8, help="จำนวนบริษัทที่ดึงพร้อมกัน")
+    ap.add_argument("--rps", type=float, default=5.0, help="request ต่อวินาทีสูงสุดรวมทุก worker (0 = ไม่จำกัด)")
+    ap.add_argument("--retries", type=int, default=3, help="จำนวนครั้งที่ลองใหม่ต่อบริษัท")
+    ap.add_argument("--fs-type", default="2")
+    ap.add_argument("--language", default="en")
+    ap.add_argument("--force", action="store_true", help="ดึงใหม่แม้มีผลสำเร็จในไฟล์แล้ว")
+    ap.add_argument("--cache", default=CACHE_PATH, help="ไฟล์ cache ของ response (SQLite)")
+    ap.add_argument("--no-cache", action="store_true", help="ไม่อ่าน/เขียน cache")
+    args = ap.parse_args()
+
+    datasets = [d.strip() for d in args.datasets.split(",") if d.strip()]
+    unknown = [d for d in datasets if d not in DATASETS]
+    if unknown:
+        ap.error(f"ไม่รู้จัก dataset: {', '.join(unknown)}")
+
+    stats = run_fetch(
+        args.ids_file,
+        args.out,
+        datasets=datasets,
+        concurrency=args.concurrency,
+        rps=args.rps,
+        retries=args.retries,
+        force=args.force,
+        cache_path=None if args.no_cache else args.cache,
+        fs_type=args.fs_type,
+        language=args.language,
+    )
+    print(f"\nDone. ok={stats['ok']}, failed={stats['failed']}, skipped={stats['skipped']}, "
+          f"requests={stats['requests']}, cached={stats['cached']} in {stats['seconds']:.2f}s → {args.out}")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+script_load_test.py — วัด throughput และ tail latency ของ sender / client ภายนอก กับ mock server
+
+target:
+  supplier  send_dbd_company_supplier.post_json → /api/public/dbd-company-supplier
+  bs        services.api_sender.post_statements ("bs") → /api/public/bol-bs (ตัวส่งของ POST /process-bs)
+  ic        services.api_sender.post_statements ("ic") → /api/public/bol-ic
+  ocr       pdf_ocr_sale_invoice_to_json.extract_text_from_image → /v1/ocr (OpenTyphoon)
+  corpusx   CorpusXClient.fetch_datasets → token + get/data (ไม่ใช้ ResponseCache)
+
+ไม่ระบุ --url จะเปิด mock server ในโปรเซสเอง (ตั้ง latency / error ด้วย --latency-ms, --error-rate, ...)
+ผลต่อ target: status (ok / skipped), requests, ok, errors, seconds, rps, p50/p95/p99/max (ms) — --out เขียนเป็น JSON
+
+Usage:
+  python script_load_test.py [--targets supplier,bs,ic,ocr,corpusx] [--requests 200] [--concurrency 16] \
+    [--url http://127.0.0.1:8900] [--latency-ms 50 --jitter-ms 20 --error-rate 0.01] \
+    [--bs-file processed_data/bs_all_processed_data.csv] [--out load_test.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from script_benchmark import Skip, require
+from script_mock_server import add_mock_arguments, mock_config
+from services.batch_events import percentile
+from services.mock_server import start_mock_server
+
+TARGETS = ("supplier", "bs", "ic", "ocr", "corpusx")
+SAMPLE_ID = "0105541008416"
+
+
+# ---------------- helpers ---------------- #
+
+def summarize(name, latencies, errors, seconds):
+    ms = sorted(x * 1000.0 for x in latencies)
+    total = len(latencies)
+    return {
+        "target": name,
+        "status": "ok",
+        "requests": total,
+        "ok": total - errors,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "rps": round(total / seconds, 1) if seconds else None,
+        "p50_ms": round(percentile(ms, 50), 2) if ms else None,
+        "p95_ms": round(percentile(ms, 95), 2) if ms else None,
+        "p99_ms": round(percentile(ms, 99), 2) if ms else None,
+        "max_ms": round(ms[-1], 2) if ms else None,
+    }
+
+
+def pooled_session(size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def statement_body(path, rows):
+    """body ของ BS/IC: จากไฟล์ CSV ที่ประมวลผลแล้ว (ถ้ามี) หรือแถวสังเคราะห์ rows แถว"""
+    if path and os.path.exists(path):
+        import pandas as pd
+        return pd.read_csv(path, dtype={"company_id": "string"}).to_json(orient="records", force_ascii=False)
+    data = [{"company_id": f"0105{i:09d}", "year": 2024, "total_assets": 1000000.0 + i} for i in range(rows)]
+    return json.dumps(data, ensure_ascii=False)
+
+
+# ---------------- targets ---------------- #
+# แต่ละ target คืนฟังก์ชัน call(i) → True/False (สำเร็จไหม) — dependency ไม่ครบ raise Skip (บันทึกเป็น skipped)
+
+def make_supplier(base_url, workdir, args):
+    import send_dbd_company_supplier as sender
+
+    path = os.path.join(workdir, f"{SAMPLE_ID}_company_info_structured.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"company_name": "บริษัท ทดสอบ จำกัด", "registration_no": SAMPLE_ID,
+                   "financial_filing_years_th": ["2566", "2567"]}, f, ensure_ascii=False)
+    api_url = f"{base_url}/api/public/dbd-company-supplier"
+
+    def call(i):
+        return sender.post_json(path, api_url, timeout=args.timeout, auto_jid=True)
+    return call
+
+
+def make_statements(kind):
+    def factory(base_url, workdir, args):
+        from services.api_sender import post_statements
+
+        path = args.bs_file if kind == "bs" else args.ic_file
+        body = statement_body(path, args.rows)
+        session = pooled_session(args.concurrency)
+
+        def call(i):
+            return post_statements(kind, body, base_url, session=session, timeout=args.timeout).ok
+        return call
+    return factory
+
+
+def make_ocr(base_url, workdir, args):
+    ocr = require("pdf_ocr_sale_invoice_to_json")
+    url = f"{base_url}/v1/ocr"
+
+    path = os.path.join(workdir, "page.png")
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n" + b"\0" * 4096)
+
+    def call(i):
+        return ocr.extract_text_from_image(path, "mock-key", "default", 16384, 0.1, 0.6, 1.2, url=url) is not None
+    return call
+
+
+def make_corpusx(base_url, workdir, args):
+    from services.corpusx_client import CorpusXClient
+    from services.corpusx_fetcher import DEFAULT_DATASETS
+
+    client = CorpusXClient("mock", "mock", pool_size=args.concurrency, timeout=args.timeout, base_url=base_url)
+
+    def call(i):
+        parts = client.fetch_datasets(f"0105{i:09d}", DEFAULT_DATASETS, fs_type="2", language="en")
+        return len(parts) == len(DEFAULT_DATASETS)
+    return call
+
+
+FACTORIES = {
+    "supplier": make_supplier,
+    "bs": make_statements("bs"),
+    "ic": make_statements("ic"),
+    "ocr": make_ocr,
+    "corpusx": make_corpusx,
+}
+
+
+def run_target(call, total, concurrency):
+    def timed(i):
+        t0 = time.perf_counter()
+        try:
+            ok = bool(call(i))
+        except Exception:
+            ok = False
+        return time.perf_counter() - t0, ok
+
+    t0 = time.perf_counter()
+    # sender บางตัว print payload ทุกครั้ง — เก็บทิ้งระหว่างวัด
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(timed, range(total)))
+    seconds = time.perf_counter() - t0
+    return [r[0] for r in results], sum(1 for r in results if not r[1]), seconds
+
+
+# ---------------- main ---------------- #
+
+def main():
+    ap = argparse.ArgumentParser(description="Load test senders / clients against the mock server")
+    ap.add_argument("--targets", default=",".join(TARGETS), help=f"คั่นด้วย , จาก: {', '.join(TARGETS)}")
+    ap.add_argument("--requests", type=int, default=200, help="จำนวน request ต่อ target")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--timeout", type=int, default=30)
+    ap.add_argument("--url", default=None, help="ใช้ mock server ที่เปิดไว้แล้ว (ไม่ระบุ = เปิดในโปรเซสนี้)")
+    ap.add_argument("--bs-file", default=os.path.join("processed_data", "bs_all_processed_data.csv"))
+    ap.add_argument("--ic-file", default=os.path.join("processed_data", "ic_all_processed_data.csv"))
+    ap.add_argument("--rows", type=int, default=500, help="จำนวนแถวสังเคราะห์ของ BS/IC เมื่อไม่มีไฟล์")
+    ap.add_argument("--out", default=None, help="เขียนผลเป็น JSON")
+    add_mock_arguments(ap)
+    args = ap.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = [t for t in targets if t not in FACTORIES]
+    if unknown:
+        ap.error(f"ไม่รู้จัก target: {', '.join(unknown)}")
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        server = start_mock_server(mock_config(args))
+        base_url = server.url
+    print(f"Mock: {base_url} | requests/target={args.requests} concurrency={args.concurrency}")
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for name in targets:
+                try:
+                    call = FACTORIES[name](base_url, workdir, args)
+                except Skip as e:
+                    results.append({"target": name, "status": "skipped", "reason": str(e)})
+                    print(f"{name:9s} skipped: {e}")
+                    continue
+                latencies, errors, seconds = run_target(call, args.requests, args.concurrency)
+                summary = summarize(name, latencies, errors, seconds)
+                results.append(summary)
+                print(f"{name:9s} {summary['rps']:>8} req/s  p50={summary['p50_ms']}ms  p95={summary['p95_ms']}ms  "
+                      f"p99={summary['p99_ms']}ms  max={summary['max_ms']}ms  errors={errors}/{summary['requests']}")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    if args.out:
+        report = {
+            "url": base_url,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mock": None if args.url else vars(mock_config(args)),
+            "results": results,
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✔ {args.out}")
+    return 1 if any(r.get("errors") for r in results) and not args.error_rate else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+script_mock_server.py — เปิด mock server ของ CorpusX / OpenTyphoon OCR / Laravel public API ในเครื่อง
+
+ตอบจากไฟล์ capture ใน root ของ repo (login_success.json, example.json, tsic.json, ...) พร้อมหน่วงเวลาและสุ่ม error ได้
+ชี้ client ไปที่ mock:
+  CORPUSX_BASE_URL=http://127.0.0.1:8900
+  TYPHOON_OCR_URL=http://127.0.0.1:8900/v1/ocr
+  API_BASE=http://127.0.0.1:8900       (main.py /process-bs, /process-ic)
+  send_dbd_company_supplier.py ... --api-url http://127.0.0.1:8900/api/public/dbd-company-supplier
+
+Usage:
+  python script_mock_server.py [--port 8900] [--latency-ms 50] [--jitter-ms 20] [--error-rate 0.02] \
+    [--error-status 503] [--route-latency /v1/ocr=1500] [--ocr-fixture ocr.json] [--seed 1]
+"""
+
+import argparse
+import time
+
+from services.mock_server import FIXTURES_DIR, MockConfig, start_mock_server
+
+
+def parse_route_latency(pairs):
+    out = {}
+    for p in pairs:
+        path, _, ms = p.partition("=")
+        out[path.rstrip("/")] = float(ms)
+    return out
+
+
+def add_mock_arguments(ap):
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="หน่วงก่อนตอบทุก request (ms)")
+    ap.add_argument("--jitter-ms", type=float, default=0.0, help="สุ่มบวก/ลบจาก latency (ms)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="สัดส่วน request ที่ตอบ error (0-1)")
+    ap.add_argument("--error-status", type=int, default=503)
+    ap.add_argument("--route-latency", nargs="*", default=[], help="latency ต่อ path เช่น /v1/ocr=1500")
+    ap.add_argument("--fixtures-dir", default=FIXTURES_DIR, help="โฟลเดอร์ไฟล์ capture")
+    ap.add_argument("--ocr-fixture", default=None, help="ไฟล์ JSON ผล OCR ของ Typhoon ที่จะตอบ")
+    ap.add_argument("--seed", type=int, default=None)
+
+
+def mock_config(args):
+    return MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        fixtures_dir=args.fixtures_dir,
+        ocr_fixture=args.ocr_fixture,
+        seed=args.seed,
+        routes=parse_route_latency(args.route_latency),
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay captured CorpusX / Typhoon / Laravel responses locally")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8900)
+    add_mock_arguments(ap)
+    args = ap.parse_args()
+
+    server = start_mock_server(mock_config(args), host=args.host, port=args.port)
+    print(f"Mock server listening on {server.url} (Ctrl+C เพื่อหยุด)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        print(f"requests: {dict(server.stats)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
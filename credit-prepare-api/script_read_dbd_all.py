@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+script_read_dbd_all.py — แปลง *_balance / *_income / *_ratios ของทุกบริษัทในโฟลเดอร์เดียวด้วยคำสั่งเดียว
+
+- scan โฟลเดอร์ครั้งเดียว แล้วจัดกลุ่มไฟล์ตาม tax_id
+- ประมวลผลแต่ละบริษัทแบบขนานด้วย ProcessPoolExecutor (ค่าเริ่มต้น = จำนวน core)
+- ใช้ pipeline เดิมของ script_read_dbd_balance / _income / _ratios (ผลลัพธ์เหมือนรันแยกทุกไบต์)
+- เขียนไฟล์ต่อบริษัท:
+    <tax_id>_balance.json, <tax_id>_income.json, <tax_id>_ratios.json   (รูปแบบเดิม ให้ dbd:import-financial อ่านได้)
+    <tax_id>_financial.json  ← รวมทั้งสามงบไว้ใน record เดียว
+- --parquet-dir: เขียนตารางยาวแบบ columnar เพิ่ม (statement=<balance|income|ratios>/year=<ปี>/<tax_id>.parquet)
+- --events: event JSON lines ต่อบริษัท (เวลาใน worker / แถว / byte) + สรุป p50/p95 ตอนจบ
+
+Usage:
+  python script_read_dbd_all.py --folder ./downloads --outdir ./processed_data [--workers 8] [--sheet NAME] \
+    [--parquet-dir ./processed_data/parquet] [--events run.jsonl] [--debug]
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import script_read_dbd_balance as dbd_balance
+import script_read_dbd_income as dbd_income
+import script_read_dbd_ratios as dbd_ratios
+from services.batch_events import BatchEvents, add_event_arguments
+from services.columnar_store import write_partitioned, year_json_to_frame
+
+STATEMENT_KINDS = ("balance", "income", "ratios")
+FILE_RE = re.compile(r"^(?P<tax>\d{10,13})_(?P<kind>balance|income|ratios)\.xlsx?$", re.IGNORECASE)
+
+
+# ---------------- Discovery ---------------- #
+
+def discover_companies(folder: Path) -> Dict[str, Dict[str, Path]]:
+    """scan โฟลเดอร์ครั้งเดียว → { tax_id: { "balance": path, "income": path, "ratios": path } }"""
+    companies: Dict[str, Dict[str, Path]] = {}
+    with os.scandir(folder) as it:
+        for entry in sorted(it, key=lambda e: e.name):
+            if not entry.is_file():
+                continue
+            m = FILE_RE.match(entry.name)
+            if not m:
+                continue
+            kinds = companies.setdefault(m.group("tax"), {})
+            # ถ้ามีทั้ง .xls และ .xlsx ใช้ไฟล์แรกตามลำดับชื่อ (เหมือนสคริปต์เดิม)
+            kinds.setdefault(m.group("kind").lower(), Path(entry.path))
+    return companies
+
+
+# ---------------- Per-statement extract ---------------- #
+
+def extract_balance(path: Path, tax_id: str, sheet: Optional[str], debug: bool) -> Dict[str, List[Dict[str, Any]]]:
+    df_raw = dbd_balance.read_table(path, sheet, debug)
+    hdr = dbd_balance.find_header_row(df_raw, debug)
+    df = dbd_balance.tidy_after_header(df_raw, hdr, debug)
+    return dbd_balance.dataframe_to_year_json(df, tax_id, debug)
+
+def extract_income(path: Path, tax_id: str, sheet: Optional[str], debug: bool) -> Dict[str, List[Dict[str, Any]]]:
+    df_raw = dbd_income.read_income_table(path, debug)
+    df_tidy = dbd_income.tidy_income_table(df_raw, debug)
+    return dbd_income.dataframe_to_year_json(df_tidy, tax_id, debug)
+
+def extract_ratios(path: Path, tax_id: str, sheet: Optional[str], debug: bool) -> Dict[str, List[Dict[str, Any]]]:
+    df_raw = dbd_ratios.read_ratios_table(path, sheet, debug)
+    df_tidy = dbd_ratios.tidy_ratios_table(df_raw, debug)
+    return dbd_ratios.dataframe_to_year_json(df_tidy, tax_id, debug)
+
+EXTRACTORS = {
+    "balance": extract_balance,
+    "income": extract_income,
+    "ratios": extract_ratios,
+}
+
+
+def write_json(path: Path, data: Any):
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+# ---------------- Per-company worker ---------------- #
+
+def process_company(tax_id: str, files: Dict[str, Path], outdir: Path, sheet: Optional[str], debug: bool,
+                    parquet_dir: Optional[Path] = None) -> Dict[str, Any]:
+    """รันใน worker process: แปลงทั้งสามงบของบริษัทเดียว แล้วเขียนไฟล์"""
+    t0 = time.perf_counter()
+    record: Dict[str, Any] = {"tax_id": tax_id}
+    summary: Dict[str, Any] = {"tax_id": tax_id, "rows": {}, "errors": {}}
+
+    for kind in STATEMENT_KINDS:
+        path = files.get(kind)
+        if path is None:
+            record[kind] = None
+            continue
+        try:
+            data = EXTRACTORS[kind](path, tax_id, sheet, debug)
+        except Exception as e:
+            record[kind] = None
+            summary["errors"][kind] = f"{path.name}: {e}"
+            continue
+        write_json(outdir / f"{tax_id}_{kind}.json", data)
+        if parquet_dir is not None:
+            write_partitioned(year_json_to_frame(data, tax_id), kind, tax_id, root=parquet_dir)
+        record[kind] = data
+        summary["rows"][kind] = sum(len(v) for v in data.values())
+
+    write_json(outdir / f"{tax_id}_financial.json", record)
+    summary["elapsed"] = time.perf_counter() - t0
+    return summary
+
+
+# ---------------- Orchestration ---------------- #
+
+def process_folder(folder: Path, outdir: Path, sheet: Optional[str], workers: int, debug: bool,
+                   parquet_dir: Optional[Path] = None, events_path: Optional[str] = None) -> int:
+    companies = discover_companies(folder)
+    if not companies:
+        print("No *_balance / *_income / *_ratios .xls/.xlsx files found.")
+        return 0
+
+    outdir.mkdir(parents=True, exist_ok=True)
+    print(f"▶ Found {len(companies)} companies in {folder} (workers={workers})")
+
+    events = BatchEvents.open(events_path, "script_read_dbd_all", total=len(companies))
+    t0 = time.perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(process_company, tax_id, files, outdir, sheet, debug, parquet_dir): tax_id
+            for tax_id, files in companies.items()
+        }
+        for i, fut in enumerate(as_completed(futures), start=1):
+            tax_id = futures[fut]
+            nbytes = sum(p.stat().st_size for p in companies[tax_id].values())
+            try:
+                s = fut.result()
+            except Exception as e:
+                failed += 1
+                print(f"[{i}/{len(futures)}] ❌ {tax_id}: {e}")
+                events.record(tax_id, 0.0, "error", bytes=nbytes, error=str(e))
+                continue
+            events.record(tax_id, s["elapsed"], "error" if s["errors"] else "ok",
+                          rows=sum(s["rows"].values()), bytes=nbytes,
+                          error="; ".join(s["errors"].values()) or None, statements=len(companies[tax_id]))
+            rows = ", ".join(f"{k}={v}" for k, v in s["rows"].items()) or "-"
+            print(f"[{i}/{len(futures)}] ✔ {tax_id} ({rows}) in {s['elapsed'] * 1000:.0f} ms")
+            for kind, err in s["errors"].items():
+                failed += 1
+                print(f"    ⚠ {kind}: {err}")
+
+    print(f"Done. companies={len(companies)}, failed={failed}, total={time.perf_counter() - t0:.2f}s")
+    events.finish()
+    return failed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Read DBD *_balance/_income/_ratios Excel → JSON for every company (parallel)")
+    ap.add_argument("--folder", required=True, help="input folder containing <tax_id>_{balance,income,ratios}.xls/xlsx")
+    ap.add_argument("--outdir", required=True, help="output folder for <tax_id>_*.json")
+    ap.add_argument("--sheet", default=None)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    ap.add_argument("--parquet-dir", default=None, help="also write partitioned Parquet (statement=/year=) here")
+    ap.add_argument("--debug", action="store_true")
+    add_event_arguments(ap)
+    args = ap.parse_args()
+
+    folder = Path(args.folder).expanduser().resolve()
+    outdir = Path(args.outdir).expanduser().resolve()
+    parquet_dir = Path(args.parquet_dir).expanduser().resolve() if args.parquet_dir else None
+    failed = process_folder(folder, outdir, args.sheet, max(1, args.workers), args.debug, parquet_dir, args.events)
+    raise SystemExit(0 if failed == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
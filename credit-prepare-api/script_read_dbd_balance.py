@@ -7,7 +7,7 @@ Usage:
   python script_read_dbd_balance.py \
     --folder ./downloads \
     --outdir ./out_json \
-    [--sheet SHEETNAME] [--debug]
+    [--sheet SHEETNAME] [--debug] [--events run.jsonl]
 
 อัปเดต:
 - รองรับ .xls และ .xlsx
@@ -18,12 +18,15 @@ Usage:
 import argparse
 import json
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Tuple, Any, Optional
 
-import warnings
 import pandas as pd
 
+from services.batch_events import BatchEvents, add_event_arguments
+from services.dbd_excel_reader import read_dbd_table
+
 # --------------------- mapping: TH -> EN (ชื่อรายการ) --------------------- #
 TH_TO_EN_MAP = {
     "ลูกหนี้การค้าสุทธิ": "accounts_receivable_net",
@@ -79,6 +82,17 @@ def coerce_numeric(x: Any) -> Optional[float]:
         # ถ้าแปลงไม่ได้ ให้เป็น 0.0
         return 0.0
 
+def _numeric_or_zero(x: Any) -> float:
+    v = coerce_numeric(x)
+    return 0.0 if v is None else v
+
+def _column_numbers(df: pd.DataFrame, col: str) -> Any:
+    col_data = df[col]
+    if isinstance(col_data, pd.DataFrame):
+        # หัวคอลัมน์ซ้ำ (เช่น "%เปลี่ยนแปลง" / "nan" ทุกปี) อ้างด้วยชื่อไม่ได้ → ได้ 0.0 เหมือนผลเดิม
+        return 0.0
+    return col_data.map(_numeric_or_zero).astype(float)
+
 def to_gregorian(y: int) -> Optional[int]:
     if y is None:
         return None
@@ -94,60 +108,11 @@ def parse_year_like(s: Any) -> Optional[int]:
     m = re.search(r"(\d{4})", str(s))
     return to_gregorian(int(m.group(1))) if m else None
 
-# --------------------- sniff & read --------------------- #
-def magic_bytes(path: Path, n: int = 8) -> bytes:
-    with open(path, "rb") as f:
-        return f.read(n)
-
-def sniff_format(path: Path) -> str:
-    sig = magic_bytes(path, 8)
-    if sig.startswith(b"PK\x03\x04"):
-        return "xlsx"
-    if sig.startswith(b"\xD0\xCF\x11\xE0"):
-        return "xls"
-    return "unknown"
-
+# --------------------- read --------------------- #
 def read_table(path: Path, sheet: Optional[str], debug: bool) -> pd.DataFrame:
-    def _ensure_df(obj) -> pd.DataFrame:
-        if isinstance(obj, dict):
-            return next(iter(obj.values()))
-        return obj
-
-    kind = sniff_format(path)
-    print(f"  ↪ detected format: {kind}")
-
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore")
-        sheet_name = 0 if (sheet is None or str(sheet).strip() == "") else sheet
-
-        # ลำดับ engine ที่พยายามใช้
-        engines = []
-        if kind == "xls":
-            engines = ["xlrd"]  # ต้องติดตั้ง xlrd==1.2.0
-        elif kind == "xlsx":
-            engines = ["openpyxl"]
-        else:
-            # ไม่แน่ใจ ลองทั้งสอง
-            engines = ["openpyxl", "xlrd"]
-
-        last_err = None
-        for eng in engines:
-            try:
-                df = pd.read_excel(path, sheet_name=sheet_name, engine=eng, header=None)
-                return _ensure_df(df)
-            except Exception as e:
-                last_err = e
-                log(debug, f"read_excel with engine={eng} failed: {e}")
-
-        # ทางหนีไฟ: ถ้าเป็นไฟล์ xls ที่จริงเป็น html-Excel ให้ลอง read_html
-        try:
-            tables = pd.read_html(path, header=None)
-            if tables:
-                return tables[0]
-        except Exception as e2:
-            last_err = e2
-
-        raise RuntimeError(f"อ่านไฟล์ไม่สำเร็จ: {path.name} (last error: {last_err})")
+    df, engine, elapsed = read_dbd_table(path, sheet, debug)
+    print(f"  ↪ read with {engine} in {elapsed * 1000:.1f} ms (shape={df.shape})")
+    return df
 
 # --------------------- tidy --------------------- #
 def find_header_row(df: pd.DataFrame, debug: bool) -> int:
@@ -194,31 +159,29 @@ def detect_year_pairs(df: pd.DataFrame, debug: bool) -> List[Tuple[int, str, Opt
     return pairs
 
 # --------------------- item_en helper --------------------- #
+# fallback แบบยืดหยุ่น (เรียงตามลำดับความสำคัญ — ตัวแรกที่เจอ substring ชนะ)
+ITEM_EN_FALLBACK: Tuple[Tuple[str, str], ...] = (
+    ("หนี้สินไม่หมุนเวียน", "non_current_liabilities"),
+    ("ลูกหนี้การค้า", "trade_receivables"),
+    ("สินค้าคงเหลือ", "inventories"),
+    ("สินทรัพย์หมุนเวียน", "current_assets"),
+    ("สินทรัพย์ไม่หมุนเวียน", "non_current_assets"),
+    ("สินทรัพย์รวม", "total_assets"),
+    ("หนี้สินหมุนเวียน", "current_liabilities"),
+    ("หนี้สินรวมและส่วนของผู้ถือหุ้น", "total_equity_and_liabilities"),
+    ("หนี้สินรวม", "total_liabilities"),
+    ("ผู้ถือหุ้น", "shareholders_equity"),
+)
+
+@lru_cache(maxsize=4096)
 def get_item_en(th_name: str) -> str:
+    # memoized ต่อ label — แต่ละชื่อรายการ normalize/จับคู่แค่ครั้งเดียวต่อ process
     name = normalize_th(th_name)
     if name in TH_TO_EN_MAP:
         return TH_TO_EN_MAP[name]
-    # fallback แบบยืดหยุ่น
-    if "หนี้สินไม่หมุนเวียน" in name:
-        return "non_current_liabilities"
-    if "ลูกหนี้การค้า" in name:
-        return "trade_receivables"
-    if "สินค้าคงเหลือ" in name:
-        return "inventories"
-    if "สินทรัพย์หมุนเวียน" in name:
-        return "current_assets"
-    if "สินทรัพย์ไม่หมุนเวียน" in name:
-        return "non_current_assets"
-    if "สินทรัพย์รวม" in name:
-        return "total_assets"
-    if "หนี้สินหมุนเวียน" in name:
-        return "current_liabilities"
-    if "หนี้สินรวมและส่วนของผู้ถือหุ้น" in name:
-        return "total_equity_and_liabilities"
-    if "หนี้สินรวม" in name:
-        return "total_liabilities"
-    if "ผู้ถือหุ้น" in name:
-        return "shareholders_equity"
+    for token, item_en in ITEM_EN_FALLBACK:
+        if token in name:
+            return item_en
     return "unknown"
 
 # --------------------- main transform --------------------- #
@@ -232,37 +195,43 @@ def dataframe_to_year_json(df: pd.DataFrame, tax_id: str, debug: bool) -> Dict[s
     if not pairs:
         raise RuntimeError("ไม่พบคอลัมน์ปีใน header")
 
-    by_year: Dict[str, List[Dict[str, Any]]] = {}
-    for y, val_col, pct_col in pairs:
-        year_key = str(y)
-        rows: List[Dict[str, Any]] = []
-        for _, row in work.iterrows():
-            th_item = normalize_th(row.get(label_col))
-            if th_item in IGNORE_ROW_TOKENS:
-                continue
-
-            amount = coerce_numeric(row.get(val_col))
-            pct = coerce_numeric(row.get(pct_col)) if pct_col else 0.0
-
-            # บังคับ default 0.0 ตามเงื่อนไข
-            if amount is None:
-                amount = 0.0
-            if pct is None:
-                pct = 0.0
-
-            rec = {
-                "item": th_item,
-                "item_en": get_item_en(th_item),
-                "amount": float(amount),
-                "pct_change": float(pct),
-                "tax_id": tax_id,
-            }
-            rows.append(rec)
-
-        if rows:
-            by_year.setdefault(year_key, []).extend(rows)
-
-    return by_year
+    if work.empty:
+        return {}
+
+    # คำนวณชื่อรายการ/item_en ครั้งเดียวต่อแถว แล้ว melt ทุกปี (ทั้งยอดเงินและ %เปลี่ยนแปลง) ในรอบเดียว
+    # คอลัมน์ตั้งชื่อตามลำดับคู่ปี (ไม่ใช่ตามปี) — ปีซ้ำในหัวตารางก็ยังแยกคู่กันได้เหมือนเดิม
+    items = work[label_col]
+    columns: Dict[str, Any] = {"item": items, "item_en": items.map(get_item_en)}
+    amount_cols, pct_cols, year_of = [], [], {}
+    for i, (y, val_col, pct_col) in enumerate(pairs):
+        amount_cols.append(f"amount_{i}")
+        pct_cols.append(f"pct_change_{i}")
+        year_of[f"amount_{i}"] = str(y)
+        # บังคับ default 0.0 ตามเงื่อนไข
+        columns[f"amount_{i}"] = _column_numbers(work, val_col)
+        columns[f"pct_change_{i}"] = _column_numbers(work, pct_col) if pct_col else 0.0
+    wide = pd.DataFrame(columns)
+
+    # melt เรียงผลเป็นบล็อกตาม value_vars (บล็อกละทุกแถว) → ครึ่งแรกเป็นยอดเงิน ครึ่งหลังเป็น % ของคู่ปีเดียวกัน
+    melted = wide.melt(id_vars=["item", "item_en"], value_vars=amount_cols + pct_cols,
+                       var_name="column", value_name="value")
+    n = len(wide) * len(pairs)
+    long_df = pd.DataFrame({
+        "item": melted["item"].iloc[:n].to_numpy(),
+        "item_en": melted["item_en"].iloc[:n].to_numpy(),
+        "amount": melted["value"].iloc[:n].to_numpy(),
+        "pct_change": melted["value"].iloc[n:].to_numpy(),
+        "tax_id": tax_id,
+    })
+    years = melted["column"].iloc[:n].map(year_of).to_numpy()
+
+    # to_dict ครั้งเดียวทั้งตาราง แล้วแจกเข้าปีด้วย groupby ครั้งเดียว (sort=False: ปีเรียงตามหัวตาราง
+    # แถวในแต่ละปีเรียงตามไฟล์)
+    records = long_df.to_dict("records")
+    return {
+        year: [records[i] for i in positions]
+        for year, positions in pd.Series(years).groupby(years, sort=False).indices.items()
+    }
 
 # --------------------- per-file processing --------------------- #
 def extract_tax_id_from_name(path: Path) -> Optional[str]:
@@ -283,14 +252,19 @@ def process_one_file(path: Path, outdir: Path, sheet: Optional[str], debug: bool
     with open(outfile, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
     print(f"  ✔ wrote: {outfile.resolve()} (years={list(data.keys())})")
+    return data
 
-def process_folder(folder: Path, outdir: Path, sheet: Optional[str], debug: bool):
+def process_folder(folder: Path, outdir: Path, sheet: Optional[str], debug: bool, events_path: Optional[str] = None):
     files = sorted(list(folder.glob("*_balance.xls")) + list(folder.glob("*_balance.xlsx")))
     if not files:
         print("ไม่พบไฟล์ *_balance.xls หรือ *_balance.xlsx ในโฟลเดอร์ที่กำหนด")
         return
+    events = BatchEvents.open(events_path, "script_read_dbd_balance", total=len(files))
     for p in files:
-        process_one_file(p, outdir, sheet, debug)
+        with events.file(p) as rec:
+            data = process_one_file(p, outdir, sheet, debug)
+            rec.add(rows=sum(len(v) for v in data.values()), bytes=p.stat().st_size, years=len(data))
+    events.finish()
 
 # --------------------- CLI --------------------- #
 def main():
@@ -299,9 +273,10 @@ def main():
     ap.add_argument("--outdir", required=True)
     ap.add_argument("--sheet", default=None)
     ap.add_argument("--debug", action="store_true")
+    add_event_arguments(ap)
     args = ap.parse_args()
 
-    process_folder(Path(args.folder), Path(args.outdir), args.sheet, args.debug)
+    process_folder(Path(args.folder), Path(args.outdir), args.sheet, args.debug, args.events)
 
 if __name__ == "__main__":
     main()
@@ -7,13 +7,14 @@ script_read_dbd_income.py — robust reader for DBD *_income.xls/xlsx → JSON (
 - คง "รายการ" (item_th) และลำดับตามไฟล์จริง (orig_index)
 - map item_en ตาม TH_TO_EN_INCOME (ยืดหยุ่นเรื่องวงเล็บ/ช่องว่าง) ไม่เจอแมป → "unknown"
 - รองรับ .xls/.xlsx และกรณี .xlsx ที่จริงเป็น .xls (BadZipFile)
-- ลองอ่านตามชนิดไฟล์: xlsx→openpyxl ; xls→xlrd(<2.0)→calamine ; ท้ายสุด read_html
+- เลือก engine จาก magic bytes ครั้งเดียว (calamine ก่อน → openpyxl/xlrd → read_html) และจำ engine ต่อชนิดไฟล์
 - ค่า '-', '–', '—', '0', '0.0' หรือค่าเลขที่เป็นศูนย์ → 0.0 เสมอ (และจะถูกเขียนลง JSON)
 - JSON รูปแบบ: { "<year>": [ { item, item_en, amount, pct_change, tax_id }, ... ] }
 
 วิธีใช้:
   pip install "xlrd==1.2.0" pandas openpyxl pandas-calamine
   python script_read_dbd_income.py --folder ./downloads --outdir ./out_json --debug
+  # --events run.jsonl → event JSON lines ต่อไฟล์ (เวลา/แถว/byte) + สรุป p50/p95
 """
 
 from __future__ import annotations
@@ -21,11 +22,15 @@ import argparse
 import json
 import math
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import pandas as pd
 
+from services.batch_events import BatchEvents, add_event_arguments
+from services.dbd_excel_reader import read_dbd_table
+
 
 # ---------------- Utils ---------------- #
 
@@ -128,34 +133,55 @@ TH_TO_EN_INCOME: Dict[str, str] = {
 }
 
 # ตัวช่วย normalize พิเศษ (ตัด zero-width, NBSP, เว้นวรรคเกิน, วงเล็บแปลก)
+# regex ทั้งหมด compile ครั้งเดียวตอน import
 _ZW_RE = re.compile(r"[\u200b\u200c\u200d\u2060]")
+_OPEN_PAREN_RE = re.compile(r"\s*\(\s*")
+_CLOSE_PAREN_RE = re.compile(r"\s*\)\s*")
+_PROFIT_LOSS_RE = re.compile(r"กำไร\s*ขาดทุน")
+_SPACES_RE = re.compile(r"\s+")
+_BRACKETS_RE = re.compile(r"[()（）\[\]{}]")
+
 def _canon_title(s: str) -> str:
     s = _ZW_RE.sub("", s)
     s = s.replace("\xa0", " ")              # NBSP → space
     s = s.replace("（", "(").replace("）", ")")
     # มาตรฐานรูปแบบวงเล็บ "กำไร(ขาดทุน)" และตัดช่องว่างรอบวงเล็บ
-    s = re.sub(r"\s*\(\s*", "(", s)
-    s = re.sub(r"\s*\)\s*", ")", s)
+    s = _OPEN_PAREN_RE.sub("(", s)
+    s = _CLOSE_PAREN_RE.sub(")", s)
     # กรณีเขียนแบบไม่มีวงเล็บ: "กำไร ขาดทุน" → "กำไร(ขาดทุน)"
-    s = re.sub(r"กำไร\s*ขาดทุน", "กำไร(ขาดทุน)", s)
+    s = _PROFIT_LOSS_RE.sub("กำไร(ขาดทุน)", s)
     # บีบช่องว่างซ้ำ
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _SPACES_RE.sub(" ", s).strip()
     return s
 
+def _no_paren(name: str) -> str:
+    return _BRACKETS_RE.sub("", name).strip()
+
+# index ตอน import — ผลต้องตรงกับ lookup เดิมทุกชื่อ: ชื่อหลัง _canon_title เทียบกับ key ดิบของ TH_TO_EN_INCOME
+# (ไม่ canonical key) เพราะ "กำไร(ขาดทุน) ก่อนภาษี" / "กำไร(ขาดทุน) สุทธิ" ที่ _canon_title ตัดช่องว่างหลัง ")"
+# ต้องตกไป regex → profit_before_tax / net_profit ซึ่งเป็นชื่อที่ปลายทางใช้ (smf-api ImportDbdFinancial INCOME_COLS)
+# ขั้น 2 (ลบวงเล็บแล้ว) เทียบได้เฉพาะ key ที่ไม่มีวงเล็บ → แยก index เล็กไว้
+_INCOME_INDEX: Dict[str, str] = dict(TH_TO_EN_INCOME)
+_INCOME_NO_PAREN_INDEX: Dict[str, str] = {k: v for k, v in TH_TO_EN_INCOME.items() if not _BRACKETS_RE.search(k)}
+
 def map_item_th_to_en(th_name: Any) -> str:
     if is_none_or_nan(th_name):
         return "unknown"
+    return _map_title(str(th_name))
 
-    name = _canon_title(str(th_name))
+@lru_cache(maxsize=4096)
+def _map_title(raw: str) -> str:
+    """normalize + จับคู่ต่อ label ที่ไม่ซ้ำกัน (memoized) — แถวที่ชื่อซ้ำไม่ต้องทำ regex ใหม่"""
+    name = _canon_title(raw)
 
     # 1) ลองตรง ๆ ก่อน
-    if name in TH_TO_EN_INCOME:
-        return TH_TO_EN_INCOME[name]
+    if name in _INCOME_INDEX:
+        return _INCOME_INDEX[name]
 
     # 2) ลบวงเล็บทั้งหมดเป็น fallback
-    name_no_paren = re.sub(r"[()（）\[\]{}]", "", name).strip()
-    if name_no_paren in TH_TO_EN_INCOME:
-        return TH_TO_EN_INCOME[name_no_paren]
+    name_no_paren = _no_paren(name)
+    if name_no_paren in _INCOME_NO_PAREN_INDEX:
+        return _INCOME_NO_PAREN_INDEX[name_no_paren]
 
     # 3) regex fallback สำหรับกลุ่ม "กำไร(ขาดทุน) ..."
     #    - ขั้นต้น → gross_profit
@@ -172,95 +198,16 @@ def map_item_th_to_en(th_name: Any) -> str:
     return "unknown"
 
 
-# ---------------- Sniff & Readers ---------------- #
-
-def magic_bytes(path: Path, n: int = 8) -> bytes:
-    with open(path, "rb") as f:
-        return f.read(n)
-
-def sniff_kind(path: Path) -> str:
-    sig = magic_bytes(path, 8)
-    if sig.startswith(b"PK\x03\x04"):
-        return "xlsx"
-    if sig.startswith(b"\xD0\xCF\x11\xE0"):
-        return "xls"
-    # ถ้า magic bytes ไม่ชัดเจน ใช้นามสกุลช่วยตัดสิน
-    ext = path.suffix.lower()
-    if ext == ".xlsx":
-        return "xlsx"
-    if ext == ".xls":
-        return "xls"
-    return "unknown"
-
-def _read_openpyxl(path: Path) -> pd.DataFrame:
-    return pd.read_excel(path, engine="openpyxl", header=None)
-
-def _read_xlrd(path: Path) -> pd.DataFrame:
-    # ต้อง xlrd<2.0 สำหรับ .xls
-    return pd.read_excel(path, engine="xlrd", header=None)
-
-def _read_calamine(path: Path) -> pd.DataFrame:
-    # ต้องติดตั้ง pandas-calamine
-    return pd.read_excel(path, engine="calamine", header=None)
+# ---------------- Reader ---------------- #
 
 def read_income_table(path: Path, debug: bool) -> pd.DataFrame:
     """
     อ่านไฟล์ Excel income ให้ได้ DataFrame ดิบ (ไม่ tidy)
-    ลำดับความพยายาม:
-      - ถ้า sniff เป็น xlsx: openpyxl → (เผื่อไฟล์จริงเป็น xls) xlrd → calamine → read_html
-      - ถ้า sniff เป็น xls/unknown: xlrd → calamine → (เผื่อจริงเป็น xlsx) openpyxl → read_html
+    เลือก engine จาก content signature ครั้งเดียว (ดู services/dbd_excel_reader.py)
     """
-    kind = sniff_kind(path)
-    log(debug, f"  ↪ sniffed kind: {kind} for {path.name}")
-    tried = []
-
-    if kind == "xlsx":
-        try:
-            df = _read_openpyxl(path)
-            log(debug, f"  ✔ read with openpyxl: shape={df.shape}")
-            return df
-        except Exception as e:
-            tried.append(("openpyxl", str(e)))
-            log(debug, f"  ⚠ openpyxl failed (maybe actually .xls): {e}")
-        for eng_name, reader in (("xlrd", _read_xlrd), ("calamine", _read_calamine)):
-            try:
-                df = reader(path)
-                log(debug, f"  ✔ read with {eng_name}: shape={df.shape}")
-                return df
-            except Exception as e:
-                tried.append((eng_name, str(e)))
-                log(debug, f"  ⚠ failed read with {eng_name}: {e}")
-    else:
-        # xls หรือ unknown
-        for eng_name, reader in (("xlrd", _read_xlrd), ("calamine", _read_calamine)):
-            try:
-                df = reader(path)
-                log(debug, f"  ✔ read with {eng_name}: shape={df.shape}")
-                return df
-            except Exception as e:
-                tried.append((eng_name, str(e)))
-                log(debug, f"  ⚠ failed read with {eng_name}: {e}")
-        # เผื่อเป็น xlsx จริง
-        try:
-            df = _read_openpyxl(path)
-            log(debug, f"  ✔ read with openpyxl (fallback): shape={df.shape}")
-            return df
-        except Exception as e:
-            tried.append(("openpyxl", str(e)))
-            log(debug, f"  ⚠ openpyxl fallback failed: {e}")
-
-    # ทางหนีไฟ: html/ตารางฝัง
-    try:
-        tables = pd.read_html(path, header=None)
-        if tables:
-            df = tables[0]
-            log(debug, f"  ✔ read with read_html: shape={df.shape}")
-            return df
-    except Exception as e:
-        tried.append(("read_html", str(e)))
-        log(debug, f"  ⚠ failed read_html: {e}")
-
-    raise RuntimeError(f"Cannot read Excel file: {path.name}; tried={tried}")
+    df, engine, elapsed = read_dbd_table(path, None, debug)
+    print(f"  ↪ read with {engine} in {elapsed * 1000:.1f} ms (shape={df.shape})")
+    return df
 
 
 # ---------------- Tidy ---------------- #
@@ -358,29 +305,32 @@ def dataframe_to_year_json(df: pd.DataFrame, tax_id: str, debug: bool) -> Dict[s
     years = [c for c in df.columns if c not in ("item_th", "orig_index")]
     out: Dict[str, List[Dict[str, Any]]] = {y: [] for y in years}
 
-    for _, row in df.iterrows():
-        item_th = str(row["item_th"]).strip()
-        item_en = map_item_th_to_en(item_th)
-        order = int(row["orig_index"])
-
-        for y in years:
-            val = row[y]
-            if is_none_or_nan(val):
-                continue
-            out[y].append({
-                "item": item_th,
-                "item_en": item_en,
-                "amount": float(val),   # '-' / 0 ถูกแปลงเป็น 0.0 แล้ว
-                "pct_change": None,     # งบกำไรขาดทุนทั่วไปไม่มี %change
-                "tax_id": tax_id,
-                "_order": order,
-            })
-
-    # เรียงตามลำดับเดิม
-    for y in years:
-        out[y].sort(key=lambda d: d["_order"])
-        for d in out[y]:
-            d.pop("_order", None)
+    # melt ครั้งเดียว: แถว x ปี -> ตารางยาว (year, item, amount) แล้วตัดค่าว่างทีเดียว
+    wide = pd.DataFrame({
+        "_order": df["orig_index"].astype(int),
+        "item": df["item_th"].map(lambda v: str(v).strip()),
+    })
+    wide["item_en"] = wide["item"].map(map_item_th_to_en)
+    wide[years] = df[years]
+    long_df = wide.melt(
+        id_vars=["_order", "item", "item_en"], value_vars=years,
+        var_name="year", value_name="amount",
+    )
+    long_df = long_df[long_df["amount"].notna()]
+    long_df = long_df.sort_values("_order", kind="stable")
+
+    # เรียงตามลำดับเดิม (stable) แล้วแจกเข้าปี — ลำดับในแต่ละปีจึงตาม orig_index
+    for year, item, item_en, amount in zip(
+        long_df["year"].tolist(), long_df["item"].tolist(),
+        long_df["item_en"].tolist(), long_df["amount"].astype(float).tolist(),
+    ):
+        out[year].append({
+            "item": item,
+            "item_en": item_en,
+            "amount": amount,       # '-' / 0 ถูกแปลงเป็น 0.0 แล้ว
+            "pct_change": None,     # งบกำไรขาดทุนทั่วไปไม่มี %change
+            "tax_id": tax_id,
+        })
 
     return out
 
@@ -397,7 +347,7 @@ def process_one_file(path: Path, outdir: Path, debug: bool):
     tax_id = extract_tax_id_from_name(path.name)
     if not tax_id:
         log(debug, f"  ⚠ skip (cannot parse tax id): {path.name}")
-        return
+        return None
 
     print(f"\n▶ Processing: {path.name} (tax_id={tax_id})")
     print(f"  ↪ detected suffix: {path.suffix.lower().lstrip('.')}")
@@ -413,14 +363,22 @@ def process_one_file(path: Path, outdir: Path, debug: bool):
 
     total_rows = sum(len(v) for v in years_json.values())
     print(f"  ✔ wrote: {out_path} (years={list(years_json.keys())}, total_rows={total_rows})")
+    return years_json
 
-def process_folder(in_dir: Path, outdir: Path, debug: bool):
+def process_folder(in_dir: Path, outdir: Path, debug: bool, events_path: Optional[str] = None):
     files = sorted([p for p in in_dir.glob("*_income.*") if p.suffix.lower() in {".xls", ".xlsx"}])
     if not files:
         print("No *_income.xls/xlsx files found.")
         return
+    events = BatchEvents.open(events_path, "script_read_dbd_income", total=len(files))
     for p in files:
-        process_one_file(p, outdir, debug)
+        with events.file(p) as rec:
+            data = process_one_file(p, outdir, debug)
+            if data is None:
+                rec.skip("no tax id in file name")
+            else:
+                rec.add(rows=sum(len(v) for v in data.values()), bytes=p.stat().st_size, years=len(data))
+    events.finish()
 
 
 # ---------------- CLI ---------------- #
@@ -430,13 +388,14 @@ def main():
     ap.add_argument("--folder", required=True, help="input folder containing *_income.xls/xlsx")
     ap.add_argument("--outdir", required=True, help="output folder for <tax_id>_income.json")
     ap.add_argument("--debug", action="store_true", help="verbose logs")
+    add_event_arguments(ap)
     args = ap.parse_args()
 
     in_dir = Path(args.folder).expanduser().resolve()
     out_dir = Path(args.outdir).expanduser().resolve()
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    process_folder(in_dir, out_dir, debug=args.debug)
+    process_folder(in_dir, out_dir, debug=args.debug, events_path=args.events)
 
 
 if __name__ == "__main__":
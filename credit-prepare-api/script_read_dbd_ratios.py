@@ -14,6 +14,7 @@ script_read_dbd_ratios.py (v2.2)
 Usage:
   pip install "xlrd==1.2.0" pandas openpyxl pandas-calamine
   python script_read_dbd_ratios.py --folder ./downloads --outdir ./out_json --debug
+  # --events run.jsonl → event JSON lines ต่อไฟล์ (เวลา/แถว/byte) + สรุป p50/p95
 """
 
 from __future__ import annotations
@@ -21,11 +22,15 @@ import argparse
 import json
 import math
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import pandas as pd
 
+from services.batch_events import BatchEvents, add_event_arguments
+from services.dbd_excel_reader import read_dbd_table
+
 # ========= Utils ========= #
 
 def log(debug: bool, *args):
@@ -104,16 +109,24 @@ TH_TO_EN_FULL: Dict[str, str] = {
     "อัตราส่วนหนี้สินรวมต่อทุนดำเนินงาน (เท่า)": "debt_to_working_capital_ratio_times",
 }
 
+# index ที่ normalize ช่องว่างแล้ว สร้างครั้งเดียวตอน import (คีย์แรกที่ชนกันชนะ เหมือนวนลูปเดิม)
+TH_TO_EN_NORM: Dict[str, str] = {}
+for _k, _v in TH_TO_EN_FULL.items():
+    TH_TO_EN_NORM.setdefault(normalize_spaces(_k), _v)
+
 def map_item_th_to_en(th_name: Any) -> str:
     if is_none_or_nan(th_name):
         return "unknown"
-    s = str(th_name).strip()
+    return _map_label(str(th_name).strip())
+
+@lru_cache(maxsize=4096)
+def _map_label(s: str) -> str:
+    """จับคู่ต่อ label ที่ไม่ซ้ำกัน (memoized)"""
     if s in TH_TO_EN_FULL:
         return TH_TO_EN_FULL[s]
     s_norm = normalize_spaces(s)
-    for k, v in TH_TO_EN_FULL.items():
-        if normalize_spaces(k) == s_norm:
-            return v
+    if s_norm in TH_TO_EN_NORM:
+        return TH_TO_EN_NORM[s_norm]
     up = s.upper()
     if "ROA" in up: return "return_on_assets_roa_percent"
     if "ROE" in up: return "return_on_equity_roe_percent"
@@ -134,30 +147,10 @@ def map_item_th_to_en(th_name: Any) -> str:
 
 # ========= Readers ========= #
 
-def detect_ooxml_zip_signature(path: Path) -> bool:
-    try:
-        with path.open("rb") as f:
-            return f.read(4) == b"PK\x03\x04"
-    except Exception:
-        return False
-
 def read_ratios_table(path: Path, sheet: Optional[str], debug: bool) -> pd.DataFrame:
-    suffix = path.suffix.lower()
-    is_zip = detect_ooxml_zip_signature(path)
-    log(debug, f"  ↪ detected suffix: {suffix}, is_zip={is_zip}")
-    sheet_name = sheet if sheet is not None else 0
-
-    engines = (["openpyxl"] if is_zip else []) + ["xlrd", "calamine", None]
-    tried = []
-    for engine in engines:
-        try:
-            df = pd.read_excel(path, engine=engine, header=None, sheet_name=sheet_name)
-            log(debug, f"  ✔ read_excel({engine or 'auto'}) ok: shape={df.shape}")
-            return df
-        except Exception as e:
-            tried.append((engine or "auto", str(e)))
-            log(debug, f"  ⚠ failed read_excel({engine or 'auto'}): {e}")
-    raise RuntimeError(f"Cannot read Excel file: {path.name}; tried={tried}")
+    df, engine, elapsed = read_dbd_table(path, sheet, debug)
+    print(f"  ↪ read with {engine} in {elapsed * 1000:.1f} ms (shape={df.shape})")
+    return df
 
 # ========= Tidy ========= #
 
@@ -206,18 +199,15 @@ def tidy_ratios_table(df_raw: pd.DataFrame, debug: bool) -> pd.DataFrame:
     best_score = -1
     sample = body_all.head(80)
 
-    # ใช้ mapping ไทยเพื่อช่วยบอกคะแนน
-    th_keys = set(TH_TO_EN_FULL.keys())
-
     for c in non_year_candidates:
         col_series = sample.iloc[:, c]
         label_like = col_series.map(_looks_like_label).sum()
 
+        # ใช้ mapping ไทย (index ที่ normalize แล้ว) เพื่อช่วยบอกคะแนน
         def in_map(x):
             if is_none_or_nan(x):
                 return False
-            s = normalize_spaces(str(x))
-            return s in th_keys or normalize_spaces(s) in {normalize_spaces(k) for k in th_keys}
+            return normalize_spaces(str(x)) in TH_TO_EN_NORM
 
         mapped_cnt = col_series.map(in_map).sum()
         # ถ้า cell เป็น label-like มาก + เจอใน mapping จะได้คะแนนสูง
@@ -303,7 +293,7 @@ def process_one_file(path: Path, outdir: Path, sheet: Optional[str], debug: bool
     m = re.search(r"(?P<tax>\d{13})", path.name)
     if not m:
         log(debug, f"skip (no tax id in name): {path.name}")
-        return
+        return None
     tax_id = m.group("tax")
 
     print(f"\n▶ Processing {path.name} (tax_id={tax_id})")
@@ -317,6 +307,7 @@ def process_one_file(path: Path, outdir: Path, sheet: Optional[str], debug: bool
         json.dump(data, f, ensure_ascii=False, indent=2)
     total_rows = sum(len(v) for v in data.values())
     print(f"✔ wrote {out_path} (years={list(data.keys())}, total_rows={total_rows})")
+    return data
 
 def main():
     ap = argparse.ArgumentParser(description="Read DBD *_ratios Excel → JSON (by year)")
@@ -324,6 +315,7 @@ def main():
     ap.add_argument("--outdir", required=True)
     ap.add_argument("--sheet", default=None)
     ap.add_argument("--debug", action="store_true")
+    add_event_arguments(ap)
     args = ap.parse_args()
 
     folder = Path(args.folder).expanduser().resolve()
@@ -335,8 +327,15 @@ def main():
         print("No *_ratios.xls/xlsx files found.")
         return
 
-    for f in files:
-        process_one_file(f, outdir, args.sheet, args.debug)
+    events = BatchEvents.from_args(args, "script_read_dbd_ratios", total=len(files))
+    for p in files:
+        with events.file(p) as rec:
+            data = process_one_file(p, outdir, args.sheet, args.debug)
+            if data is None:
+                rec.skip("no tax id in file name")
+            else:
+                rec.add(rows=sum(len(v) for v in data.values()), bytes=p.stat().st_size, years=len(data))
+    events.finish()
 
 if __name__ == "__main__":
     main()
@@ -23,6 +23,9 @@ send_dbd_company_supplier.py
   # เพิ่มฟิลด์เอง
   python send_dbd_company_supplier.py downloads --extra project=SMF source=dbd
 
+  # เก็บ event JSON lines ต่อไฟล์ (เวลา/byte/status) + สรุป p50/p95
+  python send_dbd_company_supplier.py downloads --events logs/send_supplier.jsonl
+
 หมายเหตุ:
 - จะดึง juristic_id อัตโนมัติจากชื่อไฟล์และแนบเป็นฟิลด์ 'juristic_id'
 - ถ้าไฟล์ JSON มี key เดียวกัน จะไม่เขียนทับค่าเดิม
@@ -36,6 +39,8 @@ import re
 import sys
 from typing import Dict, List, Any, Optional
 
+from services.batch_events import BatchEvents, add_event_arguments
+
 # -------------------------------
 # CONFIG / PATTERN
 # -------------------------------
@@ -88,6 +93,7 @@ def post_json(
     timeout: int,
     auto_jid: bool,
     extra_fields: Optional[Dict[str, str]] = None,
+    rec=None,
 ) -> bool:
     """ส่งไฟล์ JSON เป็น raw JSON body"""
     try:
@@ -127,6 +133,8 @@ def post_json(
     try:
         resp = requests.post(api_url, json=payload, timeout=timeout)
         status = resp.status_code
+        if rec is not None:
+            rec.add(bytes=len(resp.request.body or b""), status_code=status)
         body_preview = (resp.text or "")[:800]
         if 200 <= status < 300:
             print(f"✅ OK [{status}] {os.path.basename(json_path)} → {api_url}")
@@ -154,6 +162,7 @@ def main():
     ap.add_argument("--timeout", type=int, default=30, help="timeout วินาที")
     ap.add_argument("--extra", nargs="*", default=[], help="แนบฟิลด์เพิ่มเติม key=value หลายคู่ได้")
     ap.add_argument("--no-auto-jid", action="store_true", help="ไม่ต้องเพิ่ม juristic_id อัตโนมัติจากชื่อไฟล์")
+    add_event_arguments(ap)
 
     args = ap.parse_args()
 
@@ -178,21 +187,27 @@ def main():
         print(f"Extra   : {extra_fields}")
     print("------------------------------------------------------------")
 
+    events = BatchEvents.from_args(args, "send_dbd_company_supplier", total=len(files))
     ok, fail = 0, 0
     for i, fp in enumerate(files, start=1):
         print(f"[{i}/{len(files)}] {fp}")
-        success = post_json(
-            json_path=fp,
-            api_url=args.api_url,
-            timeout=args.timeout,
-            auto_jid=not args.no_auto_jid,
-            extra_fields=extra_fields,
-        )
+        with events.file(fp) as rec:
+            success = post_json(
+                json_path=fp,
+                api_url=args.api_url,
+                timeout=args.timeout,
+                auto_jid=not args.no_auto_jid,
+                extra_fields=extra_fields,
+                rec=rec,
+            )
+            if not success and rec.status == "ok":
+                rec.fail("post failed")
         ok += 1 if success else 0
         fail += 0 if success else 1
 
     print("------------------------------------------------------------")
     print(f"เสร็จสิ้น ✅  สำเร็จ: {ok}, ล้มเหลว: {fail}")
+    events.finish()
     sys.exit(0 if fail == 0 else 1)
 
 
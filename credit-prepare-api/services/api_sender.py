@@ -0,0 +1,64 @@
+# services/api_sender.py
+"""
+ส่งผล BS/IC (JSON array) ไป Laravel public API — ใช้ร่วมกันระหว่าง main.py และ script_load_test.py
+
+post_statements        sync (requests) ใช้ใน endpoint แบบเดิมที่รันใน threadpool
+post_statements_async  httpx.AsyncClient ตัวเดียวทั้ง process (connection pool / keep-alive) ไม่บล็อก event loop
+"""
+import os
+
+import requests
+
+from services.stage_metrics import METRICS
+
+API_HEADERS = {"Content-Type": "application/json"}
+STATEMENT_ENDPOINTS = {
+    "bs": "/api/public/bol-bs",
+    "ic": "/api/public/bol-ic",
+}
+# connection pool ของ client แบบ async (ต่อ process) และ timeout ค่าเริ่มต้น (วินาที)
+API_MAX_CONNECTIONS = int(os.getenv("API_MAX_CONNECTIONS", "50"))
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "60"))
+
+_async_client = None
+
+
+def post_statements(kind, body, api_base, session=None, timeout=None):
+    """body = JSON ที่ serialize แล้ว (เช่น CachedResult.body) → response (raise ถ้า HTTP error)"""
+    endpoint = f"{api_base}{STATEMENT_ENDPOINTS[kind]}"
+    with METRICS.stage(kind, "downstream_post") as t:
+        response = (session or requests).post(endpoint, headers=API_HEADERS, data=body, timeout=timeout)
+        t.add(bytes=len(body))
+    response.raise_for_status()
+    return response
+
+
+def async_client():
+    """httpx.AsyncClient ที่ใช้ร่วมกัน (สร้างครั้งแรกใน event loop ที่เรียก) — ปิดด้วย close_async_client()"""
+    global _async_client
+    if _async_client is None:
+        try:
+            import httpx
+        except ImportError as e:
+            raise RuntimeError("endpoint แบบ async ต้องติดตั้ง httpx: pip install httpx") from e
+        limits = httpx.Limits(max_connections=API_MAX_CONNECTIONS, max_keepalive_connections=API_MAX_CONNECTIONS)
+        _async_client = httpx.AsyncClient(headers=API_HEADERS, limits=limits, timeout=API_TIMEOUT)
+    return _async_client
+
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        client, _async_client = _async_client, None
+        await client.aclose()
+
+
+async def post_statements_async(kind, body, api_base, client=None, timeout=None):
+    """เหมือน post_statements แต่ await ได้ (raise httpx.HTTPStatusError ถ้า HTTP error)"""
+    endpoint = f"{api_base}{STATEMENT_ENDPOINTS[kind]}"
+    kwargs = {"timeout": timeout} if timeout is not None else {}
+    with METRICS.stage(kind, "downstream_post") as t:
+        response = await (client or async_client()).post(endpoint, content=body, **kwargs)
+        t.add(bytes=len(body))
+    response.raise_for_status()
+    return response
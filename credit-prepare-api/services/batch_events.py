@@ -0,0 +1,185 @@
+# services/batch_events.py
+"""
+event แบบ JSON lines ของสคริปต์ batch (OCR / อ่าน Excel DBD / ส่ง API / scrape) — ไฟล์ละ event เริ่ม/จบ
+ใช้ดูไฟล์ที่ช้าผิดปกติและเทียบ regression ข้ามรอบได้ (jq / pandas.read_json(lines=True))
+
+    events = BatchEvents.from_args(args, "script_read_dbd_income", total=len(files))
+    for path in files:
+        with events.file(path) as rec:
+            data = process_one_file(path, ...)
+            rec.add(rows=..., pages=..., bytes=...)
+    events.finish()
+
+event (บรรทัดละ JSON):
+    run_started    {"total": N}
+    file_started   {"file", "index", "total"}
+    file_finished  {"file", "status": ok|error|skipped, "duration_ms", "pages", "rows", "bytes", "retries", "error",
+                    "done", "total", "elapsed_s", "files_per_s", "eta_s"}
+    summary        {"files", "ok", "failed", "skipped", "elapsed_s", "files_per_s", "pages", "rows", "bytes", "retries",
+                    "p50_ms", "p95_ms", "max_ms", "slowest": [{"file", "duration_ms"}, ...]}
+
+ปลายทาง: --events PATH (ต่อท้ายไฟล์, "-" = stderr) หรือ env BATCH_EVENTS — ไม่ระบุ = ไม่เขียน event
+แต่ยังพิมพ์สรุป p50/p95 หนึ่งบรรทัดตอนจบเสมอ
+"""
+import contextlib
+import json
+import math
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+EVENTS_ENV = "BATCH_EVENTS"
+SLOWEST_N = 5
+
+
+def percentile(sorted_values, q):
+    """percentile แบบ nearest-rank จาก list ที่เรียงแล้ว"""
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def add_event_arguments(ap):
+    ap.add_argument("--events", default=os.getenv(EVENTS_ENV) or None,
+                    help=f"เขียน event JSON lines (เริ่ม/จบต่อไฟล์ + สรุป) ต่อท้ายไฟล์นี้, '-' = stderr (env {EVENTS_ENV})")
+
+
+class FileRecord:
+    """ค่าที่ไฟล์หนึ่งรายงาน — ได้จาก events.file(...)"""
+    __slots__ = ("pages", "rows", "bytes", "retries", "status", "error", "extra")
+
+    def __init__(self):
+        self.pages = None
+        self.rows = None
+        self.bytes = None
+        self.retries = 0
+        self.status = "ok"
+        self.error = None
+        self.extra = {}
+
+    def add(self, pages=None, rows=None, bytes=None, retries=0, **extra):
+        if pages is not None:
+            self.pages = (self.pages or 0) + pages
+        if rows is not None:
+            self.rows = (self.rows or 0) + rows
+        if bytes is not None:
+            self.bytes = (self.bytes or 0) + bytes
+        self.retries += retries
+        self.extra.update(extra)
+
+    def fail(self, error):
+        self.status = "error"
+        self.error = str(error)
+
+    def skip(self, reason=None):
+        self.status = "skipped"
+        self.error = reason
+
+
+class BatchEvents:
+    def __init__(self, script, stream=None, total=None):
+        self.script = script
+        self.run_id = uuid.uuid4().hex[:12]
+        self.stream = stream
+        self.total = total
+        self.started = time.perf_counter()
+        self.results = []          # (file, status, seconds)
+        self.totals = {"pages": 0, "rows": 0, "bytes": 0, "retries": 0}
+        self._index = 0
+        self.emit("run_started", total=total)
+
+    @classmethod
+    def from_args(cls, args, script, total=None):
+        return cls.open(getattr(args, "events", None), script, total=total)
+
+    @classmethod
+    def open(cls, path, script, total=None):
+        if not path:
+            stream = None
+        elif path == "-":
+            stream = sys.stderr
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            stream = open(path, "a", encoding="utf-8")
+        return cls(script, stream, total=total)
+
+    def emit(self, event, **fields):
+        if self.stream is None:
+            return
+        record = {"ts": datetime.now().astimezone().isoformat(timespec="milliseconds"),
+                  "script": self.script, "run_id": self.run_id, "event": event}
+        record.update({k: v for k, v in fields.items() if v is not None})
+        self.stream.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.stream.flush()
+
+    # ---- ต่อไฟล์ ---- #
+
+    def started_file(self, name, **fields):
+        self._index += 1
+        self.emit("file_started", file=str(name), index=self._index, total=self.total, **fields)
+
+    def record(self, name, seconds, status="ok", pages=None, rows=None, bytes=None, retries=0, error=None, **fields):
+        """บันทึกไฟล์ที่จบแล้ว (ใช้ตรง ๆ เมื่อจับเวลาเองใน worker process)"""
+        self.results.append((str(name), status, seconds))
+        for key, value in (("pages", pages), ("rows", rows), ("bytes", bytes), ("retries", retries)):
+            self.totals[key] += value or 0
+        done = len(self.results)
+        elapsed = time.perf_counter() - self.started
+        rate = done / elapsed if elapsed > 0 else None
+        eta = (self.total - done) / rate if rate and self.total else None
+        self.emit("file_finished", file=str(name), status=status, duration_ms=round(seconds * 1000.0, 1),
+                  pages=pages, rows=rows, bytes=bytes, retries=retries, error=error, done=done, total=self.total,
+                  elapsed_s=round(elapsed, 3), files_per_s=round(rate, 3) if rate else None,
+                  eta_s=round(eta, 1) if eta is not None else None, **fields)
+
+    @contextlib.contextmanager
+    def file(self, name, **fields):
+        """จับเวลาไฟล์เดียว — exception ในบล็อกถูกบันทึกเป็น status=error แล้ว raise ต่อ"""
+        rec = FileRecord()
+        self.started_file(name, **fields)
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        except BaseException as e:
+            rec.fail(e)
+            raise
+        finally:
+            self.record(name, time.perf_counter() - t0, rec.status, rec.pages, rec.rows, rec.bytes,
+                        rec.retries, rec.error, **rec.extra)
+
+    # ---- สรุป ---- #
+
+    def summary(self):
+        ms = sorted(seconds * 1000.0 for _, _, seconds in self.results)
+        elapsed = time.perf_counter() - self.started
+        statuses = [status for _, status, _ in self.results]
+        slowest = sorted(self.results, key=lambda r: r[2], reverse=True)[:SLOWEST_N]
+        return {
+            "files": len(self.results),
+            "ok": statuses.count("ok"),
+            "failed": statuses.count("error"),
+            "skipped": statuses.count("skipped"),
+            "elapsed_s": round(elapsed, 3),
+            "files_per_s": round(len(self.results) / elapsed, 3) if elapsed > 0 else None,
+            **self.totals,
+            "p50_ms": round(percentile(ms, 50), 1) if ms else None,
+            "p95_ms": round(percentile(ms, 95), 1) if ms else None,
+            "max_ms": round(ms[-1], 1) if ms else None,
+            "slowest": [{"file": name, "duration_ms": round(seconds * 1000.0, 1)} for name, _, seconds in slowest],
+        }
+
+    def finish(self):
+        """emit summary + พิมพ์สรุปหนึ่งบรรทัด แล้วปิดไฟล์ event → dict สรุป"""
+        s = self.summary()
+        self.emit("summary", **s)
+        if s["files"]:
+            slow = ", ".join(f"{os.path.basename(r['file'])} {r['duration_ms']:.0f}ms" for r in s["slowest"][:3])
+            print(f"⏱ {s['files']} files in {s['elapsed_s']:.1f}s ({s['files_per_s']} files/s) "
+                  f"p50={s['p50_ms']:.0f}ms p95={s['p95_ms']:.0f}ms max={s['max_ms']:.0f}ms | slowest: {slow}")
+        if self.stream is not None and self.stream is not sys.stderr:
+            self.stream.close()
+        self.stream = None
+        return s
@@ -0,0 +1,152 @@
+# services/batch_runner.py
+import glob
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
+
+from services.columnar_store import TableWriter, parquet_enabled
+from services.inv_old_processor import iter_old_invoice_chunks
+from services.json_stream import RecordWriter, with_format
+from services.po_old_processor import iter_old_po_chunks
+
+RAW_DATA_FOLDER = "raw_data"
+PROCESSED_DATA_FOLDER = "processed_data"
+
+# feed → วิธีอ่านทีละ chunk / ชื่อ dataset (parquet) / glob ค่าเริ่มต้นใต้ raw_data
+FEEDS = {
+    "inv": {"iter_chunks": iter_old_invoice_chunks, "dataset": "invoice", "glob": "inv/Invoice_*.csv"},
+    "po": {"iter_chunks": iter_old_po_chunks, "dataset": "po", "glob": "po/PO_*.csv"},
+}
+
+# เดือนในชื่อไฟล์ เช่น Invoice_052025_new.csv / PO_022025.csv → (2025, 5)
+MONTH_RE = re.compile(r"(?<!\d)(0[1-9]|1[0-2])(\d{4})(?!\d)")
+
+
+def file_month(path):
+    m = MONTH_RE.search(os.path.basename(path))
+    return (int(m.group(2)), int(m.group(1))) if m else None
+
+
+def parse_month(text):
+    """'2025-05' / '05/2025' / '052025' → (2025, 5)"""
+    if not text:
+        return None
+    m = re.fullmatch(r"(\d{4})-(\d{1,2})", text)
+    if m:
+        return int(m.group(1)), int(m.group(2))
+    m = re.fullmatch(r"(\d{1,2})/?(\d{4})", text)
+    if m:
+        return int(m.group(2)), int(m.group(1))
+    raise ValueError(f"รูปแบบเดือนไม่ถูกต้อง (ใช้ YYYY-MM): {text}")
+
+
+def output_filename_for(input_path):
+    # inv/Invoice_052025_new.csv → invoice_052025_new.json (ชื่อเดียวกับที่ main() เคยตั้งเอง)
+    return os.path.splitext(os.path.basename(input_path))[0].lower() + ".json"
+
+
+def discover_inputs(feed, pattern=None, month_from=None, month_to=None):
+    """คืน absolute path (เรียงตามเดือน) ใต้ raw_data ที่ตรง glob และอยู่ในช่วงเดือน [month_from, month_to]"""
+    pattern = pattern or FEEDS[feed]["glob"]
+    paths = glob.glob(pattern if os.path.isabs(pattern) else os.path.join(RAW_DATA_FOLDER, pattern))
+    selected = []
+    for path in paths:
+        month = file_month(path)
+        if (month_from or month_to) and month is None:
+            continue
+        if month_from and month < month_from:
+            continue
+        if month_to and month > month_to:
+            continue
+        selected.append(os.path.abspath(path))
+    return sorted(selected, key=lambda p: (file_month(p) or (0, 0), p))
+
+
+def is_up_to_date(input_path, output_path):
+    return os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+
+
+def convert_file(feed, input_path, output_filename, fmt="json", compression=None, formats="csv"):
+    """
+    อ่านไฟล์ invoice/po ทีละ chunk แล้วเขียน JSON (และ Parquet ถ้าเปิด) ต่อท้ายทีละ chunk
+    memory สูงสุด ~ 1 chunk ไม่ขึ้นกับขนาดไฟล์ — รันใน worker process ได้
+    """
+    spec = FEEDS[feed]
+    t0 = time.perf_counter()
+    os.makedirs(PROCESSED_DATA_FOLDER, exist_ok=True)
+    output_path = os.path.join(PROCESSED_DATA_FOLDER, with_format(output_filename, fmt, compression))
+    with ExitStack() as stack:
+        json_writer = stack.enter_context(RecordWriter(output_path, fmt, compression))
+        parquet_writer = None
+        if parquet_enabled(formats):
+            parquet_writer = stack.enter_context(TableWriter(spec["dataset"], os.path.splitext(output_filename)[0]))
+        for chunk in spec["iter_chunks"](input_path):
+            json_writer.write(chunk)
+            if parquet_writer is not None:
+                parquet_writer.write(chunk)
+    return {
+        "feed": feed,
+        "input": input_path,
+        "output": output_path,
+        "rows": json_writer.rows,
+        "bytes": os.path.getsize(input_path),
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+def run_batch(jobs, workers=None, fmt="json", compression=None, formats="csv", force=False):
+    """
+    jobs = [(feed, input_path), ...] — ประมวลผลแบบขนานทีละไฟล์ (1 เดือน = 1 งาน)
+    ข้ามไฟล์ที่ output ใหม่กว่า input แล้ว (เว้นแต่ force=True) คืน (results, skipped, failed)
+    """
+    todo, skipped = [], []
+    for feed, input_path in jobs:
+        output_filename = output_filename_for(input_path)
+        output_path = os.path.join(PROCESSED_DATA_FOLDER, with_format(output_filename, fmt, compression))
+        if not force and is_up_to_date(input_path, output_path):
+            skipped.append(input_path)
+            print(f"⏭  skip (up to date): {os.path.basename(input_path)}")
+            continue
+        todo.append((feed, input_path, output_filename))
+
+    results, failed = [], []
+    if not todo:
+        return results, skipped, failed
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(todo)))
+    print(f"▶ {len(todo)} file(s) to process (workers={workers})")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(convert_file, feed, input_path, output_filename, fmt, compression, formats): input_path
+            for feed, input_path, output_filename in todo
+        }
+        for i, fut in enumerate(as_completed(futures), start=1):
+            input_path = futures[fut]
+            try:
+                r = fut.result()
+            except Exception as e:
+                failed.append((input_path, str(e)))
+                print(f"[{i}/{len(futures)}] ❌ {os.path.basename(input_path)}: {e}")
+                continue
+            results.append(r)
+            print(f"[{i}/{len(futures)}] ✔ {os.path.basename(input_path)} → {r['output']} "
+                  f"({r['rows']} rows, {r['seconds']:.2f}s)")
+    return results, skipped, failed
+
+
+def print_summary(results, skipped, failed, wall_seconds):
+    if results:
+        print(f"\n{'file':<40} {'rows':>10} {'MB':>8} {'sec':>7} {'rows/s':>10} {'MB/s':>7}")
+        for r in sorted(results, key=lambda r: r["input"]):
+            mb = r["bytes"] / 1e6
+            sec = max(r["seconds"], 1e-9)
+            print(f"{os.path.basename(r['input']):<40} {r['rows']:>10,} {mb:>8.1f} {sec:>7.2f} "
+                  f"{r['rows'] / sec:>10,.0f} {mb / sec:>7.1f}")
+    total_rows = sum(r["rows"] for r in results)
+    total_mb = sum(r["bytes"] for r in results) / 1e6
+    wall = max(wall_seconds, 1e-9)
+    print(f"\nDone. processed={len(results)}, skipped={len(skipped)}, failed={len(failed)}, "
+          f"rows={total_rows:,}, {total_mb:.1f} MB in {wall_seconds:.2f}s "
+          f"({total_rows / wall:,.0f} rows/s, {total_mb / wall:.1f} MB/s)")
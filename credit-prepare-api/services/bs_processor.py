@@ -2,8 +2,15 @@ import os
 import pandas as pd
 import re
 
+from services.columnar_store import parquet_enabled, write_partitioned
+from services.encoding_sniffer import read_csv_sniffed
+from services.ratio_engine import process_ratios
+from services.stage_metrics import METRICS
+from services.statement_index import write_statement_index
+
 RAW_DATA_FOLDER = "./raw_data/bs"
 PROCESSED_DATA_FOLDER = "./processed_data"
+BOL_ENCODINGS = ("utf-8", "cp1252", "latin1")
 OUTPUT_CSV_PATH = os.path.join(PROCESSED_DATA_FOLDER, "bs_all_processed_data.csv")
 
 FINAL_HEADERS = [
@@ -59,11 +66,13 @@ FINAL_HEADERS = [
     "Par value (Baht) - Issued and Paid-up"
 ]
 
-def process_bs_statements():
+def process_bs_statements(formats=("csv",)):
     os.makedirs(PROCESSED_DATA_FOLDER, exist_ok=True)
     processed_df = pd.DataFrame(columns=['company_id', 'company_name', 'year'] + FINAL_HEADERS)
 
-    csv_files = [f for f in os.listdir(RAW_DATA_FOLDER) if f.endswith(".csv") and f.startswith("BS_")]
+    with METRICS.stage("bs", "file_discovery") as t:
+        csv_files = [f for f in os.listdir(RAW_DATA_FOLDER) if f.endswith(".csv") and f.startswith("BS_")]
+        t.add(rows=len(csv_files))
 
     for csv_file_name in csv_files:
         input_csv_path = os.path.join(RAW_DATA_FOLDER, csv_file_name)
@@ -72,44 +81,60 @@ def process_bs_statements():
         company_id = match.group(1) if match else ""
         company_name = match.group(2) if match else ""
 
-        try:
-            df = pd.read_csv(input_csv_path, encoding='latin1', header=None)
-        except:
-            df = pd.read_csv(input_csv_path, encoding='cp1252', header=None)
-
-        years_from_header = []
-        for col_index in range(3, df.shape[1]):
-            year_str = df.iloc[0, col_index]
-            year_match = re.search(r'\d{4}', str(year_str))
-            if year_match:
-                years_from_header.append(year_match.group(0))
-
-        for i, current_year in enumerate(years_from_header):
-            if not re.match(r'\d{4}', str(current_year)):
-                continue
-
-            row_data = {
-                'company_id': company_id,
-                'company_name': company_name,
-                'year': current_year
-            }
-
-            values_for_year = df.iloc[3:53, 3 + i].tolist()
-
-            for j, header in enumerate(FINAL_HEADERS):
-                value = values_for_year[j] if j < len(values_for_year) else None
-                try:
-                    numeric_value = pd.to_numeric(value, errors='coerce')
-                    if pd.isna(numeric_value):
+        # sniff encoding จากต้นไฟล์แล้วอ่านครั้งเดียว (latin1 decode ได้ทุก byte จึงเป็นตัวสุดท้าย)
+        with METRICS.stage("bs", "csv_parse") as t:
+            df, _ = read_csv_sniffed(input_csv_path, candidates=BOL_ENCODINGS, header=None)
+            t.add(rows=len(df), bytes=os.path.getsize(input_csv_path))
+
+        with METRICS.stage("bs", "numeric_coercion") as t:
+            years_from_header = []
+            for col_index in range(3, df.shape[1]):
+                year_str = df.iloc[0, col_index]
+                year_match = re.search(r'\d{4}', str(year_str))
+                if year_match:
+                    years_from_header.append(year_match.group(0))
+
+            for i, current_year in enumerate(years_from_header):
+                if not re.match(r'\d{4}', str(current_year)):
+                    continue
+
+                row_data = {
+                    'company_id': company_id,
+                    'company_name': company_name,
+                    'year': current_year
+                }
+
+                values_for_year = df.iloc[3:53, 3 + i].tolist()
+
+                for j, header in enumerate(FINAL_HEADERS):
+                    value = values_for_year[j] if j < len(values_for_year) else None
+                    try:
+                        numeric_value = pd.to_numeric(value, errors='coerce')
+                        if pd.isna(numeric_value):
+                            numeric_value = 0
+                        if numeric_value == int(numeric_value):
+                            numeric_value = int(numeric_value)
+                    except ValueError:
                         numeric_value = 0
-                    if numeric_value == int(numeric_value):
-                        numeric_value = int(numeric_value)
-                except ValueError:
-                    numeric_value = 0
 
-                row_data[header] = numeric_value
+                    row_data[header] = numeric_value
 
-            processed_df.loc[len(processed_df)] = row_data
+                processed_df.loc[len(processed_df)] = row_data
+            t.add(rows=len(years_from_header))
 
-    processed_df.to_csv(OUTPUT_CSV_PATH, index=False, encoding='utf-8')
+    with METRICS.stage("bs", "csv_write") as t:
+        processed_df.to_csv(OUTPUT_CSV_PATH, index=False, encoding='utf-8')
+        t.add(rows=len(processed_df), bytes=os.path.getsize(OUTPUT_CSV_PATH))
+    # ดัชนี SQLite (company_id, year) ให้ GET /companies/{id}/bs ค้นรายบริษัทได้ทันที
+    with METRICS.stage("bs", "sqlite_index") as t:
+        write_statement_index(processed_df, "bs", FINAL_HEADERS)
+        t.add(rows=len(processed_df))
+    if parquet_enabled(formats):
+        with METRICS.stage("bs", "parquet_write") as t:
+            columnar_df = processed_df.astype({h: "float64" for h in FINAL_HEADERS})
+            write_partitioned(columnar_df, "bs", "all", replace=True)
+            t.add(rows=len(columnar_df))
+    # อัตราส่วนทางการเงิน (ROA/ROE/current ratio/D/E/turnover) คำนวณใหม่จาก BS+IC ล่าสุดทุกครั้ง
+    with METRICS.stage("bs", "ratios"):
+        process_ratios(formats)
     return {"message": "BS processed", "rows": len(processed_df), "data": processed_df}
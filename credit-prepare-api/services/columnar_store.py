@@ -0,0 +1,160 @@
+# services/columnar_store.py
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+PARQUET_ROOT = os.path.join("processed_data", "parquet")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError("ต้องติดตั้ง pyarrow ก่อน: pip install pyarrow") from e
+
+
+def parquet_enabled(formats):
+    # formats มาจาก env PROCESSED_FORMATS เช่น "csv,parquet"
+    if isinstance(formats, str):
+        formats = formats.split(",")
+    return "parquet" in {f.strip().lower() for f in (formats or [])}
+
+
+def write_partitioned(df, statement, part_name, root=PARQUET_ROOT, replace=False):
+    """
+    เขียน DataFrame ลง Parquet แบบ hive partition:
+        <root>/statement=<statement>/year=<year>/<part_name>.parquet
+    - ชื่อไฟล์ต่อ partition คงที่ (part_name) เขียนซ้ำจะทับไฟล์เดิม ไม่งอกไฟล์ใหม่
+    - replace=True แทน statement=<statement> ทั้งก้อน (ใช้กับ dataset ที่สร้างใหม่ทั้งชุดทุกครั้ง)
+      เขียนลงโฟลเดอร์ชั่วคราวก่อนแล้วค่อย rename เข้าที่ — เขียนพังกลางทาง ชุดเดิมยังอยู่ครบ
+    """
+    _require_pyarrow()
+    base = Path(root) / f"statement={statement}"
+    target = base.with_name(f".{base.name}.tmp-{os.getpid()}") if replace else base
+    if replace:
+        shutil.rmtree(target, ignore_errors=True)
+
+    written = []
+    try:
+        for year, part in df.groupby("year", sort=False):
+            out_dir = target / f"year={year}"
+            out_dir.mkdir(parents=True, exist_ok=True)
+            part.drop(columns=["year"]).to_parquet(out_dir / f"{part_name}.parquet", index=False)
+            written.append(str(base / f"year={year}" / f"{part_name}.parquet"))
+        if replace:
+            _swap_dir(target, base)
+    finally:
+        if replace:
+            shutil.rmtree(target, ignore_errors=True)
+    return written
+
+
+def _swap_dir(new, base):
+    # ย้ายชุดเดิมออกก่อน (rename ทับโฟลเดอร์ที่ไม่ว่างไม่ได้) แล้ว rename ชุดใหม่เข้าที่ ค่อยลบชุดเดิม
+    # df ว่าง → ไม่มีโฟลเดอร์ใหม่ → statement นี้ถูกลบ (เหมือนเดิม)
+    old = base.with_name(f".{base.name}.old-{os.getpid()}")
+    shutil.rmtree(old, ignore_errors=True)
+    if base.exists():
+        os.replace(base, old)
+    if new.exists():
+        os.replace(new, base)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def _table_path(dataset, name, root):
+    out_dir = Path(root) / dataset
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return out_dir / f"{name}.parquet"
+
+
+def _stringify_objects(df):
+    # คอลัมน์ object ที่ปนชนิด (เช่นวันที่เป็น str ปน NaN) ให้เป็น string ก่อน ไม่งั้น pyarrow เดา schema ไม่ได้
+    obj_cols = [c for c in df.columns if df[c].dtype == object]
+    if obj_cols:
+        df = df.astype({c: "string" for c in obj_cols})
+    return df
+
+
+def write_table(df, dataset, name, root=PARQUET_ROOT):
+    """เขียน dataset ที่ไม่มีปีเป็นแกนหลัก (invoice / po) เป็น <root>/<dataset>/<name>.parquet"""
+    _require_pyarrow()
+    out_path = _table_path(dataset, name, root)
+    _stringify_objects(df).to_parquet(out_path, index=False)
+    return str(out_path)
+
+
+class TableWriter:
+    """
+    เหมือน write_table แต่เขียนทีละ chunk (1 chunk = 1 row group) ไม่ต้องถือทั้งไฟล์ไว้ใน memory
+    schema ยึดตาม chunk แรก chunk ถัดไป cast ให้ตรง
+    - คอลัมน์ตัวเลขเขียนเป็น float64 เสมอ (chunk หนึ่งอาจได้ int เพราะเป็น 0 ทั้งหมด อีก chunk ได้ float)
+    """
+
+    def __init__(self, dataset, name, root=PARQUET_ROOT):
+        _require_pyarrow()
+        self.out_path = _table_path(dataset, name, root)
+        self.rows = 0
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        df = _stringify_objects(df)
+        int_cols = [c for c in df.columns if pd.api.types.is_integer_dtype(df[c]) or pd.api.types.is_bool_dtype(df[c])]
+        if int_cols:
+            df = df.astype({c: "float64" for c in int_cols})
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.out_path, table.schema)
+        else:
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+        self.rows += len(df)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._writer is not None:
+            self._writer.close()
+        return False
+
+
+def read_statements(statement, year=None, columns=None, root=PARQUET_ROOT):
+    """โหลดงบจาก Parquet แบบ columnar (ไม่ต้อง parse CSV/JSON) เลือกเฉพาะปี/คอลัมน์ได้"""
+    _require_pyarrow()
+    path = Path(root) / f"statement={statement}"
+    if year is not None:
+        path = path / f"year={year}"
+    if not path.exists():
+        return pd.DataFrame()
+    df = pd.read_parquet(path, columns=columns)
+    if year is not None:
+        df["year"] = str(year)
+    elif "year" in df.columns:
+        df["year"] = df["year"].astype(str)
+    return df
+
+
+def year_json_to_frame(data, tax_id):
+    """แปลง { "<year>": [ {item, item_en, amount, pct_change, tax_id}, ... ] } เป็นตารางยาว"""
+    rows = [
+        {
+            "tax_id": tax_id,
+            "year": year,
+            "line_no": i,
+            "item": rec.get("item"),
+            "item_en": rec.get("item_en"),
+            "amount": rec.get("amount"),
+            "pct_change": rec.get("pct_change"),
+        }
+        for year, recs in (data or {}).items()
+        for i, rec in enumerate(recs)
+    ]
+    df = pd.DataFrame(rows, columns=["tax_id", "year", "line_no", "item", "item_en", "amount", "pct_change"])
+    df["amount"] = pd.to_numeric(df["amount"], errors="coerce").astype("float64")
+    df["pct_change"] = pd.to_numeric(df["pct_change"], errors="coerce").astype("float64")
+    return df
@@ -0,0 +1,253 @@
+# services/corpusx_client.py
+"""
+client ของ CorpusX (BOL) API — แทนการเรียก requests ตรง ๆ ใน corpusx_api_examples.py
+
+    client = CorpusXClient()                       # username/password จาก env CORPUSX_USERNAME / CORPUSX_PASSWORD
+    data = client.get_data("0105541008416", data_field="201010400,201040101")
+
+- token ขอครั้งเดียวแล้วใช้ซ้ำจนใกล้ exp (ใน JWT) — ก่อนหมดอายุ REFRESH_MARGIN วินาทีจะ refresh ให้เอง
+  refresh ไม่ผ่าน/refresh token หมดอายุ → login ใหม่
+- ใช้ร่วมกันหลาย thread ได้: มี lock กันไม่ให้หลาย thread ขอ token พร้อมกัน
+- ทุก request ผ่าน requests.Session เดียว (connection pool, keep-alive)
+- fetch_datasets(...) ขอหลาย dataset (profile / tsic / financial_ratio / ...) ในไม่กี่ request แล้วแยกผลให้
+- base_url / env CORPUSX_BASE_URL: ส่งทุก request ไป host อื่น (เช่น services/mock_server.py)
+- cache=ResponseCache(): get_data / fetch_datasets ตอบจาก cache ถาวรถ้ายังไม่หมดอายุ (แยก TTL ต่อ dataset)
+"""
+import base64
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.corpusx_datasets import (
+    DATASETS,
+    MAX_FIELDS_PER_REQUEST,
+    batch_data_field,
+    plan_batches,
+    resolve_datasets,
+    split_response,
+)
+
+TOKEN_URL = "https://corpusxapi.bol.co.th/api/v1/token/token"
+SESSION_CLEAR_URL = "https://corpusxbackapi.bol.co.th/api/v1/session/clear"
+CHECK_DATA_URL = "https://corpusxfrontapi.bol.co.th/ApiFrontend/bol_service/check/data"
+CHECK_COST_URL = "https://corpusxfrontapi.bol.co.th/ApiFrontend/bol_service/check/cost"
+GET_DATA_URL = "https://corpusxfrontapi.bol.co.th/ApiFrontend/bol_service/get/data"
+URLS = {
+    "token": TOKEN_URL,
+    "session_clear": SESSION_CLEAR_URL,
+    "check_data": CHECK_DATA_URL,
+    "check_cost": CHECK_COST_URL,
+    "get_data": GET_DATA_URL,
+}
+
+# refresh ก่อน access token หมดอายุกี่วินาที (access token อายุ 900 วินาทีตาม login_success.json)
+REFRESH_MARGIN = 60
+POOL_SIZE = 16
+TIMEOUT = 30
+
+
+class CorpusXError(RuntimeError):
+    pass
+
+
+def resolve_urls(base_url=None):
+    """
+    base_url (หรือ env CORPUSX_BASE_URL) ชี้ทุก endpoint ไปที่ host เดียว เช่น mock server ในเครื่อง
+    ว่าง = server จริงของ CorpusX (แยก host ตาม URLS)
+    """
+    base_url = (base_url or os.getenv("CORPUSX_BASE_URL") or "").rstrip("/")
+    if not base_url:
+        return dict(URLS)
+    return {name: base_url + urlsplit(url).path for name, url in URLS.items()}
+
+
+def jwt_exp(token):
+    """อ่าน exp (epoch วินาที) จาก payload ของ JWT โดยไม่ verify — อ่านไม่ได้คืน None"""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class CorpusXClient:
+    def __init__(self, username=None, password=None, system_id="1",
+                 refresh_margin=REFRESH_MARGIN, pool_size=POOL_SIZE, timeout=TIMEOUT, cache=None, base_url=None):
+        self.username = username or os.getenv("CORPUSX_USERNAME", "")
+        self.password = password or os.getenv("CORPUSX_PASSWORD", "")
+        self.system_id = system_id
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self.cache = cache
+        self.urls = resolve_urls(base_url)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._access_token = None
+        self._access_exp = 0.0
+        self._refresh_token = None
+        self._refresh_exp = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self.session.close()
+
+    # ---------------- token ---------------- #
+
+    def access_token(self):
+        """token ที่ยังใช้ได้ (อย่างน้อย refresh_margin วินาที) — ไม่มี/ใกล้หมดอายุจะ refresh หรือ login ใหม่"""
+        token = self._access_token
+        if token and time.time() < self._access_exp - self.refresh_margin:
+            return token
+        with self._lock:
+            # thread อื่นอาจ refresh ไปแล้วระหว่างรอ lock
+            if self._access_token and time.time() < self._access_exp - self.refresh_margin:
+                return self._access_token
+            if self._refresh_token and time.time() < self._refresh_exp - self.refresh_margin:
+                try:
+                    self._request_token({"grant_type": "refresh_token", "refresh_token": self._refresh_token})
+                    return self._access_token
+                except (CorpusXError, requests.RequestException):
+                    pass
+            self._request_token({"grant_type": "password", "username": self.username, "password": self.password})
+            return self._access_token
+
+    def invalidate_token(self):
+        with self._lock:
+            self._access_token = None
+            self._access_exp = 0.0
+
+    def _request_token(self, params):
+        r = self.session.post(self.urls["token"], data=params, timeout=self.timeout)
+        if r.status_code != 200:
+            raise CorpusXError(f"ขอ token ไม่สำเร็จ ({params['grant_type']}): HTTP {r.status_code}")
+        payload = r.json()
+        token = payload.get("access_token")
+        if not token:
+            raise CorpusXError(f"ขอ token ไม่สำเร็จ: {payload.get('result_message') or payload}")
+
+        now = time.time()
+        # exp จาก JWT ก่อน ไม่มีค่อยใช้ expires_in
+        self._access_token = token
+        self._access_exp = jwt_exp(token) or now + float(payload.get("expires_in") or 0)
+        self._refresh_token = payload.get("refresh_token") or self._refresh_token
+        self._refresh_exp = jwt_exp(self._refresh_token or "") or 0.0
+        return payload
+
+    def clear_session(self):
+        """ล้าง session ฝั่ง CorpusX (ใช้เมื่อชน limit จำนวน session) แล้วลืม token ที่ถืออยู่"""
+        r = self.session.post(
+            self.urls["session_clear"],
+            data={"grant_type": "password", "username": self.username, "password": self.password},
+            timeout=self.timeout,
+        )
+        with self._lock:
+            self._access_token = self._refresh_token = None
+            self._access_exp = self._refresh_exp = 0.0
+        return r.status_code == 200
+
+    # ---------------- data ---------------- #
+
+    def inquiry_params(self, registration_id="", company_name="", data_set="", data_field="",
+                       period_from="", period_to="", fs_type="", language="", status=""):
+        if isinstance(data_field, (list, tuple, set, frozenset)):
+            data_field = ",".join(data_field)
+        return {
+            "systemId": self.system_id,
+            "registrationId": registration_id,
+            "companyName": company_name,
+            "status": status,
+            "dataSet": data_set,
+            "dataField": data_field,
+            "periodFrom": period_from,
+            "periodTo": period_to,
+            "fsType": fs_type,
+            "language": language,
+        }
+
+    def post(self, url, params):
+        """POST พร้อม Bearer token — โดน 401 (token ถูกยกเลิกฝั่ง server) จะขอ token ใหม่แล้วลองอีกครั้ง"""
+        for attempt in range(2):
+            headers = {"Authorization": f"Bearer {self.access_token()}"}
+            r = self.session.post(url, data=params, headers=headers, timeout=self.timeout)
+            if r.status_code == 401 and attempt == 0:
+                self.invalidate_token()
+                continue
+            r.raise_for_status()
+            return r.json()
+
+    def check_data(self, registration_id="", company_name="", **params):
+        return self.post(self.urls["check_data"], self.inquiry_params(registration_id, company_name, **params))
+
+    def check_cost(self, registration_id="", company_name="", **params):
+        return self.post(self.urls["check_cost"], self.inquiry_params(registration_id, company_name, **params))
+
+    def get_data(self, registration_id="", company_name="", **params):
+        params = self.inquiry_params(registration_id, company_name, **params)
+        if self.cache is not None and registration_id:
+            cached = self.cache.get(params)
+            if cached is not None:
+                return cached
+        response = self.post(self.urls["get_data"], params)
+        if self.cache is not None and registration_id:
+            self.cache.put(params, response)
+        return response
+
+    # ---------------- datasets ---------------- #
+
+    def _dataset_params(self, registration_id, dataset, params):
+        return self.inquiry_params(registration_id, data_field=",".join(DATASETS[dataset].fields), **params)
+
+    def cached_datasets(self, registration_id, datasets, **params):
+        """แยก dataset ที่มีใน cache แล้ว → ({name: response}, [ชื่อที่ต้องขอใหม่])"""
+        hits, missing = {}, []
+        for ds in resolve_datasets(datasets):
+            cached = None
+            if self.cache is not None:
+                cached = self.cache.get(self._dataset_params(registration_id, ds.name, params))
+            if cached is None:
+                missing.append(ds.name)
+            else:
+                hits[ds.name] = cached
+        return hits, missing
+
+    def fetch_batch(self, registration_id, batch, **params):
+        """1 request สำหรับ dataset หลายชุด (ก้อนจาก plan_batches) → {name: response} และเก็บลง cache ราย dataset"""
+        response = self.post(
+            self.urls["get_data"], self.inquiry_params(registration_id, data_field=batch_data_field(batch), **params)
+        )
+        parts = split_response(response, batch)
+        if self.cache is not None:
+            for name, part in parts.items():
+                self.cache.put(self._dataset_params(registration_id, name, params), part, self.cache.ttl_for(name))
+        return parts
+
+    def fetch_datasets(self, registration_id, datasets, max_fields=MAX_FIELDS_PER_REQUEST, **params):
+        """
+        ขอหลาย dataset ของบริษัทเดียว โดยรวม dataField เป็น request ให้น้อยที่สุด
+        คืน {dataset_name: response} (รูปเดียวกับไฟล์ตัวอย่าง เช่น tsic.json)
+        dataset ที่อยู่ใน cache และยังไม่หมดอายุไม่ถูกขอซ้ำ
+            client.fetch_datasets("0105541008416", ["profile", "tsic", "credit_score"], fs_type="2", language="en")
+        """
+        params.setdefault("period_from", "0")
+        params.setdefault("period_to", "0")
+        results, missing = self.cached_datasets(registration_id, datasets, **params)
+        for batch in plan_batches(missing, max_fields):
+            results.update(self.fetch_batch(registration_id, batch, **params))
+        return {name: results[name] for name in dict.fromkeys(datasets)}
@@ -0,0 +1,130 @@
+# services/corpusx_datasets.py
+"""
+dataset เชิงตรรกะของ CorpusX (ชุด dataField ตามไฟล์ตัวอย่าง *.json) + รวม/แยก inquiry
+
+- 1 dataField ขอได้หลายรหัส (ดู example.json) → รวมรหัสของหลาย dataset เป็น request เดียว (ไม่เกิน MAX_FIELDS_PER_REQUEST)
+- response ที่รวมมา แยกกลับเป็นราย dataset ด้วยชื่อ key ใน searchResults
+  (financial_information / financial_ratio อยู่ใน key "financial" เดียวกัน → แยกตามชื่อ field ในแต่ละปี)
+- ผลต่อ dataset มีรูปเหมือน response ที่ขอแยกทีละชุด (inquiryDetail / inquiryStatus / searchResults)
+"""
+import copy
+from dataclasses import dataclass
+from typing import Tuple
+
+# จำนวนรหัส dataField สูงสุดต่อ 1 request (financial_information.json ขอ 32 รหัสในครั้งเดียวได้)
+MAX_FIELDS_PER_REQUEST = 100
+
+# key ที่มีในทุก searchResults / ทุกปีของ financial
+RESULT_ID_KEYS = ("registrationNo", "companyName")
+FINANCIAL_ID_KEYS = ("fiscalYear", "financialDate", "fsType")
+
+
+@dataclass(frozen=True)
+class Dataset:
+    name: str
+    fields: Tuple[str, ...]                  # รหัส dataField
+    keys: Tuple[str, ...]                    # key ใน searchResults ที่เป็นของ dataset นี้
+    financial_fields: Tuple[str, ...] = ()   # ถ้า keys = ("financial",) → field ในแต่ละปีที่เป็นของ dataset นี้
+
+
+DATASETS = {d.name: d for d in (
+    Dataset(
+        "profile",
+        ("201010100", "201010200", "201010300", "201010400", "201010500", "201010600", "201010700",
+         "201010800", "201010900", "201011000", "201011100", "201020100", "201020200", "201020300",
+         "201020400", "201020500", "201020600", "201030300"),
+        ("companyStatus", "address", "telephoneNo", "registrationDate", "registeredCapital", "businessSize",
+         "companyType", "yearInBusiness", "registrationNoPrevious", "inactiveDate", "importerExporter",
+         "subDistrict", "district", "province", "region", "officialSignatory"),
+    ),
+    Dataset(
+        "tsic",
+        ("201040101", "201040102", "201040103", "201040201", "201040202", "201040203"),
+        ("tsicCode1", "tsicCode2", "tsicCode3", "naicsCode1", "naicsCode2", "naicsCode3"),
+    ),
+    Dataset("credit_score", ("201050200", "201050100"), ("fsScore", "fsClass")),
+    Dataset("directors_shareholders", ("201060100", "201070100"), ("directors", "shareholder")),
+    Dataset("credit_recommendation", ("201080100", "201080200"), ("companyCredit", "creditTerm")),
+    Dataset(
+        "financial_information",
+        ("202030101", "202030102", "202030103", "202030104", "202030105", "202030106", "202030107",
+         "202030108", "202030109", "202030110", "202030201", "202030202", "202030203", "202030204",
+         "202030205", "202030206", "202030207", "202030301", "202030302", "202030303", "202030304",
+         "202030305", "202040100", "202040200", "202040300", "202040400", "202040500", "202040600",
+         "202040700", "202040800", "202040900", "202041000"),
+        ("financial",),
+        ("totalAssets", "shortTermLoansInLiabilities", "longTermLoansInLiabilities", "retainedEarning",
+         "totalRevenue", "grossProfit", "incomeBeforeDepreciation", "incomeBeforeInterestAndIncomeTaxes",
+         "netIncome", "accountReceivable", "accountNotesReceivableNet", "inventories", "shortTermLoansAssets",
+         "totalCurrentAssets", "longTermLoansAssets", "propertyPlantEquipmentNet", "totalNonCurrentAssets",
+         "cashAndDepositsAtFinancialInstitutions", "accountsPayable", "totalCurrentLiabilities",
+         "totalNonCurrentLiabilities", "totalLiabilities", "authorizedCommonStocks", "issuedPaidUpCommonStocks",
+         "totalShareholdersEquity", "totalLiabilitiesShareholdersEquity", "netSales", "costOfSalesServices",
+         "operatingExpenses", "earningsLossPerShare", "shortTermLoan", "interestExpenses"),
+    ),
+    Dataset(
+        "financial_ratio",
+        ("202050101", "202050102", "202050201", "202050202", "202050203", "202050204", "202050205",
+         "202050206", "202050301", "202050302", "202050303", "202050304", "202050401", "202050402",
+         "202050403", "202050501", "202050502", "202050504", "202050503"),
+        ("financial",),
+        ("currentRatio", "quickRatio", "accountsReceivableTurnover", "accountsPayableTurnover",
+         "averagePaymentPeriod", "inventoryTurnover", "collectionPeriod", "daySalesInventory",
+         "grossProfitMarginPercent", "netProfitMarginPercent", "roa", "roe", "debtRatio", "debtEquityRatio",
+         "interestCoverage", "netSalesGrowthPercent", "totalRevenueGrowthPercent", "netProfitGrowthPercent",
+         "totalAssetGrowthPercent"),
+    ),
+)}
+
+
+def resolve_datasets(names):
+    unknown = [n for n in names if n not in DATASETS]
+    if unknown:
+        raise ValueError(f"ไม่รู้จัก dataset: {', '.join(unknown)} (มี {', '.join(DATASETS)})")
+    # ตัดชื่อซ้ำ คงลำดับเดิม
+    return [DATASETS[n] for n in dict.fromkeys(names)]
+
+
+def plan_batches(names, max_fields=MAX_FIELDS_PER_REQUEST):
+    """
+    จัด dataset ลง request ให้น้อยที่สุด: [[Dataset, ...], ...] แต่ละก้อนรหัสรวมไม่เกิน max_fields
+    (first-fit จากชุดใหญ่ไปเล็ก; dataset เดียวที่เกิน max_fields ได้ request ของตัวเอง ไม่ถูกหั่น)
+    """
+    batches = []
+    for ds in sorted(resolve_datasets(names), key=lambda d: -len(d.fields)):
+        for batch in batches:
+            if sum(len(d.fields) for d in batch) + len(ds.fields) <= max_fields:
+                batch.append(ds)
+                break
+        else:
+            batches.append([ds])
+    return batches
+
+
+def batch_data_field(batch):
+    return ",".join(dict.fromkeys(code for ds in batch for code in ds.fields))
+
+
+def split_response(response, batch):
+    """แยก response ของ request ที่รวมหลาย dataset → {dataset_name: response ของชุดนั้น}"""
+    out = {}
+    for ds in batch:
+        part = {k: v for k, v in response.items() if k != "searchResults"}
+        if isinstance(part.get("inquiryDetail"), dict):
+            part["inquiryDetail"] = dict(part["inquiryDetail"], dataField=",".join(ds.fields))
+        results = []
+        for result in response.get("searchResults") or []:
+            item = {k: copy.deepcopy(result[k]) for k in RESULT_ID_KEYS if k in result}
+            for key in ds.keys:
+                if key not in result:
+                    continue
+                if key == "financial" and ds.financial_fields:
+                    wanted = FINANCIAL_ID_KEYS + ds.financial_fields
+                    item[key] = [{f: year[f] for f in wanted if f in year} for year in result[key] or []]
+                else:
+                    item[key] = copy.deepcopy(result[key])
+            results.append(item)
+        if "searchResults" in response:
+            part["searchResults"] = results
+        out[ds.name] = part
+    return out
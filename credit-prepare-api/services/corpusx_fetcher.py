@@ -0,0 +1,203 @@
+# services/corpusx_fetcher.py
+"""
+ดึงข้อมูล CorpusX ของหลายบริษัทพร้อมกัน (asyncio) จากรายชื่อ registrationId เช่น juristic_ids.txt
+
+- concurrency: จำนวนบริษัทที่ทำพร้อมกัน (worker task) — รายชื่อถูกป้อนผ่าน queue จำกัดขนาด ไม่โหลดทั้งหมดไว้ก่อน
+- rps: จำกัดจำนวน request ต่อวินาทีรวมทุก worker (token bucket เดียว)
+- retry ต่อบริษัท: ลองใหม่เฉพาะ batch ที่พัง (429 / 5xx / timeout / connection) แบบ exponential backoff
+- ผลลัพธ์เขียนลง NDJSON ทีละบริษัททันทีที่เสร็จ (1 บรรทัด = 1 บริษัท) memory คงที่ไม่ขึ้นกับจำนวนบริษัท
+- รันซ้ำไฟล์เดิม: ข้ามบริษัทที่มี status=ok ในไฟล์แล้ว (ทำต่อจากที่ค้างได้)
+- ResponseCache: dataset ที่ดึงไว้แล้วและยังไม่หมดอายุไม่ขอซ้ำ (ไม่นับ rps)
+
+HTTP ใช้ CorpusXClient (sync, thread-safe, token/connection ใช้ร่วมกัน) ผ่าน asyncio.to_thread
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from services.corpusx_client import CorpusXClient, CorpusXError
+from services.corpusx_datasets import MAX_FIELDS_PER_REQUEST, plan_batches
+from services.response_cache import ResponseCache
+
+# dataset ที่ดึงต่อบริษัทโดยค่าเริ่มต้น (profile / งบ / อัตราส่วน / credit score / กรรมการ-ผู้ถือหุ้น)
+DEFAULT_DATASETS = ("profile", "financial_information", "financial_ratio", "credit_score", "directors_shareholders")
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """จำกัด request ต่อวินาทีรวมทุก task (เว้นระยะ 1/rps ต่อ request) — rps <= 0 = ไม่จำกัด"""
+
+    def __init__(self, rps):
+        self.interval = 1.0 / rps if rps and rps > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def read_ids(path):
+    """อ่าน registrationId บรรทัดละตัว (ข้ามบรรทัดว่าง / # comment / ซ้ำ) แบบ generator"""
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            s = line.strip()
+            if s and not s.startswith("#") and s not in seen:
+                seen.add(s)
+                yield s
+
+
+def done_ids(output_path):
+    """registrationId ที่ดึงสำเร็จแล้วในไฟล์ผลลัพธ์เดิม"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # บรรทัดท้ายที่เขียนไม่ครบตอนโดน kill
+            if record.get("status") == "ok":
+                done.add(record.get("registrationId"))
+    return done
+
+
+def is_retryable(error):
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRY_STATUS
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, CorpusXError))
+
+
+async def fetch_company(client, limiter, registration_id, datasets, params, retries=3, backoff=1.0,
+                        max_fields=MAX_FIELDS_PER_REQUEST):
+    """ดึงทุก dataset ของบริษัทเดียว — ตอบจาก cache ก่อน, batch ที่สำเร็จแล้วไม่ขอซ้ำตอน retry"""
+    t0 = time.perf_counter()
+    results, missing = await asyncio.to_thread(client.cached_datasets, registration_id, datasets, **params)
+    cached = len(results)
+    pending = plan_batches(missing, max_fields)
+    attempts, requests_sent, error = 0, 0, None
+    while pending and attempts <= retries:
+        if attempts:
+            await asyncio.sleep(backoff * 2 ** (attempts - 1) * (1 + random.random()))
+        attempts += 1
+        failed = []
+        for batch in pending:
+            await limiter.wait()
+            requests_sent += 1
+            try:
+                parts = await asyncio.to_thread(client.fetch_batch, registration_id, batch, **params)
+            except Exception as e:
+                if not is_retryable(e):
+                    attempts = retries + 1  # ข้อผิดพลาดที่ลองใหม่ก็ไม่หาย (เช่น 400) → เลิกเลย
+                failed.append(batch)
+                error = f"{type(e).__name__}: {e}"
+                continue
+            results.update(parts)
+        pending = failed
+
+    return {
+        "registrationId": registration_id,
+        "status": "error" if pending else "ok",
+        "attempts": attempts,
+        "requests": requests_sent,
+        "cached": cached,
+        "seconds": round(time.perf_counter() - t0, 3),
+        "datasets": {name: results[name] for name in datasets if name in results},
+        "error": error if pending else None,
+    }
+
+
+async def fetch_companies(ids, output_path, client, datasets=DEFAULT_DATASETS, concurrency=8, rps=5.0,
+                          retries=3, max_fields=MAX_FIELDS_PER_REQUEST, skip=(), **params):
+    """
+    ids: iterable ของ registrationId (อ่านทีละตัว) → ต่อท้าย output_path (NDJSON)
+    คืนสถิติ {ok, failed, skipped, requests, seconds}
+    """
+    params.setdefault("period_from", "0")
+    params.setdefault("period_to", "0")
+    datasets = list(dict.fromkeys(datasets))
+    limiter = RateLimiter(rps)
+    in_q = asyncio.Queue(maxsize=concurrency * 2)
+    out_q = asyncio.Queue(maxsize=concurrency * 2)
+    stats = {"ok": 0, "failed": 0, "skipped": 0, "requests": 0, "cached": 0}
+    t0 = time.perf_counter()
+
+    async def producer():
+        for registration_id in ids:
+            if registration_id in skip:
+                stats["skipped"] += 1
+                continue
+            await in_q.put(registration_id)
+        for _ in range(concurrency):
+            await in_q.put(None)
+
+    async def worker():
+        while True:
+            registration_id = await in_q.get()
+            if registration_id is None:
+                return
+            await out_q.put(await fetch_company(
+                client, limiter, registration_id, datasets, params, retries, max_fields=max_fields
+            ))
+
+    async def writer():
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with open(output_path, "a", encoding="utf-8") as f:
+            while True:
+                record = await out_q.get()
+                if record is None:
+                    return
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                stats["ok" if record["status"] == "ok" else "failed"] += 1
+                stats["requests"] += record["requests"]
+                stats["cached"] += record["cached"]
+                done = stats["ok"] + stats["failed"]
+                mark = "✔" if record["status"] == "ok" else "❌"
+                note = f" {record['error']}" if record["error"] else ""
+                print(f"[{done}] {mark} {record['registrationId']} "
+                      f"({record['requests']} req, {record['cached']} cached, {record['seconds']:.2f}s){note}")
+
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    writer_task = asyncio.create_task(writer())
+    await asyncio.gather(producer(), *(worker() for _ in range(concurrency)))
+    await out_q.put(None)
+    await writer_task
+    stats["seconds"] = round(time.perf_counter() - t0, 3)
+    return stats
+
+
+def run_fetch(ids_file, output_path, datasets=DEFAULT_DATASETS, concurrency=8, rps=5.0, retries=3,
+              force=False, client=None, cache_path=None, **params):
+    """
+    เวอร์ชัน sync สำหรับสคริปต์ / CLI
+    cache_path: ไฟล์ ResponseCache (None = ไม่ใช้ cache) — ใช้เมื่อสร้าง client เองเท่านั้น
+    """
+    skip = set() if force else done_ids(output_path)
+    own_client = client is None
+    if own_client:
+        cache = ResponseCache(cache_path) if cache_path else None
+        client = CorpusXClient(pool_size=concurrency, cache=cache)
+    try:
+        return asyncio.run(fetch_companies(
+            read_ids(ids_file), output_path, client, datasets, concurrency, rps, retries, skip=skip, **params
+        ))
+    finally:
+        if own_client:
+            client.close()
+            if client.cache is not None:
+                client.cache.close()
@@ -0,0 +1,252 @@
+# services/corpusx_tables.py
+"""
+แปลง searchResults ของ CorpusX (ซ้อนหลายชั้น) เป็นตารางแบน มีชนิดข้อมูลชัดเจน
+
+    tables = flatten_responses(iter_responses(["example.json", "processed_data/corpusx.ndjson"]))
+    write_tables(tables)   # processed_data/parquet/corpusx/*.parquet + processed_data/statements.sqlite (corpusx_*)
+
+ตาราง (key = registration_no [+ year เป็น ค.ศ.]):
+    companies        1 แถว/บริษัท (profile)
+    financial_lines  ตารางยาว registration_no, year, item, amount (งบจาก financial_information)
+    ratios           1 แถว/บริษัท/ปี (financial_ratio)
+    directors        registration_no, no, name
+    shareholders     registration_no, meeting_date, no, name, nationality, percent_share, no_of_share, baht_share
+    tsic             registration_no, scheme (tsic/naics), rank, code, description
+    scores           fs_score / fs_class / company_credit / credit_term
+วันที่ พ.ศ. (dd/mm/2567) → YYYY-MM-DD ค.ศ.; ตัวเลขที่เป็น string ("2,000.00", "") → float / NaN
+"""
+import json
+import os
+import re
+import sqlite3
+
+import pandas as pd
+
+from services.columnar_store import PARQUET_ROOT, write_table
+from services.statement_index import INDEX_PATH
+from services.corpusx_datasets import DATASETS
+
+PARQUET_DATASET = "corpusx"
+TABLE_PREFIX = "corpusx_"
+
+FINANCIAL_FIELDS = DATASETS["financial_information"].financial_fields
+RATIO_FIELDS = DATASETS["financial_ratio"].financial_fields
+PROFILE_FIELDS = DATASETS["profile"].keys
+
+# คอลัมน์ตัวเลข / วันที่ของ companies (นอกนั้นเป็น string)
+PROFILE_NUMBERS = ("registeredCapital", "yearInBusiness")
+PROFILE_DATES = ("registrationDate", "inactiveDate")
+
+TABLE_KEYS = {
+    "companies": ("registration_no",),
+    "financial_lines": ("registration_no", "year", "item"),
+    "ratios": ("registration_no", "year"),
+    "directors": ("registration_no", "no"),
+    "shareholders": ("registration_no", "no"),
+    "tsic": ("registration_no", "scheme", "rank"),
+    "scores": ("registration_no",),
+}
+
+
+def snake(name):
+    # totalAssets → total_assets, roa → roa
+    return re.sub(r"(?<=[a-z0-9])([A-Z])", r"_\1", name).lower()
+
+
+def to_number(value):
+    if value is None:
+        return float("nan")
+    s = str(value).replace(",", "").strip()
+    try:
+        return float(s) if s else float("nan")
+    except ValueError:
+        return float("nan")
+
+
+def _int(value):
+    n = to_number(value)
+    return 0 if pd.isna(n) else int(n)
+
+
+def th_date(value):
+    """'31/12/2567' → '2024-12-31' (ค่าว่าง/อ่านไม่ได้ → None)"""
+    m = re.match(r"^\s*(\d{1,2})/(\d{1,2})/(\d{4})\s*$", str(value or ""))
+    if not m:
+        return None
+    d, mth, y = (int(x) for x in m.groups())
+    if y > 2400:
+        y -= 543
+    return f"{y:04d}-{mth:02d}-{d:02d}"
+
+
+def ce_year(fiscal_year):
+    """'2567' → 2024 (ปี ค.ศ. แบบเดียวกับงบ DBD ใน statements.sqlite)"""
+    y = to_number(fiscal_year)
+    if pd.isna(y):
+        return None
+    y = int(y)
+    return y - 543 if y > 2400 else y
+
+
+def number_range(value):
+    """'3,666,054.50 - 4,888,072.50' → (3666054.5, 4888072.5); '45' → (45.0, 45.0)"""
+    parts = [to_number(p) for p in str(value or "").split(" - ")]
+    if not parts or all(pd.isna(p) for p in parts):
+        return float("nan"), float("nan")
+    return parts[0], parts[-1]
+
+
+# ---------------- อ่าน response ---------------- #
+
+def iter_responses(paths):
+    """
+    รับได้ทั้งไฟล์ response เดียว (*.json เช่น tsic.json) และผลของ script_fetch_corpusx.py (*.ndjson)
+    yield response dict ทีละตัว
+    """
+    for path in paths:
+        if str(path).endswith(".ndjson"):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    yield from (record.get("datasets") or {}).values()
+        else:
+            with open(path, encoding="utf-8") as f:
+                yield json.load(f)
+
+
+# ---------------- flatten ---------------- #
+
+def _year_keys(reg_no, year_rec):
+    return {
+        "registration_no": reg_no,
+        "year": ce_year(year_rec.get("fiscalYear")),
+        "financial_date": th_date(year_rec.get("financialDate")),
+        "fs_type": year_rec.get("fsType"),
+    }
+
+
+def flatten_result(result, rows):
+    """searchResults[i] 1 ตัว → เติมแถวลง rows[table]"""
+    reg_no = str(result.get("registrationNo") or "")
+    if not reg_no:
+        return
+
+    if any(k in result for k in PROFILE_FIELDS):
+        row = {"registration_no": reg_no, "company_name": result.get("companyName")}
+        for key in PROFILE_FIELDS:
+            if key in PROFILE_NUMBERS:
+                row[snake(key)] = to_number(result.get(key))
+            elif key in PROFILE_DATES:
+                row[snake(key)] = th_date(result.get(key))
+            else:
+                row[snake(key)] = result.get(key)
+        rows["companies"].append(row)
+
+    for year_rec in result.get("financial") or []:
+        keys = _year_keys(reg_no, year_rec)
+        if keys["year"] is None:
+            continue
+        for field in FINANCIAL_FIELDS:
+            if field in year_rec:
+                rows["financial_lines"].append(dict(keys, item=snake(field), amount=to_number(year_rec[field])))
+        if any(f in year_rec for f in RATIO_FIELDS):
+            rows["ratios"].append(dict(keys, **{snake(f): to_number(year_rec.get(f)) for f in RATIO_FIELDS}))
+
+    for d in result.get("directors") or []:
+        rows["directors"].append({"registration_no": reg_no, "no": _int(d.get("no")), "name": d.get("name")})
+
+    holder = result.get("shareholder") or {}
+    meeting_date = th_date(holder.get("meetingDate"))
+    for s in holder.get("shareholders") or []:
+        rows["shareholders"].append({
+            "registration_no": reg_no,
+            "meeting_date": meeting_date,
+            "no": _int(s.get("no")),
+            "name": s.get("name"),
+            "nationality": s.get("nationality"),
+            "percent_share": to_number(s.get("percentShare")),
+            "no_of_share": to_number(s.get("noOfShare")),
+            "baht_share": to_number(s.get("bahtShare")),
+        })
+
+    for scheme in ("tsic", "naics"):
+        for rank in (1, 2, 3):
+            code = result.get(f"{scheme}Code{rank}") or {}
+            if code.get("code"):
+                rows["tsic"].append({
+                    "registration_no": reg_no, "scheme": scheme, "rank": rank,
+                    "code": str(code["code"]), "description": code.get("description"),
+                })
+
+    if any(k in result for k in ("fsScore", "fsClass", "companyCredit", "creditTerm")):
+        fs_class = result.get("fsClass") or {}
+        credit_low, credit_high = number_range(result.get("companyCredit"))
+        term_low, term_high = number_range(result.get("creditTerm"))
+        rows["scores"].append({
+            "registration_no": reg_no,
+            "fs_score": to_number(result.get("fsScore")),
+            "fs_class_code": fs_class.get("code"),
+            "fs_class_description": fs_class.get("description"),
+            "company_credit_low": credit_low,
+            "company_credit_high": credit_high,
+            "credit_term_low": term_low,
+            "credit_term_high": term_high,
+        })
+
+
+def flatten_responses(responses):
+    """
+    responses: iterable ของ response CorpusX → {ชื่อตาราง: DataFrame}
+    บริษัทเดียวกันมาหลาย response (เช่นแยกตาม dataset) รวมกันได้: แถว key ซ้ำเก็บตัวล่าสุด
+    scores ที่มาจากคนละ response (credit_score / credit_recommendation) รวมเป็นแถวเดียว
+    """
+    rows = {name: [] for name in TABLE_KEYS}
+    for response in responses:
+        for result in (response or {}).get("searchResults") or []:
+            flatten_result(result, rows)
+
+    tables = {}
+    for name, keys in TABLE_KEYS.items():
+        df = pd.DataFrame(rows[name])
+        if df.empty:
+            tables[name] = df
+            continue
+        if name == "scores":
+            # แต่ละ response มีแค่บางคอลัมน์ → เอาค่าล่าสุดที่ไม่ว่างของแต่ละคอลัมน์
+            df = df.groupby("registration_no", as_index=False, sort=False).last()
+        df = df.drop_duplicates(list(keys), keep="last").reset_index(drop=True)
+        if "year" in df.columns:
+            df["year"] = df["year"].astype("int64")
+        tables[name] = df
+    return tables
+
+
+# ---------------- เขียน ---------------- #
+
+def write_tables(tables, parquet_root=PARQUET_ROOT, sqlite_path=INDEX_PATH):
+    """เขียนทุกตารางเป็น Parquet (<root>/corpusx/<name>.parquet) และ/หรือ SQLite (ตาราง corpusx_<name>)"""
+    written = {}
+    if parquet_root:
+        for name, df in tables.items():
+            if not df.empty:
+                written[f"parquet:{name}"] = write_table(df, PARQUET_DATASET, name, root=parquet_root)
+    if sqlite_path:
+        os.makedirs(os.path.dirname(sqlite_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(sqlite_path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                for name, df in tables.items():
+                    if df.empty:
+                        continue
+                    table = TABLE_PREFIX + name
+                    df.to_sql(table, conn, if_exists="replace", index=False)
+                    cols = ", ".join(c for c in TABLE_KEYS[name] if c in df.columns)
+                    conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{table}" ON "{table}" ({cols})')
+                    written[f"sqlite:{name}"] = f"{sqlite_path}#{table}"
+        finally:
+            conn.close()
+    return written
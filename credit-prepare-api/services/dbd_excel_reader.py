@@ -0,0 +1,122 @@
+# services/dbd_excel_reader.py
+"""
+ตัวอ่านไฟล์ Excel ของ DBD (*_balance / *_income / *_ratios) แบบเลือก engine ครั้งเดียว
+
+- ดู content signature (magic bytes) ของไฟล์ แล้วเลือก engine ตามชนิดจริง ไม่ใช่ตามนามสกุล
+    PK\\x03\\x04      -> xlsx  (calamine → openpyxl)
+    D0 CF 11 E0     -> xls   (calamine → xlrd)
+    <html / <table  -> html  (read_html)   # DBD บางครั้งส่ง HTML มาในชื่อ .xls
+- ใช้ calamine เป็นหลักถ้าติดตั้ง pandas-calamine ไว้ (เร็วที่สุด อ่านได้ทั้ง xls/xlsx)
+- จำ engine ที่อ่านสำเร็จไว้ต่อชนิดไฟล์ (_ENGINE_BY_KIND) ไฟล์ถัดไปชนิดเดียวกันจะลอง engine นั้นก่อน
+  จึงไม่ต้อง parse ไฟล์ซ้ำหลายรอบกว่าจะเจอ engine ที่ใช้ได้
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import time
+import warnings
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+XLSX_SIG = b"PK\x03\x04"
+XLS_SIG = b"\xD0\xCF\x11\xE0"
+
+# engine -> module ที่ต้องติดตั้ง (เช็คครั้งเดียวด้วย find_spec)
+_ENGINE_MODULES = {
+    "calamine": "python_calamine",
+    "openpyxl": "openpyxl",
+    "xlrd": "xlrd",       # ต้อง xlrd<2.0 สำหรับ .xls
+    "html": "lxml",
+}
+
+# ลำดับ engine ต่อชนิดไฟล์ (calamine มาก่อนเสมอ)
+_ENGINE_ORDER: Dict[str, List[str]] = {
+    "xlsx": ["calamine", "openpyxl"],
+    "xls": ["calamine", "xlrd"],
+    "html": ["html"],
+    "unknown": ["calamine", "openpyxl", "xlrd", "html"],
+}
+
+# cache: ชนิดไฟล์ -> engine ที่อ่านสำเร็จล่าสุด
+_ENGINE_BY_KIND: Dict[str, str] = {}
+_AVAILABLE: Dict[str, bool] = {}
+
+
+def _log(debug: bool, *args):
+    if debug:
+        print(*args)
+
+
+def _engine_available(engine: str) -> bool:
+    if engine not in _AVAILABLE:
+        mod = _ENGINE_MODULES.get(engine)
+        _AVAILABLE[engine] = mod is None or importlib.util.find_spec(mod) is not None
+    return _AVAILABLE[engine]
+
+
+def sniff_kind(path: Path) -> str:
+    """ดูชนิดไฟล์จาก 512 ไบต์แรก: xlsx / xls / html / unknown"""
+    with open(path, "rb") as f:
+        head = f.read(512)
+    if head.startswith(XLSX_SIG):
+        return "xlsx"
+    if head.startswith(XLS_SIG):
+        return "xls"
+    probe = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if probe.startswith(b"<") and (b"<html" in probe or b"<table" in probe or b"<!doctype" in probe or b"<?xml" in probe):
+        return "html"
+    return "unknown"
+
+
+def engine_plan(kind: str) -> List[str]:
+    """ลำดับ engine ที่จะลอง — engine ที่เคยสำเร็จกับชนิดนี้ขึ้นก่อน และตัดตัวที่ไม่ได้ติดตั้งออก"""
+    order = list(_ENGINE_ORDER.get(kind, _ENGINE_ORDER["unknown"]))
+    cached = _ENGINE_BY_KIND.get(kind)
+    if cached in order:
+        order.remove(cached)
+        order.insert(0, cached)
+    return [e for e in order if _engine_available(e)]
+
+
+def _read_with(engine: str, path: Path, sheet_name) -> pd.DataFrame:
+    if engine == "html":
+        tables = pd.read_html(path, header=None)
+        if not tables:
+            raise ValueError("no <table> found")
+        return tables[0]
+    df = pd.read_excel(path, engine=engine, header=None, sheet_name=sheet_name)
+    if isinstance(df, dict):
+        df = next(iter(df.values()))
+    return df
+
+
+def read_dbd_table(path: Path, sheet: Optional[str] = None, debug: bool = False) -> Tuple[pd.DataFrame, str, float]:
+    """
+    อ่านไฟล์ DBD เป็น DataFrame ดิบ (header=None)
+    คืนค่า (df, engine ที่ใช้, เวลา parse เป็นวินาที)
+    """
+    kind = sniff_kind(path)
+    sheet_name = 0 if (sheet is None or str(sheet).strip() == "") else sheet
+    plan = engine_plan(kind)
+    _log(debug, f"  ↪ sniffed kind: {kind} for {path.name}; plan={plan}")
+
+    tried = []
+    t0 = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for engine in plan:
+            try:
+                df = _read_with(engine, path, sheet_name)
+            except Exception as e:
+                tried.append((engine, str(e)))
+                _log(debug, f"  ⚠ failed read with {engine}: {e}")
+                continue
+            _ENGINE_BY_KIND[kind] = engine
+            elapsed = time.perf_counter() - t0
+            _log(debug, f"  ✔ read with {engine}: shape={df.shape}")
+            return df, engine, elapsed
+
+    raise RuntimeError(f"Cannot read Excel file: {path.name}; kind={kind}; tried={tried}")
@@ -0,0 +1,83 @@
+# services/encoding_sniffer.py
+import codecs
+
+import pandas as pd
+
+# อ่านแค่ต้นไฟล์พอให้เห็นภาษาไทยแถวแรก ๆ (ไม่ต้อง decode ทั้งไฟล์)
+SNIFF_BYTES = 64 * 1024
+
+# ลำดับที่ลอง: utf-8 → cp874 (Thai Windows, ครอบ tis-620) → latin1 (decode ได้ทุก byte เป็นตัวสุดท้าย)
+THAI_ENCODINGS = ("utf-8", "cp874", "latin1")
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def sniff_encoding(path, candidates=THAI_ENCODINGS, nbytes=SNIFF_BYTES):
+    """
+    เดา encoding จาก BOM หรือ prefix ของไฟล์ — อ่านไฟล์แค่ nbytes ไม่ parse CSV
+    คืน encoding ตัวแรกใน candidates ที่ decode prefix ได้ (ไม่เจอเลยคืนตัวสุดท้าย)
+    """
+    with open(path, "rb") as f:
+        head = f.read(nbytes)
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    for encoding in candidates:
+        try:
+            # final=False: ตัวอักษรหลาย byte ที่ถูกตัดตรงท้าย prefix ไม่นับว่า error
+            codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return candidates[-1]
+
+
+def _fallbacks(encoding, candidates):
+    return list(candidates[candidates.index(encoding) + 1:]) if encoding in candidates else []
+
+
+def read_csv_sniffed(path, candidates=THAI_ENCODINGS, **kwargs):
+    """
+    pd.read_csv ครั้งเดียวด้วย encoding ที่ sniff ได้ คืน (df, encoding)
+    ถ้าไฟล์ decode พังหลัง prefix (เช่นต้นไฟล์เป็น ASCII ล้วน) ค่อยลอง encoding ถัดไป
+    """
+    encoding = sniff_encoding(path, candidates)
+    error = None
+    for enc in [encoding] + _fallbacks(encoding, candidates):
+        try:
+            return pd.read_csv(path, encoding=enc, **kwargs), enc
+        except UnicodeDecodeError as e:
+            error = e
+    raise error
+
+
+def iter_csv_sniffed(path, candidates=THAI_ENCODINGS, encoding=None, **kwargs):
+    """
+    pd.read_csv(chunksize=...) ด้วย encoding ที่ sniff จาก prefix — parse ไฟล์รอบเดียวในกรณีปกติ
+    ถ้า decode พังกลางไฟล์ (เช่น 64KB แรกเป็น ASCII ล้วนแต่ท้ายไฟล์เป็น cp874) หลัง yield chunk ไปแล้ว:
+    เปิดใหม่ด้วย encoding ถัดไปแล้วข้ามแถวที่ yield ไปแล้ว (ส่วนที่ decode ผ่านแล้วเป็น ASCII ในกรณีนี้ ค่าเหมือนกัน)
+    encoding: ใช้ค่าที่ sniff ไว้แล้วได้ (ไม่ต้องอ่าน prefix ซ้ำ)
+    """
+    encoding = encoding or sniff_encoding(path, candidates)
+    order = [encoding] + _fallbacks(encoding, candidates)
+    done = 0
+    for i, enc in enumerate(order):
+        try:
+            with pd.read_csv(path, encoding=enc, **kwargs) as reader:
+                skip = done
+                for chunk in reader:
+                    if skip:
+                        if len(chunk) <= skip:
+                            skip -= len(chunk)
+                            continue
+                        chunk, skip = chunk.iloc[skip:], 0
+                    yield chunk
+                    done += len(chunk)
+            return
+        except UnicodeDecodeError:
+            if i == len(order) - 1:
+                raise
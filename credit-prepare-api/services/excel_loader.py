@@ -0,0 +1,85 @@
+# services/excel_loader.py
+import multiprocessing
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from services.dbd_excel_reader import engine_plan, sniff_kind
+
+# workbook ที่มีชีตน้อยกว่านี้อ่านใน process เดียว (ค่า spawn process ไม่คุ้ม)
+PARALLEL_MIN_SHEETS = 2
+
+
+def excel_engine(path):
+    """เลือก engine จากชนิดไฟล์จริง (calamine ก่อนถ้าติดตั้ง) — None = ให้ pandas เลือกเอง"""
+    kind = sniff_kind(Path(path))
+    plan = [e for e in engine_plan(kind) if e != "html"]
+    return plan[0] if plan else None
+
+
+def default_workers():
+    # อยู่ใน worker process อยู่แล้ว (batch_runner / statement_pool) → อ่านใน process เดียว ไม่ซ้อน pool
+    if multiprocessing.parent_process() is not None:
+        return 1
+    return os.cpu_count() or 1
+
+
+def _parse_sheets(path, sheets, engine, wanted):
+    # เปิด workbook ครั้งเดียวต่อ worker แล้ว parse ชีตที่ได้รับมอบหมาย
+    usecols = (lambda col: col in wanted) if wanted is not None else None
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        with pd.ExcelFile(path, engine=engine) as xls:
+            sheets = xls.sheet_names if sheets is None else sheets
+            return [(sheet, xls.parse(sheet, usecols=usecols)) for sheet in sheets]
+
+
+def read_excel_sheets(path, wanted=None, workers=None):
+    """
+    อ่านทุกชีตของ workbook คืน [(sheet_name, df), ...] ตามลำดับชีต
+    - wanted: ชุดชื่อหัวคอลัมน์ที่ต้องการ (usecols) คอลัมน์อื่นไม่ถูกสร้างเป็น DataFrame
+    - หลายชีต + หลาย core: แบ่งชีตให้ ProcessPoolExecutor (แต่ละ worker เปิดไฟล์ครั้งเดียว)
+      workers=None ใน worker process (เช่นไฟล์ละ process ของ batch_runner) = 1 — ไม่สร้าง pool ซ้อน
+    """
+    engine = excel_engine(path)
+    workers = workers or default_workers()
+    if workers < 2:
+        return _parse_sheets(path, None, engine, wanted)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        with pd.ExcelFile(path, engine=engine) as xls:
+            sheets = list(xls.sheet_names)
+    workers = min(workers, len(sheets))
+    if len(sheets) < PARALLEL_MIN_SHEETS or workers < 2:
+        return _parse_sheets(path, sheets, engine, wanted)
+
+    groups = [sheets[i::workers] for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parsed = dict(
+            item
+            for result in pool.map(_parse_sheets, [path] * workers, groups, [engine] * workers, [wanted] * workers)
+            for item in result
+        )
+    return [(sheet, parsed[sheet]) for sheet in sheets]
+
+
+def load_excel_sheets(path, wanted=None, workers=None, debug=False):
+    """
+    เหมือน loop เดิม (ExcelFile → parse ทุกชีต → ข้ามชีตว่าง → เติม source_sheet)
+    แต่อ่านเฉพาะคอลัมน์ที่ต้องการและ parse หลายชีตพร้อมกัน คืน list ของ DataFrame
+    """
+    t0 = time.perf_counter()
+    frames = []
+    for sheet, df in read_excel_sheets(path, wanted, workers):
+        if not df.isnull().all().all():
+            df["source_sheet"] = sheet
+            frames.append(df)
+    if debug:
+        print(f"  ↪ read {len(frames)} sheet(s) from {os.path.basename(str(path))} "
+              f"with {excel_engine(path) or 'default'} in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    return frames
@@ -0,0 +1,171 @@
+# services/feed_schema.py
+"""
+schema ของแต่ละ feed (invoice / po / supplier) แบบประกาศครั้งเดียว
+
+    INVOICE_SCHEMA = FeedSchema("invoice", (
+        Column("invoice_no", ("Invoice No.", "# Invoice No."), as_text),
+        Column("amount_excl_vat", ("Invoice Amount (Exclude VAT)", ...), as_amount()),
+        ...
+    ))
+
+- schema.plan(header) คอมไพล์หัวคอลัมน์ดิบ → HeaderPlan (usecols / dtype / converters)
+  แล้ว cache ไว้ต่อ (schema, header) ไฟล์/chunk ถัดไปที่หัวคอลัมน์เหมือนกันไม่ต้อง resolve ใหม่
+- plan.apply(df) สร้าง DataFrame ผลลัพธ์ในรอบเดียว: เลือกคอลัมน์ + เปลี่ยนชื่อ + แปลงชนิด
+- schema.iter_csv(path, ...) อ่าน CSV ทีละ chunk รอบเดียว เฉพาะคอลัมน์ใน schema ด้วย dtype ที่ประกาศใน Column
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from services.encoding_sniffer import THAI_ENCODINGS, iter_csv_sniffed, sniff_encoding
+from services.numeric_cleaner import clean_numeric_series
+
+Converter = Callable[[pd.Series], pd.Series]
+
+
+# ---------------- converters (ทั้งคอลัมน์) ---------------- #
+
+def as_text(s):
+    # เลขที่เอกสาร / รหัส เป็น string เหมือน loader เดิม: ค่าตามชนิดที่ read_csv อนุมาน (00123 → "123",
+    # คอลัมน์ตัวเลขที่มีค่าว่าง → "4500.0") ค่าว่างเป็น "" (pandas 2 astype(str) ให้ "nan" ก่อน fillna)
+    return s.astype(str).fillna("")
+
+
+def as_amount(na_value=0.0):
+    def convert(s):
+        return clean_numeric_series(s, na_value=na_value)
+    return convert
+
+
+def as_date(parser, fmt="%Y-%m-%d", vectorized=False):
+    """
+    parser → datetime → string ตาม fmt
+    vectorized=False: parser ทีละค่า (เช่น fix_buddhist_year) / True: parser รับทั้งคอลัมน์ (เช่น normalize_th_dates)
+    """
+    def convert(s):
+        parsed = pd.to_datetime(parser(s) if vectorized else s.map(parser), errors="coerce")
+        return parsed.dt.strftime(fmt)
+    return convert
+
+
+def as_mapped(func):
+    def convert(s):
+        return s.map(func)
+    return convert
+
+
+# ---------------- schema ---------------- #
+
+@dataclass(frozen=True)
+class Column:
+    name: str                          # ชื่อคอลัมน์ผลลัพธ์
+    aliases: Tuple[str, ...] = ()      # หัวคอลัมน์ดิบที่ map มาเป็น name (name เองก็ยอมรับเสมอ)
+    convert: Optional[Converter] = None
+    dtype: Optional[str] = None        # dtype ตอนอ่าน CSV (None = ให้ pandas อนุมานต่อ chunk)
+
+
+@dataclass(frozen=True)
+class HeaderPlan:
+    usecols: Optional[Tuple[int, ...]]            # ตำแหน่งคอลัมน์ดิบที่ต้องอ่าน (None = ทุกคอลัมน์)
+    dtype: Dict[str, str]                         # หัวดิบ → dtype ตอนอ่าน (read_csv) ของ Column ที่ประกาศไว้
+    output: Tuple[Tuple[int, str, Optional[Converter]], ...]   # (ตำแหน่งใน header, ชื่อผลลัพธ์, converter)
+
+    def apply(self, df):
+        """df ต้องมีหัวคอลัมน์ตาม header ที่ใช้ compile plan นี้"""
+        if self.usecols is None:
+            return df
+        data = {}
+        for pos, name, convert in self.output:
+            col = df.iloc[:, pos]
+            data[name] = convert(col) if convert is not None else col
+        return pd.DataFrame(data, index=df.index)
+
+
+@dataclass(frozen=True)
+class FeedSchema:
+    name: str
+    columns: Tuple[Column, ...]
+    reorder: bool = True      # True = เรียงตาม schema / False = คงลำดับตามไฟล์
+    rename_map: Dict[str, str] = field(init=False, compare=False, hash=False, repr=False)
+
+    def __post_init__(self):
+        rename_map = {}
+        for column in self.columns:
+            for alias in column.aliases:
+                rename_map.setdefault(alias, column.name)
+        object.__setattr__(self, "rename_map", rename_map)
+
+    @property
+    def names(self):
+        return [c.name for c in self.columns]
+
+    @property
+    def wanted(self):
+        """ชุดหัวคอลัมน์ดิบที่ schema รู้จัก (ใช้เป็น usecols ของ read_excel)"""
+        return frozenset(self.rename_map) | frozenset(self.names)
+
+    def rename(self, df):
+        return df.rename(columns={col: self.rename_map.get(col, col) for col in df.columns})
+
+    def plan(self, header):
+        return _compile(self, tuple(header))
+
+    def apply(self, df):
+        return self.plan(df.columns).apply(df)
+
+    def iter_csv(self, path, chunksize, candidates=THAI_ENCODINGS):
+        """
+        read_csv ทีละ chunk (ยังไม่ apply) รอบเดียว: เฉพาะคอลัมน์ที่ schema ใช้ (usecols ตามตำแหน่ง)
+        ด้วย dtype ของแต่ละ Column (plan.dtype) ไม่มีรอบอนุมานชนิดล่วงหน้า
+        encoding sniff จาก prefix — decode พังกลางไฟล์ค่อยเปลี่ยน encoding ต่อจากแถวที่ค้าง (iter_csv_sniffed)
+        chunk ที่ว่างทั้งก้อนถูกพักไว้จนเจอ chunk ที่มีข้อมูล — ไฟล์ที่ว่างทั้งไฟล์จึงไม่ได้ chunk เลย
+        (แบบ df.isnull().all().all() ของ loader เดิม แต่ดูเฉพาะคอลัมน์ใน schema)
+        """
+        encoding = sniff_encoding(path, candidates)
+        header = list(pd.read_csv(path, nrows=0, encoding=encoding).columns)
+        plan = self.plan(header)
+        pending = []
+        for chunk in iter_csv_sniffed(
+            path,
+            candidates,
+            encoding=encoding,
+            # ใช้ตำแหน่งคอลัมน์ (หัวคอลัมน์ซ้ำ pandas จะเติม .1 ให้ อ้างด้วยชื่อไม่ได้)
+            usecols=list(plan.usecols) if plan.usecols is not None else None,
+            dtype=plan.dtype or None,
+            chunksize=chunksize,
+        ):
+            if chunk.isnull().all().all():
+                pending.append(chunk)
+                continue
+            yield from pending
+            pending.clear()
+            yield chunk
+
+
+@lru_cache(maxsize=256)
+def _compile(schema, header):
+    by_name = {c.name: c for c in schema.columns}
+    resolved = {}
+    for pos, raw in enumerate(header):
+        name = schema.rename_map.get(raw, raw)
+        if name in by_name and name not in resolved:
+            resolved[name] = (pos, raw)
+
+    if not resolved:
+        # ไม่เจอคอลัมน์ที่รู้จักเลย → คืนทุกคอลัมน์ตามเดิม
+        return HeaderPlan(usecols=None, dtype={}, output=())
+
+    order = schema.names if schema.reorder else sorted(resolved, key=lambda n: resolved[n][0])
+    output = tuple(
+        (resolved[name][0], name, by_name[name].convert)
+        for name in order
+        if name in resolved
+    )
+    return HeaderPlan(
+        usecols=tuple(sorted(pos for pos, _ in resolved.values())),
+        dtype={raw: by_name[name].dtype for name, (_, raw) in resolved.items() if by_name[name].dtype is not None},
+        output=output,
+    )
@@ -2,8 +2,15 @@ import os
 import pandas as pd
 import re
 
+from services.columnar_store import parquet_enabled, write_partitioned
+from services.encoding_sniffer import read_csv_sniffed
+from services.ratio_engine import process_ratios
+from services.stage_metrics import METRICS
+from services.statement_index import write_statement_index
+
 RAW_DATA_FOLDER = "./raw_data/ic"
 PROCESSED_DATA_FOLDER = "./processed_data"
+BOL_ENCODINGS = ("utf-8", "cp1252", "latin1")
 OUTPUT_CSV_PATH = os.path.join(PROCESSED_DATA_FOLDER, "ic_all_processed_data.csv")
 
 IC_HEADERS = [
@@ -23,11 +30,13 @@ IC_HEADERS = [
     "Basic earnings (loss) per share",
 ]
 
-def process_ic_statements():
+def process_ic_statements(formats=("csv",)):
     os.makedirs(PROCESSED_DATA_FOLDER, exist_ok=True)
     processed_df = pd.DataFrame(columns=["company_id", "company_name", "year"] + IC_HEADERS)
 
-    files = [f for f in os.listdir(RAW_DATA_FOLDER) if f.endswith(".csv")]
+    with METRICS.stage("ic", "file_discovery") as t:
+        files = [f for f in os.listdir(RAW_DATA_FOLDER) if f.endswith(".csv")]
+        t.add(rows=len(files))
 
     for file in files:
         if not file.startswith("IC_"):
@@ -39,40 +48,56 @@ def process_ic_statements():
 
         input_csv_path = os.path.join(RAW_DATA_FOLDER, file)
 
-        try:
-            df = pd.read_csv(input_csv_path, encoding='latin1', header=None)
-        except UnicodeDecodeError:
-            df = pd.read_csv(input_csv_path, encoding='cp1252', header=None)
+        # sniff encoding จากต้นไฟล์แล้วอ่านครั้งเดียว (latin1 decode ได้ทุก byte จึงเป็นตัวสุดท้าย)
+        with METRICS.stage("ic", "csv_parse") as t:
+            df, _ = read_csv_sniffed(input_csv_path, candidates=BOL_ENCODINGS, header=None)
+            t.add(rows=len(df), bytes=os.path.getsize(input_csv_path))
 
-        years_from_header = []
-        for col_index in range(3, df.shape[1]):
-            year_str = df.iloc[0, col_index]
-            year_match = re.search(r'\d{4}', str(year_str))
-            if year_match:
-                years_from_header.append(year_match.group(0))
+        with METRICS.stage("ic", "numeric_coercion") as t:
+            years_from_header = []
+            for col_index in range(3, df.shape[1]):
+                year_str = df.iloc[0, col_index]
+                year_match = re.search(r'\d{4}', str(year_str))
+                if year_match:
+                    years_from_header.append(year_match.group(0))
 
-        for i, current_year in enumerate(years_from_header):
-            row_data = {
-                "company_id": company_id,
-                "company_name": company_name,
-                "year": current_year
-            }
+            for i, current_year in enumerate(years_from_header):
+                row_data = {
+                    "company_id": company_id,
+                    "company_name": company_name,
+                    "year": current_year
+                }
 
-            values = df.iloc[3:3 + len(IC_HEADERS), 3 + i].tolist()
+                values = df.iloc[3:3 + len(IC_HEADERS), 3 + i].tolist()
 
-            for j, header in enumerate(IC_HEADERS):
-                value = values[j] if j < len(values) else None
-                try:
-                    numeric_value = pd.to_numeric(value, errors='coerce')
-                    if pd.isna(numeric_value):
+                for j, header in enumerate(IC_HEADERS):
+                    value = values[j] if j < len(values) else None
+                    try:
+                        numeric_value = pd.to_numeric(value, errors='coerce')
+                        if pd.isna(numeric_value):
+                            numeric_value = 0
+                        if numeric_value == int(numeric_value):
+                            numeric_value = int(numeric_value)
+                    except ValueError:
                         numeric_value = 0
-                    if numeric_value == int(numeric_value):
-                        numeric_value = int(numeric_value)
-                except ValueError:
-                    numeric_value = 0
-                row_data[header] = numeric_value
+                    row_data[header] = numeric_value
 
-            processed_df.loc[len(processed_df)] = row_data
+                processed_df.loc[len(processed_df)] = row_data
+            t.add(rows=len(years_from_header))
 
-    processed_df.to_csv(OUTPUT_CSV_PATH, index=False, encoding='utf-8')
+    with METRICS.stage("ic", "csv_write") as t:
+        processed_df.to_csv(OUTPUT_CSV_PATH, index=False, encoding='utf-8')
+        t.add(rows=len(processed_df), bytes=os.path.getsize(OUTPUT_CSV_PATH))
+    # ดัชนี SQLite (company_id, year) ให้ GET /companies/{id}/ic ค้นรายบริษัทได้ทันที
+    with METRICS.stage("ic", "sqlite_index") as t:
+        write_statement_index(processed_df, "ic", IC_HEADERS)
+        t.add(rows=len(processed_df))
+    if parquet_enabled(formats):
+        with METRICS.stage("ic", "parquet_write") as t:
+            columnar_df = processed_df.astype({h: "float64" for h in IC_HEADERS})
+            write_partitioned(columnar_df, "ic", "all", replace=True)
+            t.add(rows=len(columnar_df))
+    # อัตราส่วนทางการเงิน (ROA/ROE/current ratio/D/E/turnover) คำนวณใหม่จาก BS+IC ล่าสุดทุกครั้ง
+    with METRICS.stage("ic", "ratios"):
+        process_ratios(formats)
     return {"message": "IC processed", "rows": len(processed_df), "data": processed_df }
@@ -1,5 +1,8 @@
 import pandas as pd
 import os
+from services.json_stream import with_format, write_records
+from services.excel_loader import load_excel_sheets
+from services.feed_schema import Column, FeedSchema, as_amount, as_text
 
 def fix_buddhist_year(date_val):
     if isinstance(date_val, str):
@@ -19,121 +22,85 @@ def fix_buddhist_year(date_val):
             return pd.NaT
     return date_val
 
+# schema ของ invoice: ชื่อผลลัพธ์ ← หัวคอลัมน์ที่หลากหลาย (แบบเต็ม / snake_case / มี space) + การแปลงชนิด
+# ลำดับ Column = ลำดับคอลัมน์ผลลัพธ์ (เก็บเฉพาะที่มีในไฟล์)
+INVOICE_SCHEMA = FeedSchema("invoice", (
+    Column("invoice_no", ("Invoice No.", "# Invoice No."), as_text),
+    # invoice_date เก็บตามไฟล์ (ถ้าจะแปลง พ.ศ. → YYYY-MM-DD ใช้ as_date(fix_buddhist_year))
+    Column("invoice_date", ("Invoice Date",)),
+    Column("po_no", ("PO No.",), as_text),
+    Column("po_date", ("PO Date",)),
+    Column("supplier_code", ("Supplier Code",), as_text),
+    Column("buyer_code", ("Buyer Code",), as_text),
+    Column("amount_excl_vat", ("Invoice Amount (Exclude VAT)", "Amount_Excl_VAT", "Amount Excl. VAT"),
+           as_amount(), dtype="str"),
+    Column("vat_amount", ("Invoice VAT Amount", "VAT_Amount", "VAT Amount"), as_amount(), dtype="str"),
+    Column("amount_incl_vat", ("Invoice Net Amount (Include VAT)", "Amount_Incl_VAT", "Amount Incl. VAT"),
+           as_amount(), dtype="str"),
+    Column("source_sheet"),
+))
+
+# จำนวนแถวต่อ chunk ตอนอ่าน CSV (memory สูงสุด ~ ขนาด 1 chunk ไม่ขึ้นกับขนาดไฟล์)
+CSV_CHUNK_ROWS = 100_000
+
 def normalize_invoice_columns(df):
-    # จับชื่อคอลัมน์ที่หลากหลายมาแม็ปเป็นชุดเดียว
-    rename_map = {
-        # แบบเต็ม
-        "Invoice Amount (Exclude VAT)": "amount_excl_vat",
-        "Invoice VAT Amount": "vat_amount",
-        "Invoice Net Amount (Include VAT)": "amount_incl_vat",
-
-        # แบบ snake_case
-        "Amount_Excl_VAT": "amount_excl_vat",
-        "VAT_Amount": "vat_amount",
-        "Amount_Incl_VAT": "amount_incl_vat",
-
-        # แบบมี space
-        "Amount Excl. VAT": "amount_excl_vat",
-        "VAT Amount": "vat_amount",
-        "Amount Incl. VAT": "amount_incl_vat",
-
-        "# Invoice No.": "invoice_no",
-
-        # อื่น ๆ
-        "Supplier Code": "supplier_code",
-        "Buyer Code": "buyer_code",
-        "PO No.": "po_no",
-        "PO Date": "po_date",
-        "Invoice No.": "invoice_no",
-        "Invoice Date": "invoice_date"
-    }
-
-    df = df.rename(columns={col: rename_map.get(col, col) for col in df.columns})
-    return df
-
-def clean_numeric(value):
-    if pd.isnull(value):
-        return 0
-    if isinstance(value, str):
-        value = value.replace(',', '').strip()
-        if value in ["", "-", "–"]:
-            return 0
-    try:
-        return float(value)
-    except:
-        return 0
-    
+    return INVOICE_SCHEMA.rename(df)
+
+def _abs_path(file_path):
+    return file_path if os.path.isabs(file_path) else os.path.join("raw_data", file_path)
+
+def iter_old_invoice_chunks(file_path, chunksize=CSV_CHUNK_ROWS):
+    """
+    อ่าน invoice ทีละ chunk (CSV) แล้ว normalize ทีละ chunk
+    - INVOICE_SCHEMA.iter_csv: อ่านเฉพาะคอลัมน์ใน schema (คอลัมน์อื่นไม่ถูกสร้างเลย)
+      parse ไฟล์รอบเดียวด้วย dtype ที่ประกาศใน Column (จำนวนเงิน / วันที่อ่านเป็นข้อความให้ converter แปลง)
+      คอลัมน์ที่ไม่ประกาศ (เลขที่เอกสาร / รหัส) pandas อนุมานต่อ chunk → as_text ได้ค่าแบบ loader เดิม
+    - แต่ละ chunk ผ่าน INVOICE_SCHEMA.apply รอบเดียว (เลือก + rename + แปลงชนิด)
+    - Excel อ่านทีละ chunk ไม่ได้ → yield ก้อนเดียวจาก load_old_invoice_data
+    """
+    abs_path = _abs_path(file_path)
+    if os.path.splitext(abs_path)[1].lower() in [".xlsx", ".xls"]:
+        df = load_old_invoice_data(file_path)
+        if not df.empty:
+            yield df
+        return
+
+    # เผื่อ encoding ภาษาไทย (utf-8-sig / utf-8 / cp874): sniff จาก prefix แล้ว parse รอบเดียว
+    # decode พังกลางไฟล์ (prefix เป็น ASCII ล้วน) iter_csv เปลี่ยน encoding ต่อจากแถวที่ yield ไปแล้วให้เอง
+    for chunk in INVOICE_SCHEMA.iter_csv(abs_path, chunksize):
+        chunk["source_sheet"] = "CSV"
+        yield INVOICE_SCHEMA.apply(chunk)
+
 # ฟังก์ชันโหลดข้อมูล invoice จาก Excel
 def load_old_invoice_data(file_path):
-    abs_path = file_path if os.path.isabs(file_path) else os.path.join("raw_data", file_path)
+    abs_path = _abs_path(file_path)
     _, ext = os.path.splitext(abs_path)
     ext = ext.lower()
-    # abs_path = os.path.join("raw_data", file_path)
-    # csv = pd.read_csv(abs_path)
-
-    all_data = []
-    if ext in [".xlsx", ".xls"]:
-        # Excel หลายชีต
-        xls = pd.ExcelFile(abs_path)
-        for sheet in xls.sheet_names:
-            df = xls.parse(sheet)
-            if not df.isnull().all().all():
-                df["source_sheet"] = sheet
-                df = normalize_invoice_columns(df)
-                all_data.append(df)
-    else:
-        # CSV มีตารางเดียว
-        # เผื่อ encoding ภาษาไทย: ลอง utf-8-sig ก่อน ค่อย fallback cp874
-        try:
-            df = pd.read_csv(abs_path)
-        except UnicodeDecodeError:
-            try:
-                df = pd.read_csv(abs_path, encoding="utf-8-sig")
-            except UnicodeDecodeError:
-                df = pd.read_csv(abs_path, encoding="cp874")  # Thai Windows
-        if not df.isnull().all().all():
-            df["source_sheet"] = "CSV"
-            df = normalize_invoice_columns(df)
-            all_data.append(df)
+
+    if ext not in [".xlsx", ".xls"]:
+        # CSV มีตารางเดียว → ต่อ chunk ที่ normalize แล้วเข้าด้วยกัน
+        chunks = list(iter_old_invoice_chunks(file_path))
+        if not chunks:
+            return pd.DataFrame()  # ไม่มีข้อมูลเลย
+        return pd.concat(chunks, ignore_index=True)
+
+    # Excel หลายชีต: parse พร้อมกันทุกชีต อ่านเฉพาะคอลัมน์ใน INVOICE_SCHEMA
+    # rename ต่อชีตก่อน concat ให้ชีตที่ใช้หัวคอลัมน์ต่างแบบกันรวมเป็นคอลัมน์เดียว
+    all_data = [normalize_invoice_columns(df) for df in load_excel_sheets(abs_path, INVOICE_SCHEMA.wanted)]
 
     if not all_data:
         return pd.DataFrame()  # ไม่มีข้อมูลเลย
 
     combined_df = pd.concat(all_data, ignore_index=True)
-
-    # เลือกเฉพาะคอลัมน์ที่ต้องการ (ถ้ามี)
-    keep = [
-        "invoice_no", "invoice_date", "po_no", "po_date", "supplier_code", "buyer_code",
-        "amount_excl_vat", "vat_amount", "amount_incl_vat", "source_sheet"
-    ]
-    existing_keep = [col for col in keep if col in combined_df.columns]
-    if existing_keep:
-        combined_df = combined_df[existing_keep]
-
-    # invoice_no / po_no / supplier_code / buyer_code เป็น string เสมอ
-    for col in ["invoice_no", "po_no", "supplier_code", "buyer_code"]:
-        if col in combined_df.columns:
-            combined_df[col] = combined_df[col].astype(str).fillna("")
-
-    # แปลง invoice_date เป็น YYYY-MM-DD
-    # if "invoice_date" in combined_df.columns:
-    #     combined_df["invoice_date"] = combined_df["invoice_date"].astype(str)
-    #     combined_df["invoice_date"] = combined_df["invoice_date"].apply(fix_buddhist_year)
-    #     combined_df["invoice_date"] = pd.to_datetime(combined_df["invoice_date"], errors="coerce")
-    #     combined_df["invoice_date"] = combined_df["invoice_date"].dt.strftime("%Y-%m-%d")
-
-    # แปลง numeric fields เป็น float ผ่าน clean_numeric
-    for col in ["amount_excl_vat", "vat_amount", "amount_incl_vat"]:
-        if col in combined_df.columns:
-            combined_df[col] = combined_df[col].apply(clean_numeric)
-
-    return combined_df
+    return INVOICE_SCHEMA.apply(combined_df)
 
 
-def save_old_inv_json(dataframe, output_filename):
+def save_old_inv_json(dataframe, output_filename, fmt="json", compression=None):
+    # เขียนทีละ chunk (ไม่มี indent) — fmt="ndjson" / compression="gzip"|"zstd" ได้
     os.makedirs("processed_data", exist_ok=True)
-    output_path = os.path.join("processed_data", output_filename)
-    dataframe.to_json(output_path, orient="records", force_ascii=False, indent=2)
-    print(f"JSON saved to {output_path}")
+    output_path = os.path.join("processed_data", with_format(output_filename, fmt, compression))
+    rows = write_records(dataframe, output_path, fmt=fmt, compression=compression)
+    print(f"JSON saved to {output_path} ({rows} rows)")
+    return output_path
 
 
@@ -1,6 +1,8 @@
 # services/inv_processor.py
 import pandas as pd
 import os
+from services.json_stream import with_format, write_records
+from services.numeric_cleaner import clean_numeric_series
 
 def fix_buddhist_year(date_val):
     if isinstance(date_val, str):
@@ -51,18 +53,6 @@ def normalize_invoice_columns(df):
     df = df.rename(columns={col: rename_map.get(col, col) for col in df.columns})
     return df
 
-def clean_numeric(value):
-    if pd.isnull(value):
-        return 0
-    if isinstance(value, str):
-        value = value.replace(',', '').strip()
-        if value in ["", "-", "–"]:
-            return 0
-    try:
-        return float(value)
-    except:
-        return 0
-    
 # ฟังก์ชันโหลดข้อมูล invoice จาก Excel
 def load_invoice_data(file_path):
     abs_path = os.path.join("raw_data", file_path)
@@ -103,15 +93,17 @@ def load_invoice_data(file_path):
     # ✅ แปลง numeric fields เป็น float
     for col in ["amount_excl_vat", "vat_amount", "amount_incl_vat"]:
         if col in combined_df.columns:
-            combined_df[col] = combined_df[col].apply(clean_numeric)
+            combined_df[col] = clean_numeric_series(combined_df[col])
 
     return combined_df
 
 
-def save_inv_json(dataframe, output_filename):
+def save_inv_json(dataframe, output_filename, fmt="json", compression=None):
+    # เขียนทีละ chunk (ไม่มี indent) — fmt="ndjson" / compression="gzip"|"zstd" ได้
     os.makedirs("processed_data", exist_ok=True)
-    output_path = os.path.join("processed_data", output_filename)
-    dataframe.to_json(output_path, orient="records", force_ascii=False, indent=2)
-    print(f"JSON saved to {output_path}")
+    output_path = os.path.join("processed_data", with_format(output_filename, fmt, compression))
+    rows = write_records(dataframe, output_path, fmt=fmt, compression=compression)
+    print(f"JSON saved to {output_path} ({rows} rows)")
+    return output_path
 
 
@@ -0,0 +1,141 @@
+# services/json_stream.py
+import gzip
+import json
+import os
+
+CHUNK_ROWS = 50_000
+JSON_FORMATS = ("json", "ndjson")
+COMPRESSIONS = (None, "gzip", "zstd")
+_SUFFIX_COMPRESSION = {".gz": "gzip", ".zst": "zstd"}
+
+
+def infer_compression(path):
+    return _SUFFIX_COMPRESSION.get(os.path.splitext(str(path))[1].lower())
+
+
+def output_suffix(fmt="json", compression=None):
+    # เช่น ("ndjson", "gzip") -> ".ndjson.gz"
+    ext = ".ndjson" if fmt == "ndjson" else ".json"
+    if compression == "gzip":
+        ext += ".gz"
+    elif compression == "zstd":
+        ext += ".zst"
+    return ext
+
+
+def with_format(filename, fmt="json", compression=None):
+    """invoice_052025.json + ("ndjson", "gzip") -> invoice_052025.ndjson.gz"""
+    base = str(filename)
+    for ext in (".gz", ".zst", ".ndjson", ".json"):
+        if base.lower().endswith(ext):
+            base = base[: -len(ext)]
+    return base + output_suffix(fmt, compression)
+
+
+def open_text(path, mode="r", compression="infer"):
+    """เปิดไฟล์แบบ text (utf-8) รองรับ gzip / zstd — zstd ต้องมี zstandard"""
+    if compression == "infer":
+        compression = infer_compression(path)
+    if compression is None:
+        return open(path, mode + "t", encoding="utf-8", newline="\n")
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="\n", compresslevel=6)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise RuntimeError("ต้องติดตั้ง zstandard ก่อน: pip install zstandard") from e
+        return zstandard.open(path, mode + "t", encoding="utf-8", newline="\n")
+    raise ValueError(f"compression ไม่รองรับ: {compression}")
+
+
+def _check(fmt, compression):
+    if fmt not in JSON_FORMATS:
+        raise ValueError(f"fmt ต้องเป็น {JSON_FORMATS}: {fmt}")
+    if compression != "infer" and compression not in COMPRESSIONS:
+        raise ValueError(f"compression ต้องเป็น {COMPRESSIONS}: {compression}")
+
+
+class RecordWriter:
+    """
+    เขียน records ต่อท้ายทีละ chunk — ใช้เมื่อข้อมูลมาเป็นก้อน ๆ (เช่นอ่าน CSV ทีละ chunk)
+
+        with RecordWriter(path, fmt="ndjson") as w:
+            for chunk in chunks:
+                w.write(chunk)
+
+    - ndjson: 1 record ต่อบรรทัด
+    - json  : [ ... ] คั่นด้วย ",\\n" → ยังเป็น JSON array ปกติ (Laravel/JsonMachine อ่านได้)
+    - เขียนลงไฟล์ชั่วคราวก่อนแล้วค่อย rename — ระหว่างเขียน/ถ้าพังกลางทาง จะไม่เหลือไฟล์ครึ่ง ๆ กลาง ๆ
+    """
+
+    def __init__(self, output_path, fmt="json", compression="infer", chunk_rows=CHUNK_ROWS):
+        _check(fmt, compression)
+        if compression == "infer":
+            compression = infer_compression(output_path)
+        self.output_path = str(output_path)
+        self.fmt = fmt
+        self.compression = compression
+        self.chunk_rows = chunk_rows
+        self.rows = 0
+        self._tmp_path = f"{self.output_path}.tmp"
+        self._f = None
+
+    def __enter__(self):
+        self._f = open_text(self._tmp_path, "w", self.compression)
+        if self.fmt == "json":
+            self._f.write("[")
+        return self
+
+    def _write_lines(self, text, count):
+        # text = ข้อความ "1 record ต่อบรรทัด" (ไม่มี newline ปิดท้าย)
+        if not count:
+            return
+        if self.fmt == "ndjson":
+            self._f.write(text)
+            self._f.write("\n")
+        else:
+            self._f.write("\n" if self.rows == 0 else ",\n")
+            self._f.write(text.replace("\n", ",\n"))
+        self.rows += count
+
+    def write(self, dataframe):
+        """ค่าใน record เหมือน to_json(orient="records", force_ascii=False) เดิม แค่ไม่มี indent"""
+        for start in range(0, len(dataframe), self.chunk_rows):
+            part = dataframe.iloc[start:start + self.chunk_rows]
+            self._write_lines(part.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n"), len(part))
+
+    def write_dicts(self, records):
+        buf = []
+        for rec in records:
+            buf.append(json.dumps(rec, ensure_ascii=False, default=str))
+            if len(buf) >= self.chunk_rows:
+                self._write_lines("\n".join(buf), len(buf))
+                buf = []
+        self._write_lines("\n".join(buf), len(buf))
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None and self.fmt == "json":
+                self._f.write("]\n" if self.rows == 0 else "\n]\n")
+            self._f.close()
+            if exc_type is None:
+                os.replace(self._tmp_path, self.output_path)
+        finally:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+        return False
+
+
+def write_records(dataframe, output_path, fmt="json", compression="infer", chunk_rows=CHUNK_ROWS):
+    """เขียน DataFrame เป็น records ทีละ chunk (ไม่ serialize ทั้งก้อนเป็น string เดียว)"""
+    with RecordWriter(output_path, fmt, compression, chunk_rows) as w:
+        w.write(dataframe)
+    return w.rows
+
+
+def write_record_list(records, output_path, fmt="json", compression="infer", chunk_rows=CHUNK_ROWS):
+    """เหมือน write_records แต่รับ list/iterable ของ dict (ใช้กับสคริปต์ OCR)"""
+    with RecordWriter(output_path, fmt, compression, chunk_rows) as w:
+        w.write_dicts(records)
+    return w.rows
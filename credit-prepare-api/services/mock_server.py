@@ -0,0 +1,293 @@
+# services/mock_server.py
+"""
+HTTP server จำลอง (ในเครื่อง) ของบริการภายนอก — ตอบจาก response ที่ capture ไว้ (example.json, login_success.json, ...)
+ใช้ทดสอบ/วัดโหลดของ sender และ client โดยไม่ต้องเรียกของจริง (CorpusX เสียเงินต่อ inquiry)
+
+    server = start_mock_server(MockConfig(latency_ms=50, error_rate=0.01), port=8900)
+    CorpusXClient(base_url=server.url) / TYPHOON_OCR_URL={server.url}/v1/ocr / API_BASE={server.url}
+    server.shutdown()
+
+route:
+    CorpusX   POST /api/v1/token/token           login_success.json (JWT ใหม่ทุกครั้ง exp = now + token_ttl)
+              POST /api/v1/session/clear
+              POST /ApiFrontend/bol_service/get/data     searchResults ตาม dataField ที่ขอ (รวมจากไฟล์ capture ทุกไฟล์)
+              POST /ApiFrontend/bol_service/check/data | check/cost
+    Typhoon   POST /v1/ocr                       ผล OCR (ocr_fixture หรือหน้าเดียวที่มีตาราง HTML)
+    Laravel   POST /api/public/bol-bs | bol-ic | dbd-company-supplier | gec-* , GET /api/ping
+    ภายใน     GET  /__stats                      จำนวน request / error ต่อ route
+
+knob: latency_ms + jitter_ms (หน่วงก่อนตอบ), error_rate (สัดส่วนที่ตอบ error_status แทน)
+"""
+import base64
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from services.corpusx_datasets import DATASETS, split_response
+
+# โฟลเดอร์ที่มีไฟล์ capture (root ของ repo)
+FIXTURES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CORPUSX_CAPTURES = (
+    "example.json", "profile_information.json", "tsic.json", "credit_score.json", "director_shardholder.json",
+    "credit_recommendation.json", "financial_information.json", "financial_ratio.json",
+)
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    token_ttl: int = 900                    # อายุ access token ที่ออกให้ (วินาที) เท่าของจริง
+    fixtures_dir: str = FIXTURES_DIR
+    ocr_fixture: Optional[str] = None        # ไฟล์ JSON ผล OCR ของ Typhoon (None = ตารางตัวอย่าง)
+    seed: Optional[int] = None
+    routes: dict = field(default_factory=dict)   # override latency ต่อ path เช่น {"/v1/ocr": 1500}
+
+
+# ---------------- fixtures ---------------- #
+
+def _load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _merge_result(base, other):
+    """รวม searchResults[0] ของหลายไฟล์ capture เป็นบริษัทเดียว (financial รวมตาม fiscalYear)"""
+    for key, value in other.items():
+        if key != "financial":
+            base[key] = value
+            continue
+        years = {y.get("fiscalYear"): y for y in base.get("financial") or []}
+        for year in value or []:
+            years.setdefault(year.get("fiscalYear"), {}).update(year)
+        base["financial"] = list(years.values())
+    return base
+
+
+def load_corpusx_master(fixtures_dir=FIXTURES_DIR):
+    """response ต้นแบบที่มีทุก dataset (ใช้ split_response ตัดเฉพาะ dataField ที่ขอ)"""
+    master = None
+    for name in CORPUSX_CAPTURES:
+        path = os.path.join(fixtures_dir, name)
+        if not os.path.exists(path):
+            continue
+        response = _load_json(path)
+        results = response.get("searchResults") or [{}]
+        if master is None:
+            master = response
+            master["searchResults"] = [dict(results[0])]
+        else:
+            _merge_result(master["searchResults"][0], results[0])
+    if master is None:
+        raise FileNotFoundError(f"ไม่พบไฟล์ capture ของ CorpusX ใน {fixtures_dir}")
+    return master
+
+
+def default_ocr_response():
+    html = (
+        "<table><tr><th>ลำดับ</th><th>รายการ</th><th>จำนวน</th><th>ราคา</th><th>จำนวนเงิน</th></tr>"
+        "<tr><td>1</td><td>สินค้า A</td><td>10</td><td>100.00</td><td>1,000.00</td></tr>"
+        "<tr><td>2</td><td>สินค้า B</td><td>5</td><td>200.00</td><td>1,000.00</td></tr></table>"
+    )
+    content = json.dumps({"natural_text": "เลขที่ INV-0001 วันที่ 1 มกราคม 2568\n" + html}, ensure_ascii=False)
+    return {"results": [{"success": True, "message": {"choices": [{"message": {"content": content}}]}}]}
+
+
+def fake_jwt(exp):
+    def part(obj):
+        return base64.urlsafe_b64encode(json.dumps(obj).encode()).rstrip(b"=").decode()
+    return f"{part({'alg': 'none', 'typ': 'JWT'})}.{part({'exp': int(exp)})}.mock"
+
+
+# ---------------- server ---------------- #
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, MockHandler)
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.login = _load_json(os.path.join(config.fixtures_dir, "login_success.json"))
+        self.corpusx = load_corpusx_master(config.fixtures_dir)
+        self.ocr = _load_json(config.ocr_fixture) if config.ocr_fixture else default_ocr_response()
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._ids = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def next_id(self):
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    def delay(self, path):
+        base = self.config.routes.get(path, self.config.latency_ms)
+        with self._lock:
+            jitter = self.random.uniform(-1, 1) * self.config.jitter_ms
+            fail = self.random.random() < self.config.error_rate
+        return max(0.0, base + jitter) / 1000.0, fail
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive ให้ client ที่ใช้ connection pool
+    disable_nagle_algorithm = True   # header กับ body เขียนแยกกัน — ไม่งั้นโดน delayed ACK ~40ms ทุก request
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _handle(self, method):
+        path = urlsplit(self.path).path.rstrip("/") or "/"
+        raw = self._body()
+        server = self.server
+        server.count(f"{method} {path}")
+
+        if path == "/__stats":
+            return self._reply(200, dict(server.stats))
+
+        wait, fail = server.delay(path)
+        if wait:
+            time.sleep(wait)
+        if fail:
+            server.count("errors")
+            return self._reply(server.config.error_status, {"success": False, "error": "mock error"})
+
+        route = ROUTES.get((method, path))
+        if route is None:
+            return self._reply(404, {"success": False, "error": f"no mock for {method} {path}"})
+        status, payload = route(self, raw)
+        return self._reply(status, payload)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    # ---- CorpusX ---- #
+
+    def form(self, raw):
+        return dict(parse_qsl(raw.decode("utf-8"), keep_blank_values=True))
+
+    def authorized(self):
+        return (self.headers.get("Authorization") or "").startswith("Bearer ")
+
+    def corpusx_token(self, raw):
+        now = time.time()
+        ttl = self.server.config.token_ttl
+        payload = dict(self.server.login)
+        payload.update({
+            "access_token": fake_jwt(now + ttl),
+            "refresh_token": fake_jwt(now + ttl * 4),
+            "expires_in": str(ttl),
+            "issued_date": datetime.fromtimestamp(now).strftime("%d/%m/%Y %H:%M:%S"),
+            "expires_date": datetime.fromtimestamp(now + ttl).strftime("%d/%m/%Y %H:%M:%S"),
+        })
+        return 200, payload
+
+    def corpusx_session_clear(self, raw):
+        return 200, {"result_status": "9010100", "result_message": "Session Clear Success"}
+
+    def corpusx_get_data(self, raw):
+        if not self.authorized():
+            return 401, {"message": "Unauthorized"}
+        params = self.form(raw)
+        codes = {c.strip() for c in params.get("dataField", "").split(",") if c.strip()}
+        wanted = [ds for ds in DATASETS.values() if codes & set(ds.fields)]
+        master = self.server.corpusx
+        result = {}
+        for part in split_response(master, wanted).values():
+            _merge_result(result, part["searchResults"][0])
+        if params.get("registrationId"):
+            result["registrationNo"] = params["registrationId"]
+        detail = dict(master.get("inquiryDetail") or {}, **params)
+        detail["transactionTimestamp"] = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+        return 200, {"inquiryDetail": detail, "inquiryStatus": {"result": "Success", "description": ""},
+                     "searchResults": [result] if wanted else []}
+
+    def corpusx_check(self, raw):
+        if not self.authorized():
+            return 401, {"message": "Unauthorized"}
+        return 200, {"inquiryDetail": self.form(raw), "inquiryStatus": {"result": "Success", "description": ""}}
+
+    # ---- Typhoon OCR ---- #
+
+    def typhoon_ocr(self, raw):
+        if not self.authorized():
+            return 401, {"error": "missing api key"}
+        return 200, self.server.ocr
+
+    # ---- Laravel public API ---- #
+
+    def laravel_ping(self, raw):
+        return 200, {"message": "Laravel API is working!", "status": "ok"}
+
+    def laravel_store(self, raw):
+        try:
+            rows = json.loads(raw or b"[]")
+        except ValueError:
+            return 422, {"success": False, "error": "Validation failed"}
+        return 200, {"success": True, "data": rows, "message": "All data saved successfully."}
+
+    def laravel_company_supplier(self, raw):
+        try:
+            json.loads(raw or b"{}")
+        except ValueError:
+            return 422, {"success": False, "error": "Validation failed"}
+        return 201, {"ok": True, "mode": "created", "company_id": self.server.next_id(),
+                     "business_sections_upserted": 0, "directors_synced": 0}
+
+
+ROUTES = {
+    ("POST", "/api/v1/token/token"): MockHandler.corpusx_token,
+    ("POST", "/api/v1/session/clear"): MockHandler.corpusx_session_clear,
+    ("POST", "/ApiFrontend/bol_service/get/data"): MockHandler.corpusx_get_data,
+    ("POST", "/ApiFrontend/bol_service/check/data"): MockHandler.corpusx_check,
+    ("POST", "/ApiFrontend/bol_service/check/cost"): MockHandler.corpusx_check,
+    ("POST", "/v1/ocr"): MockHandler.typhoon_ocr,
+    ("GET", "/api/ping"): MockHandler.laravel_ping,
+    ("POST", "/api/public/bol-bs"): MockHandler.laravel_store,
+    ("POST", "/api/public/bol-ic"): MockHandler.laravel_store,
+    ("POST", "/api/public/gec-inv"): MockHandler.laravel_store,
+    ("POST", "/api/public/gec-po"): MockHandler.laravel_store,
+    ("POST", "/api/public/gec-old-inv"): MockHandler.laravel_store,
+    ("POST", "/api/public/dbd-supplier"): MockHandler.laravel_store,
+    ("POST", "/api/public/dbd-company-supplier"): MockHandler.laravel_company_supplier,
+}
+
+
+def start_mock_server(config=None, host="127.0.0.1", port=0):
+    """เปิด server ใน thread พื้นหลัง (port=0 = สุ่ม port ว่าง) → MockServer (ใช้ .url / .shutdown())"""
+    server = MockServer((host, port), config or MockConfig())
+    threading.Thread(target=server.serve_forever, name="mock-server", daemon=True).start()
+    return server
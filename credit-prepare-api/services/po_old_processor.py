@@ -2,6 +2,9 @@ import pandas as pd
 import os
 import datetime
 import re
+from services.json_stream import with_format, write_records
+from services.excel_loader import load_excel_sheets
+from services.feed_schema import Column, FeedSchema, as_amount, as_date, as_text
 
 def fix_buddhist_year(date_val):
     if isinstance(date_val, str):
@@ -68,114 +71,121 @@ def normalize_th_date(val):
     # กรณีสุดท้าย: ถ้ายัง NaT ก็คืน NaT ไป
     return dt
 
-def clean_numeric(value):
-    if isinstance(value, str):
-        value = value.replace(',', '').strip()
-        if value == "-" or value == "":
-            return 0.0
-    try:
-        return float(value)
-    except:
-        return 0.0
-    
+# d-m-y / y-m-d หลังแปลงตัวคั่น . / เป็น - (regex เดียวกับ normalize_th_date)
+_DMY_RE = r"^\s*(\d{1,4})-(\d{1,2})-(\d{1,4})\s*$"
+
+def normalize_th_dates(values):
+    """
+    normalize_th_date ทั้งคอลัมน์ในรอบเดียว → Series datetime64 (NaT = แปลงไม่ได้)
+    - str.extract ครั้งเดียวได้ส่วน d/m/y (หรือ y/m/d ถ้าส่วนแรกยาว 4 หลัก)
+    - ปี 2 หลัก → 20xx, ปี พ.ศ. (>= 2400) → ค.ศ. บนทั้งคอลัมน์
+    - to_datetime ครั้งเดียว วันที่ไม่มีจริงแบบ d-m ลองสลับเป็น m-d อีกรอบ (เหมือน dayfirst ของ pandas)
+    - ค่าที่ไม่เข้ารูปแบบ (เช่น "2024-01-05 00:00:00", ข้อความ) ใช้ normalize_th_date ทีละค่าเหมือนเดิม
+    """
+    text = values.astype(str)
+    parts = text.str.strip().str.replace(r"[./]", "-", regex=True).str.extract(_DMY_RE)
+    matched = parts[0].notna()
+
+    out = pd.Series(pd.NaT, index=values.index, dtype="datetime64[us]")
+    if matched.any():
+        p = parts[matched]
+        ymd = p[0].str.len() == 4
+        year = p[2].where(~ymd, p[0]).astype(int)
+        month = p[1].astype(int)
+        day = p[0].where(~ymd, p[2]).astype(int)
+        year = year.where(year >= 100, year + 2000)
+        year = year.where(year < 2400, year - 543)
+        # to_datetime(DataFrame) ประกอบเป็น YYYYMMDD → ปี 3 หลัก / วัน 3 หลัก (ข้อมูลเสีย) ส่งให้ทางทีละค่า
+        fits = (year >= 1000) & (day < 100)
+        matched[fits.index[~fits]] = False
+        year, month, day = year[fits], month[fits], day[fits]
+
+        dates = pd.to_datetime(pd.DataFrame({"year": year, "month": month, "day": day}), errors="coerce")
+        retry = dates.isna()
+        if retry.any():
+            swapped = pd.DataFrame({"year": year[retry], "month": day[retry], "day": month[retry]})
+            dates[retry] = pd.to_datetime(swapped, errors="coerce")
+        out[matched] = dates.astype("datetime64[us]")
+
+    rest = values.notna() & ~matched
+    if rest.any():
+        out[rest] = pd.to_datetime(values[rest].map(normalize_th_date), errors="coerce").astype("datetime64[us]")
+    return out
+
+# schema ของ PO: ชื่อผลลัพธ์ ← หัวคอลัมน์ดิบ + การแปลงชนิด (ลำดับ Column = ลำดับคอลัมน์ผลลัพธ์)
+PO_SCHEMA = FeedSchema("po", (
+    Column("supplier_name", ("Supplier Name", "# Supplier Name")),
+    # Column("buyer_name", ("Buyer Name",)),
+    Column("po_no", ("PO No.",), as_text),
+    # po_date / po_shipment_date → YYYY-MM-DD (รองรับ d/m/Y, Y-m-d และปี พ.ศ.)
+    Column("po_date", ("PO Date",), as_date(normalize_th_dates, vectorized=True), dtype="str"),
+    Column("amount_excl_vat", ("PO Amount (Exclude VAT)",), as_amount(float("nan")), dtype="str"),
+    Column("vat_amount", ("PO VAT Amount",), as_amount(float("nan")), dtype="str"),
+    Column("amount_incl_vat", ("PO Net Amount (Include VAT)",), as_amount(float("nan")), dtype="str"),
+    Column("po_shipment_date", ("PO Shipment Date",), as_date(normalize_th_dates, vectorized=True),
+           dtype="str"),
+    Column("po_payment_term", ("PO Payment Term",)),
+    Column("source_sheet"),
+))
+
+# จำนวนแถวต่อ chunk ตอนอ่าน CSV (memory สูงสุด ~ ขนาด 1 chunk ไม่ขึ้นกับขนาดไฟล์)
+CSV_CHUNK_ROWS = 100_000
+
 def normalize_po_columns(df):
-    # จับชื่อคอลัมน์ที่หลากหลายมาแม็ปเป็นชุดเดียว
-    rename_map = {
-        "Supplier Name": "supplier_name",
-        "# Supplier Name": "supplier_name",
-        # "Buyer Name": "buyer_name",
-        "PO No.": "po_no",
-        "PO Date": "po_date",
-        "PO Amount (Exclude VAT)": "amount_excl_vat",
-        "PO VAT Amount": "vat_amount",
-        "PO Net Amount (Include VAT)": "amount_incl_vat",
-        "PO Shipment Date": "po_shipment_date",
-        "PO Payment Term": "po_payment_term",
-    }
-
-    df = df.rename(columns={col: rename_map.get(col, col) for col in df.columns})
-    return df
+    return PO_SCHEMA.rename(df)
+
+def _abs_path(file_path):
+    return file_path if os.path.isabs(file_path) else os.path.join("raw_data", file_path)
+
+def iter_old_po_chunks(file_path, chunksize=CSV_CHUNK_ROWS):
+    """
+    อ่าน PO ทีละ chunk (CSV) แล้ว normalize ทีละ chunk
+    - PO_SCHEMA.iter_csv: อ่านเฉพาะคอลัมน์ใน schema (คอลัมน์อื่นไม่ถูกสร้างเลย)
+      parse ไฟล์รอบเดียวด้วย dtype ที่ประกาศใน Column (จำนวนเงิน / วันที่อ่านเป็นข้อความให้ converter แปลง)
+      คอลัมน์ที่ไม่ประกาศ (เลขที่เอกสาร / รหัส) pandas อนุมานต่อ chunk → as_text ได้ค่าแบบ loader เดิม
+    - แต่ละ chunk ผ่าน PO_SCHEMA.apply รอบเดียว (เลือก + rename + แปลงชนิด)
+    - Excel อ่านทีละ chunk ไม่ได้ → yield ก้อนเดียวจาก load_old_po_data
+    """
+    abs_path = _abs_path(file_path)
+    if os.path.splitext(abs_path)[1].lower() in [".xlsx", ".xls"]:
+        df = load_old_po_data(file_path)
+        if not df.empty:
+            yield df
+        return
+
+    # เผื่อ encoding ภาษาไทย (utf-8-sig / utf-8 / cp874): sniff จาก prefix แล้ว parse รอบเดียว
+    # decode พังกลางไฟล์ (prefix เป็น ASCII ล้วน) iter_csv เปลี่ยน encoding ต่อจากแถวที่ yield ไปแล้วให้เอง
+    for chunk in PO_SCHEMA.iter_csv(abs_path, chunksize):
+        chunk["source_sheet"] = "CSV"
+        yield PO_SCHEMA.apply(chunk)
 
 def load_old_po_data(file_path):
-    abs_path = file_path if os.path.isabs(file_path) else os.path.join("raw_data", file_path)
+    abs_path = _abs_path(file_path)
     _, ext = os.path.splitext(abs_path)
     ext = ext.lower()
-    # abs_path = os.path.join("raw_data", file_path)
-    # csv = pd.read_csv(abs_path)
-
-    all_data = []
-    if ext in [".xlsx", ".xls"]:
-        # Excel หลายชีต
-        xls = pd.ExcelFile(abs_path)
-        for sheet in xls.sheet_names:
-            df = xls.parse(sheet)
-            if not df.isnull().all().all():
-                df["source_sheet"] = sheet
-                df = normalize_po_columns(df)
-                all_data.append(df)
-    else:
-        # CSV มีตารางเดียว
-        # เผื่อ encoding ภาษาไทย: ลอง utf-8-sig ก่อน ค่อย fallback cp874
-        try:
-            df = pd.read_csv(abs_path)
-        except UnicodeDecodeError:
-            try:
-                df = pd.read_csv(abs_path, encoding="utf-8-sig")
-            except UnicodeDecodeError:
-                df = pd.read_csv(abs_path, encoding="cp874")  # Thai Windows
-        if not df.isnull().all().all():
-            df["source_sheet"] = "CSV"
-            df = normalize_po_columns(df)
-            all_data.append(df)
+
+    if ext not in [".xlsx", ".xls"]:
+        # CSV มีตารางเดียว → ต่อ chunk ที่ normalize แล้วเข้าด้วยกัน
+        chunks = list(iter_old_po_chunks(file_path))
+        if not chunks:
+            return pd.DataFrame()  # ไม่มีข้อมูลเลย
+        return pd.concat(chunks, ignore_index=True)
+
+    # Excel หลายชีต: parse พร้อมกันทุกชีต อ่านเฉพาะคอลัมน์ใน PO_SCHEMA
+    # rename ต่อชีตก่อน concat ให้ชีตที่ใช้หัวคอลัมน์ต่างแบบกันรวมเป็นคอลัมน์เดียว
+    all_data = [normalize_po_columns(df) for df in load_excel_sheets(abs_path, PO_SCHEMA.wanted)]
 
     if not all_data:
         return pd.DataFrame()  # ไม่มีข้อมูลเลย
 
     combined_df = pd.concat(all_data, ignore_index=True)
+    return PO_SCHEMA.apply(combined_df)
+
 
-    # เลือกเฉพาะคอลัมน์ที่ต้องการ (ถ้ามี)
-    keep = [
-        "supplier_name", 
-        "po_no", 
-        "po_date", 
-        "amount_excl_vat", 
-        "vat_amount", 
-        "amount_incl_vat",
-        "po_shipment_date", 
-        "po_payment_term","source_sheet"
-    ]
-    existing_keep = [col for col in keep if col in combined_df.columns]
-    if existing_keep:
-        combined_df = combined_df[existing_keep]
-
-    # po_no เป็น string เสมอ
-    for col in ["po_no"]:
-        if col in combined_df.columns:
-            combined_df[col] = combined_df[col].astype(str).fillna("")
-
-    # แปลง invoice_date เป็น YYYY-MM-DD
-    if "po_date" in combined_df.columns:
-        combined_df["po_date"] = combined_df["po_date"].astype(str)
-        combined_df["po_date"] = combined_df["po_date"].apply(normalize_th_date)
-        combined_df["po_date"] = pd.to_datetime(combined_df["po_date"], errors="coerce")
-        combined_df["po_date"] = combined_df["po_date"].dt.strftime("%Y-%m-%d")
-
-    if "po_shipment_date" in combined_df.columns:
-        combined_df["po_shipment_date"] = combined_df["po_shipment_date"].astype(str)
-        combined_df["po_shipment_date"] = combined_df["po_shipment_date"].apply(normalize_th_date)
-        combined_df["po_shipment_date"] = pd.to_datetime(combined_df["po_shipment_date"], errors="coerce")
-        combined_df["po_shipment_date"] = combined_df["po_shipment_date"].dt.strftime("%Y-%m-%d")
-
-    # แปลง numeric fields เป็น float ผ่าน clean_numeric
-    for col in ["amount_excl_vat", "vat_amount", "amount_incl_vat"]:
-        if col in combined_df.columns:
-            combined_df[col] = combined_df[col].apply(clean_numeric)
-
-    return combined_df
-
-
-def save_old_po_json(dataframe, output_filename):
+def save_old_po_json(dataframe, output_filename, fmt="json", compression=None):
+    # เขียนทีละ chunk (ไม่มี indent) — fmt="ndjson" / compression="gzip"|"zstd" ได้
     os.makedirs("processed_data", exist_ok=True)
-    output_path = os.path.join("processed_data", output_filename)
-    dataframe.to_json(output_path, orient="records", force_ascii=False, indent=2)
-    print(f"JSON saved to {output_path}")
+    output_path = os.path.join("processed_data", with_format(output_filename, fmt, compression))
+    rows = write_records(dataframe, output_path, fmt=fmt, compression=compression)
+    print(f"JSON saved to {output_path} ({rows} rows)")
+    return output_path
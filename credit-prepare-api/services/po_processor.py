@@ -2,6 +2,8 @@
 import pandas as pd
 import os
 import datetime
+from services.json_stream import with_format, write_records
+from services.numeric_cleaner import clean_numeric_series
 
 def fix_buddhist_year(date_val):
     if isinstance(date_val, str):
@@ -25,16 +27,6 @@ def fix_buddhist_year(date_val):
         return date_val
     return date_val
 
-def clean_numeric(value):
-    if isinstance(value, str):
-        value = value.replace(',', '').strip()
-        if value == "-" or value == "":
-            return 0.0
-    try:
-        return float(value)
-    except:
-        return 0.0
-
 def load_po_data(file_path):
     abs_path = os.path.join("raw_data", file_path)
     xls = pd.ExcelFile(abs_path)
@@ -74,13 +66,15 @@ def load_po_data(file_path):
     # ทำความสะอาดข้อมูลตัวเลข
     for col in ["amount_excl_vat", "vat_amount", "amount_incl_vat"]:
         if col in combined_df.columns:
-            combined_df[col] = combined_df[col].apply(clean_numeric)
+            combined_df[col] = clean_numeric_series(combined_df[col], na_value=float("nan"))
 
     return combined_df
 
 
-def save_po_json(dataframe, output_filename):
+def save_po_json(dataframe, output_filename, fmt="json", compression=None):
+    # เขียนทีละ chunk (ไม่มี indent) — fmt="ndjson" / compression="gzip"|"zstd" ได้
     os.makedirs("processed_data", exist_ok=True)
-    output_path = os.path.join("processed_data", output_filename)
-    dataframe.to_json(output_path, orient="records", force_ascii=False, indent=2)
-    print(f"JSON saved to {output_path}")
+    output_path = os.path.join("processed_data", with_format(output_filename, fmt, compression))
+    rows = write_records(dataframe, output_path, fmt=fmt, compression=compression)
+    print(f"JSON saved to {output_path} ({rows} rows)")
+    return output_path
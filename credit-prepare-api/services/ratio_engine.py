@@ -0,0 +1,110 @@
+# services/ratio_engine.py
+"""
+คำนวณอัตราส่วนทางการเงินจากงบ BS + IC ที่ประมวลผลแล้ว (แทนการเรียก financial ratio จาก CorpusX ทีละบริษัท)
+คำนวณทั้งคอลัมน์ทีเดียวทุกบริษัท/ทุกปี แล้วเก็บคู่กับงบ:
+    processed_data/ratios_all_processed_data.csv + ตาราง ratios ใน statements.sqlite (+ parquet ถ้าเปิด)
+เปิด parquet → โหลด BS/IC จาก Parquet เฉพาะคอลัมน์ที่ใช้ (ไม่ต้องอ่านทั้งตารางจาก SQLite)
+ใช้ยอดปลายงวด (ไม่ใช่ยอดเฉลี่ยต้น-ปลายปีแบบ DBD) จึงอาจต่างจาก CorpusX เล็กน้อยในบางอัตรา
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from services.columnar_store import PARQUET_ROOT, parquet_enabled, read_statements, write_partitioned
+from services.statement_index import KEY_COLUMNS, read_statement_table, write_statement_index
+
+PROCESSED_DATA_FOLDER = "./processed_data"
+OUTPUT_CSV_PATH = os.path.join(PROCESSED_DATA_FOLDER, "ratios_all_processed_data.csv")
+RATIO_DECIMALS = 4
+
+# หัวบัญชีที่ใช้ (ชื่อตาม FINAL_HEADERS / IC_HEADERS)
+TOTAL_ASSETS = "Total assets"
+CURRENT_ASSETS = "Total current assets"
+INVENTORIES = "Inventories-net"
+RECEIVABLES = "Accounts and notes receivable - net"
+PAYABLES = "Total accounts payable and notes payable"
+CURRENT_LIABILITIES = "Total current liabilities"
+TOTAL_LIABILITIES = "Total Liabilities"
+EQUITY = "Total shareholders' equity"
+REVENUE = "Revenues from sales and services"
+COST_OF_SALES = "Cost of sales and services"
+GROSS_PROFIT = "Gross profit (loss)"
+EBIT = "Profit (loss) before finance costs and income tax"
+FINANCE_COSTS = "Finance costs"
+NET_PROFIT = "Net profit (loss)"
+# หัวบัญชีที่ต้องโหลดจากแต่ละงบ
+BS_OPERANDS = (TOTAL_ASSETS, CURRENT_ASSETS, INVENTORIES, RECEIVABLES, PAYABLES, CURRENT_LIABILITIES,
+               TOTAL_LIABILITIES, EQUITY)
+IC_OPERANDS = (REVENUE, COST_OF_SALES, GROSS_PROFIT, EBIT, FINANCE_COSTS, NET_PROFIT)
+
+# ชื่ออัตราส่วน → (ตัวตั้ง, ตัวหาร, ตัวคูณ) — ตัวตั้ง/ตัวหารเป็นชื่อหัวบัญชี หรือ callable(df) → Series
+# (ชื่อในวงเล็บคือ field เดียวกันใน financial ratio ของ CorpusX)
+RATIOS = {
+    "current_ratio": (CURRENT_ASSETS, CURRENT_LIABILITIES, 1),                                 # currentRatio
+    "quick_ratio": (lambda d: d[CURRENT_ASSETS] - d[INVENTORIES], CURRENT_LIABILITIES, 1),     # quickRatio
+    "receivables_turnover_ratio": (REVENUE, RECEIVABLES, 1),                                   # accountsReceivableTurnover
+    "payables_turnover_ratio": (COST_OF_SALES, PAYABLES, 1),                                   # accountsPayableTurnover
+    "inventory_turnover_ratio": (COST_OF_SALES, INVENTORIES, 1),                               # inventoryTurnover
+    "asset_turnover_ratio": (REVENUE, TOTAL_ASSETS, 1),
+    "gross_profit_margin_percent": (GROSS_PROFIT, REVENUE, 100),                               # grossProfitMarginPercent
+    "net_margin_percent": (NET_PROFIT, REVENUE, 100),                                          # netProfitMarginPercent
+    "roa_percent": (NET_PROFIT, TOTAL_ASSETS, 100),                                            # roa
+    "roe_percent": (NET_PROFIT, EQUITY, 100),                                                  # roe
+    "debt_to_asset_ratio": (TOTAL_LIABILITIES, TOTAL_ASSETS, 1),                               # debtRatio
+    "debt_to_equity_ratio": (TOTAL_LIABILITIES, EQUITY, 1),                                    # debtEquityRatio
+    "interest_coverage_ratio": (EBIT, FINANCE_COSTS, 1),                                       # interestCoverage
+}
+RATIO_COLUMNS = list(RATIOS)
+
+
+def _operand(df, spec):
+    values = spec(df) if callable(spec) else df[spec]
+    return values.to_numpy(dtype="float64")
+
+
+def compute_ratios(bs_df, ic_df):
+    """
+    bs_df / ic_df: ผลลัพธ์ของ process_bs_statements / process_ic_statements (1 แถว = บริษัท+ปี)
+    คืน DataFrame [company_id, company_name, year, <RATIO_COLUMNS>] — ตัวหารเป็น 0 → NaN
+    """
+    if bs_df.empty or ic_df.empty:
+        return pd.DataFrame(columns=list(KEY_COLUMNS) + RATIO_COLUMNS)
+
+    keys = ["company_id", "year"]
+    bs_df = bs_df.astype({"company_id": str, "year": int}).drop_duplicates(keys, keep="last")
+    ic_df = ic_df.astype({"company_id": str, "year": int}).drop_duplicates(keys, keep="last")
+    merged = bs_df.merge(ic_df.drop(columns=["company_name"], errors="ignore"), on=keys, how="inner")
+
+    out = merged[list(KEY_COLUMNS)].copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name, (numerator, denominator, scale) in RATIOS.items():
+            num = _operand(merged, numerator)
+            den = _operand(merged, denominator)
+            ratio = np.where(den != 0, num / den * scale, np.nan)
+            out[name] = np.round(ratio, RATIO_DECIMALS)
+    return out.sort_values(keys, ignore_index=True)
+
+
+def load_statement(statement, operands, formats=("csv",), root=PARQUET_ROOT):
+    """
+    งบที่ประมวลผลแล้ว: เปิด parquet → อ่าน columnar เฉพาะ KEY_COLUMNS + operands (BS/IC เขียน parquet คู่กับ SQLite ทุกรอบ)
+    ยังไม่มีชุด parquet (เช่นเพิ่งเปิด parquet และงบฝั่งนี้ยังไม่ถูกประมวลผลใหม่) → ตาราง SQLite
+    """
+    if parquet_enabled(formats):
+        df = read_statements(statement, columns=list(KEY_COLUMNS) + list(operands), root=root)
+        if not df.empty:
+            return df
+    return read_statement_table(statement)
+
+
+def process_ratios(formats=("csv",)):
+    """คำนวณใหม่จากงบ bs/ic ล่าสุด (งบฝั่งใดยังไม่เคยประมวลผล → ได้ 0 แถว)"""
+    os.makedirs(PROCESSED_DATA_FOLDER, exist_ok=True)
+    ratios_df = compute_ratios(load_statement("bs", BS_OPERANDS, formats), load_statement("ic", IC_OPERANDS, formats))
+
+    ratios_df.to_csv(OUTPUT_CSV_PATH, index=False, encoding="utf-8")
+    write_statement_index(ratios_df, "ratios", RATIO_COLUMNS)
+    if parquet_enabled(formats):
+        write_partitioned(ratios_df, "ratios", "all", replace=True)
+    return {"message": "Ratios processed", "rows": len(ratios_df), "data": ratios_df}
@@ -0,0 +1,119 @@
+# services/response_cache.py
+"""
+cache ถาวร (SQLite) ของ response จาก CorpusX get/data — เสียเงินต่อ inquiry จึงไม่ขอซ้ำถ้ายังไม่หมดอายุ
+
+key = registrationId | companyName | status | dataSet | dataField (เรียง + ตัดซ้ำ) | periodFrom | periodTo | fsType | language
+(ทุกพารามิเตอร์ของ inquiry ยกเว้น systemId — dataSet ต่างกันได้ response ต่างกัน)
+อายุ (TTL) ตามชนิด dataset: TSIC แทบไม่เปลี่ยน เก็บนาน / credit score เปลี่ยนบ่อย เก็บสั้น
+dataField ที่ครอบหลาย dataset ใช้ TTL ที่สั้นที่สุดในนั้น
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from services.corpusx_datasets import DATASETS
+
+CACHE_PATH = os.path.join("processed_data", "corpusx_cache.sqlite")
+
+DAY = 24 * 60 * 60
+DATASET_TTL = {
+    "tsic": 180 * DAY,
+    "profile": 30 * DAY,
+    "directors_shareholders": 30 * DAY,
+    "financial_information": 90 * DAY,   # งบประจำปี เปลี่ยนเมื่อมีการยื่นงบใหม่
+    "financial_ratio": 90 * DAY,
+    "credit_recommendation": 7 * DAY,
+    "credit_score": 7 * DAY,
+}
+DEFAULT_TTL = 7 * DAY
+
+
+def _codes(data_field):
+    if isinstance(data_field, str):
+        data_field = data_field.split(",")
+    return sorted({c.strip() for c in data_field if c and c.strip()})
+
+
+def cache_key(params):
+    """params = inquiry_params ของ CorpusXClient (registrationId / dataField / periodFrom / ...)"""
+    return "|".join((
+        str(params.get("registrationId", "")),
+        str(params.get("companyName", "")),
+        str(params.get("status", "")),
+        str(params.get("dataSet", "")),
+        ",".join(_codes(params.get("dataField", ""))),
+        str(params.get("periodFrom", "")),
+        str(params.get("periodTo", "")),
+        str(params.get("fsType", "")),
+        str(params.get("language", "")),
+    ))
+
+
+def ttl_for_fields(data_field, ttls=DATASET_TTL):
+    codes = set(_codes(data_field))
+    matched = [ttls.get(ds.name, DEFAULT_TTL) for ds in DATASETS.values() if codes & set(ds.fields)]
+    return min(matched) if matched else DEFAULT_TTL
+
+
+def is_success(response):
+    status = (response or {}).get("inquiryStatus") or {}
+    return str(status.get("result", "")).lower() == "success"
+
+
+class ResponseCache:
+    """ใช้ร่วมกันหลาย thread ได้ (connection เดียว + lock)"""
+
+    def __init__(self, path=CACHE_PATH, ttls=None):
+        self.path = path
+        self.ttls = dict(DATASET_TTL, **(ttls or {}))
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, registration_id TEXT, fetched_at REAL, expires_at REAL, body TEXT)"
+            )
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def ttl_for(self, dataset=None, data_field=""):
+        if dataset is not None:
+            return self.ttls.get(dataset, DEFAULT_TTL)
+        return ttl_for_fields(data_field, self.ttls)
+
+    def get(self, params):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM responses WHERE key = ? AND expires_at > ?", (cache_key(params), time.time())
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, params, response, ttl=None):
+        """เก็บเฉพาะ inquiry ที่สำเร็จ (inquiryStatus.result = Success)"""
+        if not is_success(response):
+            return False
+        ttl = self.ttl_for(data_field=params.get("dataField", "")) if ttl is None else ttl
+        now = time.time()
+        body = json.dumps(response, ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, registration_id, fetched_at, expires_at, body) VALUES (?, ?, ?, ?, ?)",
+                (cache_key(params), str(params.get("registrationId", "")), now, now + ttl, body),
+            )
+        return True
+
+    def purge_expired(self):
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
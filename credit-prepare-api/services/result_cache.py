@@ -0,0 +1,105 @@
+# services/result_cache.py
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+# จำนวน dataset ที่เก็บไว้ใน memory (เกินแล้วทิ้งตัวที่ไม่ได้ใช้นานที่สุด)
+CACHE_MAXSIZE = 16
+
+
+def folder_fingerprint(folder, prefix="", suffix=".csv"):
+    """
+    ลายนิ้วมือของไฟล์ดิบใน folder: (ชื่อ, ขนาด, mtime_ns) ของทุกไฟล์ที่ตรง prefix/suffix
+    stat อย่างเดียวไม่อ่านเนื้อไฟล์ — ไฟล์ถูกเพิ่ม/ลบ/แก้ → fingerprint เปลี่ยน → cache หมดอายุ
+    """
+    if not os.path.isdir(folder):
+        return ()
+    entries = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.startswith(prefix) and entry.name.endswith(suffix):
+                st = entry.stat()
+                entries.append((entry.name, st.st_size, st.st_mtime_ns))
+    return tuple(sorted(entries))
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    fingerprint: tuple
+    body: bytes          # JSON (records) ที่ serialize ไว้แล้ว ส่งออกได้ทันที
+    etag: str
+    rows: int
+    created_at: float
+
+
+def make_entry(fingerprint, df):
+    body = df.to_json(orient="records").encode("utf-8")
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    return CachedResult(fingerprint, body, etag, len(df), time.time())
+
+
+class ResultCache:
+    """
+    LRU ใน memory ของผลลัพธ์ที่ประมวลผลแล้ว (thread-safe — FastAPI รัน endpoint แบบ sync ใน threadpool)
+    entry ใช้ได้ตราบที่ fingerprint ของ raw_data ยังเท่าเดิม
+    """
+
+    def __init__(self, maxsize=CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key, fingerprint):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.fingerprint != fingerprint:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, fingerprint, df):
+        return self.store(key, make_entry(fingerprint, df))
+
+    def store(self, key, entry):
+        """เก็บ entry ที่สร้างไว้แล้ว (เช่น make_entry ใน worker process ของ endpoint แบบ async)"""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get_or_compute(self, key, fingerprint, compute):
+        """
+        คืน entry ที่ยังไม่หมดอายุ ถ้าไม่มีเรียก compute() → DataFrame แล้วเก็บ
+        request ที่มาพร้อมกันด้วย key เดียวกันรอผลเดียวกัน (ไม่ประมวลผลซ้ำ)
+        """
+        entry = self.get(key, fingerprint)
+        if entry is not None:
+            return entry
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self.get(key, fingerprint)
+            if entry is None:
+                entry = self.put(key, fingerprint, compute())
+            return entry
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+def etag_matches(if_none_match, etag):
+    # If-None-Match อาจมีหลายค่า (คั่นด้วย ,) หรือเป็น weak (W/"...") หรือ *
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
@@ -0,0 +1,208 @@
+# services/stage_metrics.py
+"""
+จับเวลา / จำนวนแถว / จำนวน byte ต่อ stage ของ pipeline (file discovery, CSV parse, numeric coercion, CSV write,
+JSON serialize, downstream POST) แล้วเปิดให้ Prometheus ดึงผ่าน GET /metrics
+
+    with METRICS.stage("bs", "csv_parse") as s:
+        df = read_csv(...)
+        s.add(rows=len(df), bytes=os.path.getsize(path))
+
+    with METRICS.trace() as t:          # เก็บ breakdown ของ request นี้ด้วย (นอกจากสะสมใน registry)
+        ...
+    t.summary()  → {"csv_parse": {"count": 20, "seconds": 0.41, "rows": 600, "bytes": 81234}, ...}
+
+    METRICS.render()  → text format ของ Prometheus (histogram เวลา + counter rows/bytes ต่อ pipeline/stage)
+
+profile_request(name): cProfile / pyinstrument ต่อ request เปิดด้วย env PROFILE_REQUESTS=cprofile|pyinstrument
+ไฟล์ผลอยู่ที่ PROFILE_DIR (ค่าเริ่มต้น processed_data/profiles)
+"""
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from datetime import datetime
+
+# ขอบบนของ bucket (วินาที) — ตั้งแต่ parse ไฟล์เดียว (ms) ถึงทั้ง request (หลายสิบวินาที)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PREFIX = "credit_prepare"
+
+PROFILE_MODE = os.getenv("PROFILE_REQUESTS", "").strip().lower()
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join("processed_data", "profiles"))
+
+_current_trace = contextvars.ContextVar("stage_trace", default=None)
+
+
+class _Series:
+    __slots__ = ("buckets", "count", "seconds", "rows", "bytes")
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+
+
+class StageTimer:
+    """ค่าที่ stage รายงานเพิ่ม (rows / bytes) — ได้จาก METRICS.stage(...)"""
+    __slots__ = ("rows", "bytes")
+
+    def __init__(self):
+        self.rows = 0
+        self.bytes = 0
+
+    def add(self, rows=0, bytes=0):
+        self.rows += rows
+        self.bytes += bytes
+
+
+class Trace:
+    """
+    breakdown ของ request เดียว (stage → รวม count / seconds / rows / bytes)
+    events = observation ดิบ (pipeline, stage, seconds, rows, bytes) ส่งข้าม process แล้ว replay ได้
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.events = []
+        self.started = time.perf_counter()
+
+    def record(self, pipeline, stage, seconds, rows, nbytes):
+        self.events.append((pipeline, stage, seconds, rows, nbytes))
+        s = self.stages.setdefault(stage, {"count": 0, "seconds": 0.0, "rows": 0, "bytes": 0})
+        s["count"] += 1
+        s["seconds"] += seconds
+        s["rows"] += rows
+        s["bytes"] += nbytes
+
+    def summary(self):
+        out = {name: dict(s, seconds=round(s["seconds"], 4)) for name, s in self.stages.items()}
+        out["total"] = {"seconds": round(time.perf_counter() - self.started, 4)}
+        return out
+
+
+class StageMetrics:
+    """registry ใช้ร่วมกันทุก thread (lock เดียว — สะสมแค่ตัวเลขไม่กี่ตัวต่อ stage)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, pipeline, stage, seconds, rows=0, nbytes=0, record_trace=True):
+        with self._lock:
+            s = self._series.get((pipeline, stage))
+            if s is None:
+                s = self._series[(pipeline, stage)] = _Series()
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    s.buckets[i] += 1
+            s.count += 1
+            s.seconds += seconds
+            s.rows += rows
+            s.bytes += nbytes
+        trace = _current_trace.get()
+        if trace is not None and record_trace:
+            trace.record(pipeline, stage, seconds, rows, nbytes)
+
+    def replay(self, events, record_trace=True):
+        """observation ที่เก็บจาก process อื่น (Trace.events ของ worker ใน ProcessPoolExecutor)"""
+        for pipeline, stage, seconds, rows, nbytes in events:
+            self.observe(pipeline, stage, seconds, rows, nbytes, record_trace=record_trace)
+
+    def current_trace(self):
+        return _current_trace.get()
+
+    @contextlib.contextmanager
+    def stage(self, pipeline, stage):
+        timer = StageTimer()
+        t0 = time.perf_counter()
+        try:
+            yield timer
+        finally:
+            self.observe(pipeline, stage, time.perf_counter() - t0, timer.rows, timer.bytes)
+
+    @contextlib.contextmanager
+    def trace(self):
+        trace = Trace()
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: (list(s.buckets), s.count, s.seconds, s.rows, s.bytes) for key, s in self._series.items()}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        snap = sorted(self.snapshot().items())
+        name = f"{PREFIX}_stage_duration_seconds"
+        lines = [f"# HELP {name} Time spent in each pipeline stage.", f"# TYPE {name} histogram"]
+        for (pipeline, stage), (buckets, count, seconds, _, _) in snap:
+            labels = f'pipeline="{pipeline}",stage="{stage}"'
+            for bound, n in zip(BUCKETS, buckets):
+                lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {n}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {seconds:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+        for metric, index, help_text in (("rows", 3, "Rows handled by each pipeline stage."),
+                                         ("bytes", 4, "Bytes read, written or sent by each pipeline stage.")):
+            mname = f"{PREFIX}_stage_{metric}_total"
+            lines += [f"# HELP {mname} {help_text}", f"# TYPE {mname} counter"]
+            for (pipeline, stage), values in snap:
+                lines.append(f'{mname}{{pipeline="{pipeline}",stage="{stage}"}} {values[index]}')
+        return "\n".join(lines) + "\n"
+
+
+METRICS = StageMetrics()
+
+
+# ---------------- profiling ---------------- #
+
+@contextlib.contextmanager
+def profile_request(name, mode=None, out_dir=None):
+    """
+    profile โค้ดในบล็อกแล้วเขียนไฟล์ <out_dir>/<name>_<เวลา>.prof (cProfile) หรือ .html (pyinstrument)
+    mode ว่าง = ไม่ทำอะไร (ค่าเริ่มต้นจาก env PROFILE_REQUESTS) — yield path ของไฟล์ (หรือ None)
+    """
+    mode = PROFILE_MODE if mode is None else mode
+    if not mode:
+        yield None
+        return
+    out_dir = out_dir or PROFILE_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+
+    if mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError as e:
+            raise RuntimeError("PROFILE_REQUESTS=pyinstrument ต้องติดตั้ง pyinstrument: pip install pyinstrument") from e
+        path = os.path.join(out_dir, f"{name}_{stamp}.html")
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield path
+        finally:
+            profiler.stop()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+        return
+
+    if mode != "cprofile":
+        raise ValueError(f"PROFILE_REQUESTS ไม่รู้จัก: {mode} (ใช้ cprofile หรือ pyinstrument)")
+    import cProfile
+    path = os.path.join(out_dir, f"{name}_{stamp}.prof")
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield path
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
@@ -0,0 +1,109 @@
+# services/statement_index.py
+"""
+ดัชนี SQLite ของงบที่ประมวลผลแล้ว (processed_data/statements.sqlite)
+1 statement (bs / ic) = 1 ตาราง มี index (company_id, year) ไว้ตอบ query รายบริษัทโดยไม่ต้องโหลด CSV ทั้งไฟล์
+"""
+import math
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+INDEX_PATH = os.path.join("processed_data", "statements.sqlite")
+KEY_COLUMNS = ("company_id", "company_name", "year")
+
+_local = threading.local()
+
+
+def _quote(name):
+    # ชื่อหัวบัญชีมีช่องว่าง / ' / วงเล็บ → ใช้เป็น identifier ต้องครอบด้วย "
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _to_number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def write_statement_index(df, statement, headers, path=INDEX_PATH):
+    """
+    เขียน processed_df ทั้งชุดลงตาราง <statement> แทนของเดิม (สร้างใหม่ทุกครั้งเหมือน CSV)
+    ทำใน transaction เดียว — ฝั่งที่อ่านอยู่ (WAL) เห็นชุดเก่าจนกว่าจะ commit
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table = _quote(statement)
+    columns = ", ".join(f"{_quote(h)} REAL" for h in headers)
+    placeholders = ", ".join("?" * (len(KEY_COLUMNS) + len(headers)))
+
+    rows = [
+        (str(r[0]), str(r[1]), int(r[2]), *(_to_number(v) for v in r[3:]))
+        for r in df[list(KEY_COLUMNS) + list(headers)].itertuples(index=False, name=None)
+    ]
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute(
+                f"CREATE TABLE {table} (company_id TEXT NOT NULL, company_name TEXT, year INTEGER NOT NULL, {columns})"
+            )
+            conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+            conn.execute(f"CREATE INDEX {_quote(f'ix_{statement}_company_year')} ON {table} (company_id, year)")
+    finally:
+        conn.close()
+    return len(rows)
+
+
+def _connection(path):
+    # 1 connection (read-only) ต่อ thread ใช้ซ้ำทุก request — ไม่ต้องเปิดไฟล์ใหม่ทุกครั้ง
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        conns[path] = conn
+    return conn
+
+
+def query_statements(statement, company_id, year=None, path=INDEX_PATH):
+    """คืน list ของ dict (เรียงตามปี) ของบริษัท company_id — ไม่มีข้อมูล / ยังไม่เคยประมวลผลคืน []"""
+    if not os.path.exists(path):
+        return []
+    sql = f"SELECT * FROM {_quote(statement)} WHERE company_id = ?"
+    params = [str(company_id)]
+    if year is not None:
+        sql += " AND year = ?"
+        params.append(int(year))
+    sql += " ORDER BY year"
+    try:
+        cur = _connection(path).execute(sql, params)
+    except sqlite3.OperationalError:
+        # ยังไม่มีตาราง statement นี้
+        return []
+    names = [d[0] for d in cur.description]
+    return [
+        {
+            name: int(value) if isinstance(value, float) and value.is_integer() else value
+            for name, value in zip(names, row)
+        }
+        for row in cur.fetchall()
+    ]
+
+
+def read_statement_table(statement, path=INDEX_PATH):
+    """โหลดตาราง <statement> ทั้งตารางเป็น DataFrame (ยังไม่มี → DataFrame ว่าง)"""
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    conn = sqlite3.connect(path)
+    try:
+        return pd.read_sql_query(f"SELECT * FROM {_quote(statement)}", conn)
+    except (sqlite3.OperationalError, pd.errors.DatabaseError):
+        return pd.DataFrame()
+    finally:
+        conn.close()
@@ -0,0 +1,82 @@
+# services/statement_pool.py
+"""
+ประมวลผล BS/IC ใน ProcessPoolExecutor ให้ endpoint แบบ async — event loop ไม่ต้องรอ pandas (CPU) เลย
+
+    entry, events = await process_statements_async("bs", fingerprint, formats)
+
+- worker อ่าน CSV → DataFrame → serialize JSON (make_entry) ในตัวเอง ส่งกลับแค่ CachedResult (bytes) ไม่ส่ง DataFrame
+- เวลาแต่ละ stage ใน worker กลับมาเป็น events แล้ว replay เข้า METRICS ของ process หลัก (GET /metrics เห็นครบ)
+- request ที่มาพร้อมกันด้วย kind + fingerprint เดียวกันรอผลเดียวกัน (ไม่ประมวลผลซ้ำ)
+- kind เดียวกันรันทีละงาน (เขียน processed_data/ ไฟล์เดียวกัน) — bs กับ ic ขนานกันได้
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from services.bs_processor import process_bs_statements
+from services.ic_processor import process_ic_statements
+from services.result_cache import make_entry
+from services.stage_metrics import METRICS
+
+PROCESSORS = {
+    "bs": process_bs_statements,
+    "ic": process_ic_statements,
+}
+# จำนวน worker process (งานต่อ kind รันทีละงานอยู่แล้ว 2 ตัวพอสำหรับ bs + ic)
+PROCESS_WORKERS = int(os.getenv("PROCESS_WORKERS", "2"))
+
+_pool = None
+_locks = {}
+_inflight = {}
+
+
+def process_statements_job(kind, fingerprint, formats):
+    """รันใน worker process → (CachedResult, Trace.events)"""
+    with METRICS.trace() as trace:
+        result = PROCESSORS[kind](formats=formats)
+        with METRICS.stage(kind, "json_serialize") as t:
+            entry = make_entry(fingerprint, result["data"])
+            t.add(rows=entry.rows, bytes=len(entry.body))
+    return entry, trace.events
+
+
+def process_pool():
+    global _pool
+    if _pool is None:
+        # spawn: process หลักมี thread ของ uvicorn/anyio อยู่แล้ว — fork ตอนนั้นเสี่ยง lock ค้างใน child
+        _pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def _run_job(kind, fingerprint, formats):
+    lock = _locks.setdefault(kind, asyncio.Lock())
+    async with lock:
+        loop = asyncio.get_running_loop()
+        entry, events = await loop.run_in_executor(process_pool(), process_statements_job, kind, fingerprint, formats)
+    METRICS.replay(events, record_trace=False)   # registry ครั้งเดียว ต่อให้มีหลาย request รอผลนี้
+    return entry, events
+
+
+async def process_statements_async(kind, fingerprint, formats=("csv",)):
+    """→ (CachedResult, events) — events ใส่ trace ของ request ปัจจุบันให้แล้ว"""
+    key = (kind, fingerprint, tuple(formats) if not isinstance(formats, str) else formats)
+    future = _inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_run_job(kind, fingerprint, formats))
+        _inflight[key] = future
+        future.add_done_callback(lambda _: _inflight.pop(key, None))
+    # shield: caller ที่ถูกยกเลิก (client ตัดการเชื่อมต่อ) ไม่ยกเลิกงานที่คนอื่นรออยู่
+    entry, events = await asyncio.shield(future)
+    trace = METRICS.current_trace()
+    if trace is not None:
+        for event in events:
+            trace.record(*event)
+    return entry, events
@@ -0,0 +1,244 @@
+# services/synthetic_data.py
+"""
+สร้างไฟล์ input สังเคราะห์ตามรูปแบบจริงของแต่ละ feed — ใช้กับ script_benchmark.py (วัดเวลาแบบไม่ต้องมีข้อมูลลูกค้า)
+
+    write_bs_csvs("raw_data/bs", companies=200, years=3)          BS_<id>_<name>.csv  (BOL: ปีในแถวแรก คอลัมน์ 3+, ค่าแถว 3-52)
+    write_ic_csvs("raw_data/ic", companies=200, years=3)          IC_<id>_<name>.csv  (14 รายการ)
+    write_invoice_csv("raw_data/inv/Invoice_052025.csv", 100_000) หัวคอลัมน์แบบไฟล์ invoice เก่า (+ คอลัมน์ที่ไม่ใช้)
+    write_po_csv("raw_data/po/PO_052025.csv", 100_000)
+    amount_strings(1_000_000)                                     คอลัมน์ยอดเงินแบบข้อความ (ไม่เขียนไฟล์) สำหรับ numeric_cleaner
+    write_dbd_workbooks("downloads", companies=50, years=3)       <tax_id>_{balance,income,ratios}.xlsx (ต้องมี openpyxl)
+    write_scanned_pdfs("raw_data/scan", files=5, pages=4)         PDF ภาพสแกน (หน้าละ 1 รูป grayscale ไม่มี text layer)
+
+ทุกตัวกำหนด seed ได้ → ไฟล์เหมือนเดิมทุกครั้ง (เทียบผลข้าม commit ได้)
+"""
+import csv
+import os
+import random
+import zlib
+
+from services.bs_processor import FINAL_HEADERS
+from services.ic_processor import IC_HEADERS
+
+FIRST_YEAR = 2021   # ค.ศ.
+
+INVOICE_HEADER = (
+    "Invoice No.", "Invoice Date", "PO No.", "PO Date", "Supplier Code", "Supplier Name", "Buyer Code",
+    "Invoice Amount (Exclude VAT)", "Invoice VAT Amount", "Invoice Net Amount (Include VAT)", "Remark",
+)
+PO_HEADER = (
+    "Supplier Name", "Buyer Name", "PO No.", "PO Date", "PO Amount (Exclude VAT)", "PO VAT Amount",
+    "PO Net Amount (Include VAT)", "PO Shipment Date", "PO Payment Term", "Remark",
+)
+
+# ชื่อรายการตั้งต้นของ DBD (สคริปต์ benchmark ส่งชื่อจาก mapping ของตัวอ่านแต่ละตัวมาแทนได้)
+DBD_LABELS = {
+    "balance": ("ลูกหนี้การค้า", "สินค้าคงเหลือ", "สินทรัพย์หมุนเวียน", "สินทรัพย์ไม่หมุนเวียน", "สินทรัพย์รวม",
+                "หนี้สินหมุนเวียน", "หนี้สินไม่หมุนเวียน", "หนี้สินรวม", "ส่วนของผู้ถือหุ้น",
+                "หนี้สินรวมและส่วนของผู้ถือหุ้น"),
+    "income": ("รายได้หลัก", "รายได้รวม", "ต้นทุนขาย", "กำไร(ขาดทุน) ขั้นต้น", "ค่าใช้จ่ายในการขายและบริหาร",
+               "รายจ่ายรวม", "ดอกเบี้ยจ่าย", "กำไร(ขาดทุน) ก่อนภาษี", "ภาษีเงินได้", "กำไร(ขาดทุน) สุทธิ"),
+    "ratios": ("อัตราส่วนทุนหมุนเวียน(เท่า)", "อัตราส่วนหนี้สินรวมต่อส่วนของผู้ถือหุ้น (เท่า)",
+               "อัตราผลตอบแทนจากสินทรัพย์รวม(ROA) (%)", "อัตราผลตอบแทนจากส่วนของผู้ถือหุ้น(ROE) (%)"),
+}
+DBD_TITLES = {"balance": "งบแสดงฐานะการเงิน", "income": "งบกำไรขาดทุน", "ratios": "อัตราส่วนทางการเงินที่สำคัญ"}
+
+
+def company_ids(n, seed=0):
+    """เลขนิติบุคคล 13 หลักที่ไม่ซ้ำกัน (ขึ้นต้น 0105 แบบบริษัทจำกัดในกรุงเทพฯ)"""
+    rng = random.Random(seed)
+    return [f"0105{n_:09d}" for n_ in rng.sample(range(10 ** 9), n)]
+
+
+def _years(years, first_year=FIRST_YEAR):
+    return list(range(first_year, first_year + years))
+
+
+def _write_statement_csv(path, headers, years, rng):
+    width = 3 + len(years)
+    rows = [["", "", "Unit: Baht"] + [f"Year {y}" for y in years],
+            [""] * width,
+            ["", "", ""] + ["Amount"] * len(years)]
+    for label in headers:
+        rows.append(["", label, ""] + [f"{rng.uniform(-5e5, 5e7):.2f}" for _ in years])
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(rows)
+
+
+def write_bs_csvs(folder, companies=100, years=3, seed=0):
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for i, tax_id in enumerate(company_ids(companies, seed)):
+        path = os.path.join(folder, f"BS_{tax_id}_Company{i:05d}.csv")
+        _write_statement_csv(path, FINAL_HEADERS, _years(years), rng)
+        paths.append(path)
+    return paths
+
+
+def write_ic_csvs(folder, companies=100, years=3, seed=0):
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed + 1)
+    paths = []
+    for i, tax_id in enumerate(company_ids(companies, seed)):
+        path = os.path.join(folder, f"IC_{tax_id}_Company{i:05d}.csv")
+        _write_statement_csv(path, IC_HEADERS, _years(years), rng)
+        paths.append(path)
+    return paths
+
+
+def _th_date(rng, year=2568):
+    return f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{year}"
+
+
+def _amount_triplet(rng):
+    excl = round(rng.uniform(100, 500_000), 2)
+    vat = round(excl * 0.07, 2)
+    return f"{excl:,.2f}", f"{vat:,.2f}", f"{excl + vat:,.2f}"
+
+
+def amount_strings(rows=100_000, seed=0):
+    """ยอดเงินแบบข้อความตามไฟล์จริง: "1,234.50" ปน "-", "–", ค่าว่าง, "(1,250.00)" และ None"""
+    rng = random.Random(seed + 4)
+    special = ("-", "–", "", " (1,250.00) ", None)
+    return [rng.choice(special) if rng.random() < 0.05 else f"{rng.uniform(0, 1_000_000):,.2f}" for _ in range(rows)]
+
+
+def write_invoice_csv(path, rows=100_000, seed=0, suppliers=500):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(INVOICE_HEADER)
+        for i in range(rows):
+            s = rng.randrange(suppliers)
+            w.writerow((f"IV{i:08d}", _th_date(rng), f"PO{i // 3:08d}", _th_date(rng), f"S{s:05d}",
+                        f"บริษัท ผู้ขาย {s} จำกัด", f"B{rng.randrange(50):03d}", *_amount_triplet(rng), ""))
+    return path
+
+
+def write_po_csv(path, rows=100_000, seed=0, suppliers=500):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    rng = random.Random(seed + 1)
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(PO_HEADER)
+        for i in range(rows):
+            s = rng.randrange(suppliers)
+            w.writerow((f"บริษัท ผู้ขาย {s} จำกัด", f"ผู้ซื้อ {rng.randrange(50)}", f"PO{i:08d}", _th_date(rng),
+                        *_amount_triplet(rng), _th_date(rng), rng.choice(("30", "45", "60", "Credit 30 days")), ""))
+    return path
+
+
+def write_dbd_workbooks(folder, companies=20, years=3, seed=0, labels=None, kinds=("balance", "income", "ratios"),
+                        first_year=FIRST_YEAR):
+    """
+    <tax_id>_<kind>.xlsx แบบไฟล์ที่ดาวน์โหลดจาก DBD: ชื่อตาราง / หน่วย / หัวปี (พ.ศ.) คู่กับ %เปลี่ยนแปลง
+    ตารางกว้าง (years มาก ๆ) ให้ first_year ย้อนไปก่อน — ตัวอ่านรับ พ.ศ. ไม่เกิน 2600
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError as e:
+        raise RuntimeError("ต้องติดตั้ง openpyxl เพื่อสร้างไฟล์ DBD: pip install openpyxl") from e
+
+    labels = dict(DBD_LABELS, **(labels or {}))
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed + 2)
+    be_years = [y + 543 for y in _years(years, first_year)]
+    paths = []
+    for tax_id in company_ids(companies, seed):
+        for kind in kinds:
+            wb = Workbook()
+            ws = wb.active
+            ws.append([DBD_TITLES[kind]])
+            ws.append(["หน่วย : บาท"])
+            header = ["รายการ"]
+            for y in be_years:
+                header += [str(y), "%เปลี่ยนแปลง"]
+            ws.append(header)
+            for label in labels[kind]:
+                row = [label]
+                for _ in be_years:
+                    scale = 100 if kind == "ratios" else 5e7
+                    row += [round(rng.uniform(0, scale), 2), round(rng.uniform(-50, 50), 2)]
+                ws.append(row)
+            path = os.path.join(folder, f"{tax_id}_{kind}.xlsx")
+            wb.save(path)
+            paths.append(path)
+    return paths
+
+
+# ---------------- PDF ภาพสแกน ---------------- #
+
+def _scan_page(width, height, rng):
+    """รูป grayscale 8-bit: พื้นขาว + แถบดำแทนบรรทัดตัวอักษร + เส้นตาราง (สุ่มจากแถวต้นแบบไม่กี่แบบ ให้สร้างเร็ว)"""
+    grid_x = [int(width * f) for f in (0.08, 0.3, 0.55, 0.75, 0.92)]
+
+    def with_grid(row):
+        for gx in grid_x:
+            row[gx] = 0
+        return bytes(row)
+
+    blank = with_grid(bytearray(b"\xfa" * width))
+    glyphs = [with_grid(bytearray(rng.choice((30, 60, 245, 250)) if 90 < x < width - 90 else 250 for x in range(width)))
+              for _ in range(8)]
+    rows = []
+    next_line = 120
+    while len(rows) < height:
+        y = len(rows)
+        if next_line <= y < height - 120:
+            rows.extend(rng.choice(glyphs) for _ in range(14))
+            next_line = y + rng.randint(28, 40)
+        else:
+            rows.append(blank)
+    return b"".join(rows[:height])
+
+
+def _pdf(pages, width, height):
+    """PDF ขั้นต่ำ: ทุกหน้าเป็น image XObject (FlateDecode) เต็มหน้า A4"""
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(None)
+    pages_id = add(None)
+    kids = []
+    for i, data in enumerate(pages):
+        image = zlib.compress(data, 6)
+        img_id = add(b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+                     b"/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>\nstream\n" % (width, height, len(image))
+                     + image + b"\nendstream")
+        content = b"q 595 0 0 842 0 0 cm /Im0 Do Q"
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        kids.append(add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] /Resources << /XObject << /Im0 %d 0 R >> >> "
+                        b"/Contents %d 0 R >>" % (pages_id, img_id, content_id)))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    objects[pages_id - 1] = (b"<< /Type /Pages /Count %d /Kids [" % len(kids)
+                             + b" ".join(b"%d 0 R" % k for k in kids) + b"] >>")
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for n, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % n + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(out)
+
+
+def write_scanned_pdfs(folder, files=3, pages=3, seed=0, dpi=100, prefix="scan"):
+    """PDF ภาพล้วน (เหมือนเอกสารที่สแกนมา) ขนาด A4 ที่ dpi ที่กำหนด — ใช้วัดเวลา OCR ต่อหน้า"""
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed + 3)
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    paths = []
+    for i in range(files):
+        path = os.path.join(folder, f"{prefix}_{i:04d}.pdf")
+        with open(path, "wb") as f:
+            f.write(_pdf([_scan_page(width, height, rng) for _ in range(pages)], width, height))
+        paths.append(path)
+    return paths
@@ -0,0 +1,8 @@
+# tests/conftest.py
+# สคริปต์ / services อยู่ที่ราก credit-prepare-api (ไม่ใช่ package) → ให้ test import ได้ไม่ว่ารัน pytest จากไหน
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[1]
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
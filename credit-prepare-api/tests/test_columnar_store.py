@@ -0,0 +1,56 @@
+# tests/test_columnar_store.py
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from services.columnar_store import read_statements, write_partitioned
+from services.ratio_engine import BS_OPERANDS, IC_OPERANDS, compute_ratios, load_statement
+
+
+def _frame(company_ids, years, headers, value=1.0):
+    rows = [
+        {"company_id": c, "company_name": f"บริษัท {c}", "year": y, **{h: value for h in headers}}
+        for c in company_ids for y in years
+    ]
+    return pd.DataFrame(rows).astype({h: "float64" for h in headers})
+
+
+def test_replace_swaps_whole_statement(tmp_path):
+    root = str(tmp_path)
+    write_partitioned(_frame(["1"], [2022, 2023], ["a"]), "bs", "all", root=root, replace=True)
+    write_partitioned(_frame(["2"], [2024], ["a"], 2.0), "bs", "all", root=root, replace=True)
+    df = read_statements("bs", root=root)
+    assert df["company_id"].tolist() == ["2"] and df["year"].tolist() == ["2024"] and df["a"].tolist() == [2.0]
+    assert [p.name for p in tmp_path.iterdir()] == ["statement=bs"]
+
+
+def test_failed_replace_keeps_previous_data(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    write_partitioned(_frame(["1"], [2023], ["a"]), "bs", "all", root=root, replace=True)
+    calls = []
+
+    def to_parquet(self, *args, **kwargs):
+        calls.append(args)
+        if len(calls) > 1:
+            raise OSError("disk full")
+        return original(self, *args, **kwargs)
+
+    original = pd.DataFrame.to_parquet
+    monkeypatch.setattr(pd.DataFrame, "to_parquet", to_parquet)
+    with pytest.raises(OSError):
+        write_partitioned(_frame(["2"], [2024, 2025], ["a"]), "bs", "all", root=root, replace=True)
+    assert read_statements("bs", root=root)["company_id"].tolist() == ["1"]
+    assert [p.name for p in tmp_path.iterdir()] == ["statement=bs"]
+
+
+def test_ratios_read_operands_from_parquet(tmp_path):
+    bs = _frame(["1", "2"], [2023, 2024], list(BS_OPERANDS) + ["Cash"], 10.0)
+    ic = _frame(["1", "2"], [2023, 2024], list(IC_OPERANDS), 5.0)
+    write_partitioned(bs, "bs", "all", root=str(tmp_path), replace=True)
+    write_partitioned(ic, "ic", "all", root=str(tmp_path), replace=True)
+
+    loaded = load_statement("bs", BS_OPERANDS, "csv,parquet", root=str(tmp_path))
+    assert "Cash" not in loaded.columns
+    got = compute_ratios(loaded, load_statement("ic", IC_OPERANDS, "csv,parquet", root=str(tmp_path)))
+    assert got.equals(compute_ratios(bs, ic))
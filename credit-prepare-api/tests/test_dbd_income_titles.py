@@ -0,0 +1,31 @@
+# tests/test_dbd_income_titles.py
+"""
+_map_title (index ที่ compile ตอน import) ต้องให้ key เดียวกับ lookup ของ baseline (b004e62) ทุกชื่อ
+ค่าที่คาดไว้ได้จาก map_item_th_to_en ของ baseline — ปลายทาง (smf-api ImportDbdFinancial INCOME_COLS)
+รับเฉพาะ profit_before_tax / net_profit
+"""
+import pytest
+
+from script_read_dbd_income import map_item_th_to_en
+
+BASELINE = [
+    ("รายได้หลัก", "net_revenue"),
+    ("รายได้รวม", "total_revenue"),
+    (" ต้นทุนขาย ", "cost_of_goods_sold"),
+    ("ภาษีเงินได้", "income_tax_expenses"),
+    ("กำไร(ขาดทุน) ขั้นต้น", "gross_profit"),
+    ("กำไร(ขาดทุน) ก่อนภาษี", "profit_before_tax"),
+    ("กำไร(ขาดทุน) สุทธิ", "net_profit"),
+    ("กำไร (ขาดทุน)\xa0สุทธิ", "net_profit"),
+    ("กำไรขาดทุน ก่อนภาษี", "income_before_tax"),   # _canon_title คงช่องว่างหลัง ")" ที่เติมเอง
+    ("กำไร（ขาดทุน）ก่อนภาษี", "profit_before_tax"),
+    ("กำไร(ขาดทุน) สุทธิสำหรับปี", "net_profit"),
+    ("​รายจ่ายรวม", "total_expenses"),
+    ("รายการอื่น", "unknown"),
+    (None, "unknown"),
+]
+
+
+@pytest.mark.parametrize("title, expected", BASELINE)
+def test_matches_baseline(title, expected):
+    assert map_item_th_to_en(title) == expected
@@ -0,0 +1,46 @@
+# tests/test_dbd_year_json.py
+"""
+golden test ของ dataframe_to_year_json (balance / income): รันสคริปต์จริงกับ workbook ตัวอย่างใน tests/data/dbd
+แล้วเทียบ JSON ทีละไบต์กับ tests/data/dbd/expected
+
+- expected ทุกไฟล์ (balance และ income) เป็นผลของสคริปต์ baseline (b004e62) กับ workbook ชุดเดียวกันตรง ๆ
+  ไม่แก้มือ — สร้างใหม่: python script_read_dbd_{balance,income}.py --folder tests/data/dbd --outdir ... บน tree b004e62
+- workbook: 0105000000001 = กรณีขอบ ("-", ค่าว่าง, วงเล็บ, ชื่อไม่รู้จัก, NBSP), 0105000000002 = ปีเรียงใหม่ → เก่า
+  ที่เหลือ = synthetic_data 3 / 12 ปี
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("openpyxl")
+
+APP_DIR = Path(__file__).resolve().parents[1]
+DATA_DIR = APP_DIR / "tests" / "data" / "dbd"
+EXPECTED_DIR = DATA_DIR / "expected"
+
+
+def _run_script(script, outdir):
+    subprocess.run(
+        [sys.executable, script, "--folder", str(DATA_DIR), "--outdir", str(outdir)],
+        cwd=APP_DIR, check=True, capture_output=True,
+    )
+
+
+@pytest.fixture(scope="module")
+def outdir(tmp_path_factory):
+    out = tmp_path_factory.mktemp("dbd_json")
+    _run_script("script_read_dbd_balance.py", out)
+    _run_script("script_read_dbd_income.py", out)
+    return out
+
+
+@pytest.mark.parametrize("kind", ["balance", "income"])
+def test_matches_golden(outdir, kind):
+    expected = sorted(EXPECTED_DIR.glob(f"*_{kind}.json"))
+    assert expected
+    for path in expected:
+        got = outdir / path.name
+        assert got.exists(), path.name
+        assert got.read_bytes() == path.read_bytes(), path.name
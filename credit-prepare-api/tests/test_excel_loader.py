@@ -0,0 +1,34 @@
+# tests/test_excel_loader.py
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("openpyxl")
+
+from services import excel_loader
+
+
+def _workbook(path, sheets=3):
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for i in range(sheets):
+            pd.DataFrame({"a": [i, i + 1], "b": ["x", "y"]}).to_excel(writer, sheet_name=f"S{i}", index=False)
+    return str(path)
+
+
+def _pool_workers_inside_worker():
+    return excel_loader.default_workers()
+
+
+def test_no_nested_pool_inside_worker():
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(_pool_workers_inside_worker).result() == 1
+
+
+def test_worker_reads_sheets_in_process(tmp_path, monkeypatch):
+    path = _workbook(tmp_path / "book.xlsx")
+    monkeypatch.setattr(excel_loader.multiprocessing, "parent_process", lambda: object())
+    monkeypatch.setattr(excel_loader, "ProcessPoolExecutor", None)   # ถ้าสร้าง pool จะพัง
+    sheets = excel_loader.read_excel_sheets(path)
+    assert [name for name, _ in sheets] == ["S0", "S1", "S2"]
+    assert sheets[2][1]["a"].tolist() == [2, 3]
@@ -0,0 +1,93 @@
+# tests/test_old_feed_loaders.py
+"""
+loader invoice / PO แบบเก่า (CSV): ค่าที่ออกต้องเหมือน loader เดิม (b004e62) สำหรับไฟล์ที่อ่านจบใน chunk เดียว
+ไฟล์ที่เกิน CSV_CHUNK_ROWS แถว pandas อนุมานชนิดเลขที่เอกสารแยกต่อ chunk ("4500" / "4500.0")
+"""
+import pandas as pd
+
+from services import inv_old_processor, po_old_processor
+from services.inv_old_processor import iter_old_invoice_chunks, load_old_invoice_data
+from services.po_old_processor import load_old_po_data
+
+INVOICE_HEADER = ("Invoice No.,Invoice Date,PO No.,PO Date,Supplier Code,Buyer Code,"
+                  "Invoice Amount (Exclude VAT),Invoice VAT Amount,Invoice Net Amount (Include VAT)")
+
+
+def _write(path, lines, encoding="utf-8"):
+    path.write_text("\n".join(lines) + "\n", encoding=encoding)
+    return str(path)
+
+
+def test_invoice_numbers_follow_read_csv_inference(tmp_path):
+    path = _write(tmp_path / "inv.csv", [
+        INVOICE_HEADER,
+        '00123,01/02/2567,4500,2024-01-01,0007,B1,"1,234.50",70,-',
+        "00124,01/02/2567,,2024-01-02,0008,B2,100,7,107",
+    ])
+    df = load_old_invoice_data(path)
+    assert df["invoice_no"].tolist() == ["123", "124"]
+    assert df["po_no"].tolist() == ["4500.0", ""]
+    assert df["supplier_code"].tolist() == ["7", "8"]
+    assert df["amount_excl_vat"].tolist() == [1234.5, 100.0]
+    assert df["amount_incl_vat"].tolist() == [0.0, 107.0]
+    assert df["source_sheet"].tolist() == ["CSV", "CSV"]
+
+
+def test_chunks_concat_to_whole_file(tmp_path):
+    rows = [INVOICE_HEADER] + [f"{i:05d},01/02/2567,{4500 + i},2024-01-01,{i % 7:04d},B1,{i}.25,1,2" for i in range(25)]
+    path = _write(tmp_path / "inv.csv", rows)
+    chunks = list(iter_old_invoice_chunks(path, chunksize=4))
+    assert len(chunks) == 7
+    whole = load_old_invoice_data(path)
+    assert sum(len(c) for c in chunks) == len(whole) == 25
+    assert [v for c in chunks for v in c["invoice_no"]] == whole["invoice_no"].tolist()
+
+
+def test_all_empty_file_gives_empty_frame(tmp_path, monkeypatch):
+    monkeypatch.setattr(inv_old_processor, "CSV_CHUNK_ROWS", 2)
+    path = _write(tmp_path / "inv.csv", [INVOICE_HEADER] + [",,,,,,,,"] * 5)
+    assert load_old_invoice_data(path).empty
+
+
+def test_leading_empty_chunk_is_kept_when_file_has_data(tmp_path):
+    path = _write(tmp_path / "inv.csv", [INVOICE_HEADER, ",,,,,,,,", ",,,,,,,,", "1,01/02/2567,2,,3,B,4,5,6"])
+    chunks = list(iter_old_invoice_chunks(path, chunksize=2))
+    assert sum(len(c) for c in chunks) == 3
+
+
+def test_po_dates_and_amounts(tmp_path, monkeypatch):
+    monkeypatch.setattr(po_old_processor, "CSV_CHUNK_ROWS", 100)
+    path = _write(tmp_path / "po.csv", [
+        "# Supplier Name,PO No.,PO Date,PO Amount (Exclude VAT),PO VAT Amount,PO Net Amount (Include VAT),"
+        "PO Shipment Date,PO Payment Term",
+        "บริษัท ก,4500,05/02/2567,\"1,000.00\",,-,2024-03-01,30",
+        "บริษัท ข,4501,2024.12.31,(50),3.5,10,31/1/68,",
+        "บริษัท ค,4502,,7,,,not a date,60",
+    ], encoding="cp874")
+    df = load_old_po_data(path)
+    assert df["po_no"].tolist() == ["4500", "4501", "4502"]
+    assert df["po_date"].tolist()[:2] == ["2024-02-05", "2024-12-31"]
+    assert df["po_shipment_date"].tolist()[:2] == ["2024-03-01", "2068-01-31"]   # ปี 2 หลัก = 20xx ตามของเดิม
+    assert df["po_date"].isna().iloc[2] and df["po_shipment_date"].isna().iloc[2]
+    assert df["amount_excl_vat"].tolist() == [1000.0, -50.0, 7.0]
+    assert df["supplier_name"].tolist() == ["บริษัท ก", "บริษัท ข", "บริษัท ค"]
+
+
+def test_cp874_after_ascii_prefix_switches_encoding_mid_stream(tmp_path):
+    # 64KB แรกเป็น ASCII ล้วน (sniff ได้ utf-8) ภาษาไทย cp874 อยู่ท้ายไฟล์ → decode พังหลัง yield ไปแล้ว
+    rows = [INVOICE_HEADER] + [f"{i},01/02/2567,{i},2024-01-01,{i},B{i % 3},1,2,3" for i in range(4000)]
+    rows.append("9999,01/02/2567,9999,2024-01-01,9999,ผู้ซื้อ,1,2,3")
+    path = _write(tmp_path / "inv.csv", rows, encoding="cp874")
+    chunks = list(iter_old_invoice_chunks(path, chunksize=500))
+    df = load_old_invoice_data(path)
+    assert sum(len(c) for c in chunks) == len(df) == 4001
+    assert df["invoice_no"].tolist()[:3] == ["0", "1", "2"]
+    assert df["buyer_code"].iloc[-1] == "ผู้ซื้อ"
+
+
+def test_vectorised_dates_match_row_by_row():
+    values = pd.Series(["05/02/2567", "2024.12.31", "31/1/68", " 3/4/67 ", "05/13/2024", "13/25/2024", "31/02/2024",
+                        "1/1/1500", "25.11.134", "215-7-25", "2024-01-05 00:00:00", "not a date", "", None], dtype=object)
+    expected = pd.to_datetime(values.map(po_old_processor.normalize_th_date), errors="coerce").dt.strftime("%Y-%m-%d")
+    got = pd.to_datetime(po_old_processor.normalize_th_dates(values), errors="coerce").dt.strftime("%Y-%m-%d")
+    assert got.fillna("").tolist() == expected.fillna("").tolist()
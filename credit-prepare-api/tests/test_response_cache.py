@@ -0,0 +1,34 @@
+# tests/test_response_cache.py
+from services.response_cache import ResponseCache, cache_key
+
+OK = {"inquiryStatus": {"result": "Success"}}
+
+
+def _params(**kw):
+    params = {"registrationId": "0105541008416", "companyName": "", "status": "", "dataSet": "",
+              "dataField": "", "periodFrom": "", "periodTo": "", "fsType": "", "language": ""}
+    params.update(kw)
+    return params
+
+
+def test_data_set_and_company_name_are_part_of_key():
+    keys = {
+        cache_key(_params(dataSet="7")),
+        cache_key(_params(dataSet="3")),
+        cache_key(_params(dataSet="7", companyName="บริษัท ก")),
+    }
+    assert len(keys) == 3
+
+
+def test_data_field_order_does_not_matter():
+    assert cache_key(_params(dataField="b,a,a")) == cache_key(_params(dataField="a, b"))
+
+
+def test_get_data_set_does_not_hit_other_data_set(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    try:
+        assert cache.put(_params(dataSet="7"), dict(OK, data="seven"))
+        assert cache.get(_params(dataSet="3")) is None
+        assert cache.get(_params(dataSet="7"))["data"] == "seven"
+    finally:
+        cache.close()